@@ -4,8 +4,8 @@ from .models import MentalHealthSession, AIMatchingScore, MentalHealthResource,
 
 @admin.register(MentalHealthSession)
 class MentalHealthSessionAdmin(admin.ModelAdmin):
-    list_display = ('user', 'session_type', 'mood_rating', 'stress_level', 'created_at')
-    list_filter = ('session_type', 'mood_rating', 'stress_level', 'created_at')
+    list_display = ('user', 'session_type', 'session_date', 'mood_rating', 'stress_level', 'created_at')
+    list_filter = ('session_type', 'mood_rating', 'stress_level', 'session_date', 'created_at')
     search_fields = ('user__email', 'user__first_name', 'user__last_name', 'notes')
     ordering = ('-created_at',)
     
@@ -18,7 +18,7 @@ class MentalHealthSessionAdmin(admin.ModelAdmin):
         }),
     )
     
-    readonly_fields = ('created_at',)
+    readonly_fields = ('session_date', 'created_at')
 
 
 @admin.register(AIMatchingScore)
@@ -67,8 +67,8 @@ class MentalHealthResourceAdmin(admin.ModelAdmin):
 
 @admin.register(ChatMessage)
 class ChatMessageAdmin(admin.ModelAdmin):
-    list_display = ('session', 'role', 'content_preview', 'created_at')
-    list_filter = ('role', 'created_at')
+    list_display = ('session', 'role', 'content_preview', 'mood', 'created_at')
+    list_filter = ('role', 'mood', 'created_at')
     search_fields = ('content', 'session__user__email')
     ordering = ('-created_at',)
     
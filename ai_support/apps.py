@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AiSupportConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai_support'
+
+    def ready(self):
+        from . import caching, signals  # noqa: F401
+        from .chat_backends import configured_backend
+        from .chatbot_service import chatbot
+
+        chatbot.backend = configured_backend()
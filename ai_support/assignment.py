@@ -0,0 +1,132 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+from django.db.models import Count, Q
+
+from mentees.models import Mentee
+from mentors.models import Mentor
+from .matching_engine import MentorPool, get_mentor_pool, matchable_mentors, text_similarity_mode
+from .tfidf import get_tfidf_index
+
+# Connection requests that already take up a mentor slot
+OPEN_STATUSES = ['pending', 'accepted']
+
+
+def remaining_capacity(pool: MentorPool) -> np.ndarray:
+    """Free mentee slots per pool row; mentors who are not available get none."""
+    free = np.array(
+        matchable_mentors()
+        .annotate(open=Count('connection_requests', filter=Q(connection_requests__status__in=OPEN_STATUSES)))
+        .order_by('pk')
+        .values_list('pk', 'max_mentees', 'open'),
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    capacity = np.zeros(pool.size, dtype=np.int64)
+    if len(free):
+        # Pool mentors no longer matchable keep no slots
+        pos = np.clip(np.searchsorted(free[:, 0], pool.ids), 0, len(free) - 1)
+        found = free[pos, 0] == pool.ids
+        capacity[found] = np.maximum(0, free[pos[found], 1] - free[pos[found], 2])
+    capacity[~pool.available] = 0
+    return capacity
+
+
+def unmatched_mentees():
+    """Active mentees without a pending or accepted connection request."""
+    return Mentee.objects.filter(is_active=True).exclude(connection_requests__status__in=OPEN_STATUSES)
+
+
+def candidate_matrix(
+    pool: MentorPool, mentees: Sequence[Mentee], capacity: np.ndarray, k: int = 50, min_score: int = 1
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Each mentee's ``k`` best mentors with free slots, as (rows, scores) arrays.
+
+    Entries that are not eligible (no capacity, below ``min_score``) are -1 rows.
+    """
+    k = max(1, min(k, pool.size))
+    rows = np.full((len(mentees), k), -1, dtype=np.int64)
+    scores = np.zeros((len(mentees), k), dtype=np.float64)
+    open_mask = capacity > 0
+    tfidf = get_tfidf_index() if text_similarity_mode() == 'tfidf' else None
+    for i, mentee in enumerate(mentees):
+        mentee_scores = pool.score(mentee, tfidf=tfidf)[0]
+        mentee_scores = np.where(open_mask & (mentee_scores >= min_score), mentee_scores, -1)
+        best = np.argpartition(-mentee_scores, k - 1)[:k] if k < pool.size else np.arange(pool.size)
+        eligible = mentee_scores[best] >= 0
+        rows[i, :eligible.sum()] = best[eligible]
+        scores[i, :eligible.sum()] = mentee_scores[best[eligible]]
+    return rows, scores
+
+
+def solve_assignment(rows: np.ndarray, scores: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+    """Capacity-limited assignment maximizing the total score.
+
+    ``rows``/``scores`` hold each mentee's candidate mentors (-1 for none).
+    Each mentor is expanded into one column per free slot and each mentee
+    gets a private "unassigned" column worth 0, turning the problem into a
+    full bipartite matching solved exactly by scipy's sparse LAPJV. Returns
+    the mentor row for each mentee, or -1.
+    """
+    n = rows.shape[0]
+    if not n:
+        return np.zeros(0, dtype=np.int64)
+    capacity = np.minimum(np.asarray(capacity, dtype=np.int64), n)
+    safe_rows = np.where(rows >= 0, rows, 0)
+    valid = (rows >= 0) & (capacity[safe_rows] > 0)
+
+    slot_start = np.concatenate([[0], np.cumsum(capacity)])
+    slot_owner = np.repeat(np.arange(len(capacity)), capacity)
+    slots = int(slot_start[-1])
+
+    mentee_idx, cand_idx = np.nonzero(valid)
+    mentors = rows[mentee_idx, cand_idx]
+    per_edge = capacity[mentors]
+    edge_mentee = np.repeat(mentee_idx, per_edge)
+    # Column of the s-th slot of each mentor, for every candidate edge
+    offsets = np.arange(per_edge.sum()) - np.repeat(np.cumsum(per_edge) - per_edge, per_edge)
+    edge_col = np.repeat(slot_start[mentors], per_edge) + offsets
+    # Weights are shifted by one: scipy treats explicit zeros as missing edges,
+    # and every mentee takes exactly one column so the shift cannot change the optimum.
+    edge_weight = np.repeat(scores[mentee_idx, cand_idx], per_edge) + 1.0
+
+    graph = csr_matrix(
+        (
+            np.concatenate([edge_weight, np.ones(n)]),
+            (np.concatenate([edge_mentee, np.arange(n)]), np.concatenate([edge_col, slots + np.arange(n)])),
+        ),
+        shape=(n, slots + n),
+    )
+    _, columns = min_weight_full_bipartite_matching(graph, maximize=True)
+    owner = np.append(slot_owner, -1)
+    return owner[np.minimum(columns, slots)]
+
+
+def assign_mentees(
+    mentees: Optional[Sequence[Mentee]] = None, k: int = 50, min_score: int = 1, rounds: int = 3
+) -> List[Tuple[Mentee, Mentor, int]]:
+    """Capacity-aware (mentee, mentor, score) assignment maximizing total score.
+
+    Each round solves over every pending mentee's ``k`` best mentors with free
+    slots; mentees crowded out of all of theirs get fresh candidates among
+    the mentors left with capacity in the next round.
+    """
+    mentees = list(unmatched_mentees() if mentees is None else mentees)
+    pool = get_mentor_pool()
+    if not mentees or not pool.size:
+        return []
+    capacity = remaining_capacity(pool)
+    result = []
+    pending = mentees
+    for _ in range(rounds):
+        rows, scores = candidate_matrix(pool, pending, capacity, k, min_score)
+        assigned = solve_assignment(rows, scores, capacity)
+        for i in np.flatnonzero(assigned >= 0):
+            row = assigned[i]
+            result.append((pending[i], pool.mentors[row], int(scores[i][rows[i] == row][0])))
+        np.subtract.at(capacity, assigned[assigned >= 0], 1)
+        pending = [pending[i] for i in np.flatnonzero(assigned < 0) if (rows[i] >= 0).any()]
+        if not pending or not (assigned >= 0).any():
+            break
+    return result
@@ -0,0 +1,58 @@
+from collections import deque
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Set
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton reporting which keyword tables occur in a text.
+
+    ``tables`` maps a label to its keywords. Matching is by substring, like
+    ``keyword in text.lower()``, but every table is found in one pass over
+    the text. The failure links are folded into a full transition table so
+    the scan is a single dict lookup per character.
+    """
+
+    def __init__(self, tables: Dict[Hashable, Iterable[str]]):
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[Set[Hashable]] = [set()]
+        for label, keywords in tables.items():
+            for keyword in keywords:
+                state = 0
+                for char in keyword.lower():
+                    if char not in goto[state]:
+                        goto.append({})
+                        outputs.append(set())
+                        goto[state][char] = len(goto) - 1
+                    state = goto[state][char]
+                outputs[state].add(label)
+
+        # Breadth-first, so a state's failure target is always finished first
+        alphabet = {char for edges in goto for char in edges}
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] |= outputs[fail[state]]
+            for char in alphabet:
+                target = goto[state].get(char)
+                if target is None:
+                    target = delta[fail[state]].get(char, 0)
+                else:
+                    fail[target] = delta[fail[state]].get(char, 0)
+                    queue.append(target)
+                if target:
+                    delta[state][char] = target
+
+        self._delta = delta
+        self._outputs: List[FrozenSet[Hashable]] = [frozenset(labels) for labels in outputs]
+
+    def scan(self, text: str) -> Set[Hashable]:
+        """Labels of every table with a keyword occurring in ``text``."""
+        delta, outputs = self._delta, self._outputs
+        state = 0
+        found: Set[Hashable] = set()
+        for char in text.lower():
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return found
@@ -0,0 +1,31 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+
+# Cache settings whose entries other processes must see: the match list
+# versions bumped by process_match_queue and mentor saves, and the chat
+# history rings appended to by whichever worker handled the turn
+SHARED_CACHE_SETTINGS = ('AI_MATCHING_CACHE', 'AI_CHATBOT_HISTORY_CACHE')
+
+
+def shared_cache(setting: str) -> Optional[BaseCache]:
+    """The cache named by ``setting``, or None when it is per-process local memory."""
+    cache = caches[getattr(settings, setting, 'default')]
+    return None if isinstance(cache, LocMemCache) else cache
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    return [
+        Warning(
+            f"{setting} is a local-memory cache, which other processes cannot see.",
+            hint='Use the database or Redis cache; until then it is not used.',
+            id='ai_support.W001',
+        )
+        for setting in SHARED_CACHE_SETTINGS
+        if shared_cache(setting) is None
+    ]
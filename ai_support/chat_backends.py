@@ -0,0 +1,200 @@
+import abc
+import json
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import requests
+import urllib3
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+# Status codes worth another attempt: throttling and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Most bytes of a reply body taken per read
+READ_SIZE = 16384
+
+SYSTEM_PROMPT = (
+    "You are a supportive mental health companion for entrepreneurs. Reply with empathy in a few "
+    "sentences, relate to the pressures of running a business, and suggest professional help when "
+    "the user seems to need more than peer support."
+)
+
+
+class BackendError(Exception):
+    """The backend could not produce a reply in time; callers fall back to the rules."""
+
+
+class RetryBudget:
+    """Caps retries at ``ratio`` of the requests seen in the last ``window`` seconds.
+
+    ``minimum`` retries per window are always allowed so a quiet process can
+    still retry. Once a backend is failing everywhere, retries stop adding
+    load on top of it.
+    """
+
+    def __init__(self, ratio: float = 0.1, minimum: int = 3, window: float = 10.0):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.window = window
+        self._requests = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float) -> None:
+        for events in (self._requests, self._retries):
+            while events and events[0] <= now - self.window:
+                events.popleft()
+
+    def record_request(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_retry(self) -> bool:
+        """Spend one retry if the budget allows it."""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            if len(self._retries) >= self.minimum + self.ratio * len(self._requests):
+                return False
+            self._retries.append(now)
+            return True
+
+
+class ChatBackend(abc.ABC):
+    """Source of model-generated chatbot replies.
+
+    ``reply`` returns the reply text or raises ``BackendError``; the chatbot
+    then answers with its rule-based reply instead.
+    """
+
+    # Whether reply() waits on I/O and should run off the event loop
+    blocking = True
+
+    @abc.abstractmethod
+    def reply(self, message: str, session_history: List[Dict]) -> str:
+        """Reply text for ``message`` after ``session_history``, or raise ``BackendError``."""
+
+
+class OpenAIChatBackend(ChatBackend):
+    """Client for an OpenAI-compatible ``/chat/completions`` endpoint.
+
+    One pooled keep-alive ``requests.Session`` is shared by all threads. At
+    most ``max_concurrency`` requests are in flight; callers beyond that wait
+    for a slot within their deadline. Every reply has ``deadline`` seconds
+    overall, covering the wait for a slot, each attempt and the backoff
+    between them. Attempts use ``timeout`` or whatever is left of the
+    deadline, if less. Failed attempts are retried up to ``max_retries``
+    times while the shared ``RetryBudget`` allows it.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        model: str,
+        api_key: str = '',
+        timeout: float = 3.0,
+        deadline: float = 8.0,
+        max_retries: int = 2,
+        max_concurrency: int = 8,
+        retry_budget: Optional[RetryBudget] = None,
+        system_prompt: str = SYSTEM_PROMPT,
+        max_history: int = 10,
+    ):
+        self.url = url.rstrip('/') + '/chat/completions'
+        self.model = model
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget or RetryBudget()
+        self.system_prompt = system_prompt
+        self.max_history = max_history
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.session = requests.Session()
+        # Retries are ours (budgeted); the adapter only pools connections
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if api_key:
+            self.session.headers['Authorization'] = f'Bearer {api_key}'
+
+    def messages(self, message: str, session_history: List[Dict]) -> List[Dict]:
+        history = [
+            {'role': turn['role'], 'content': turn['content']}
+            for turn in session_history[-self.max_history:] if turn.get('role') in ('user', 'assistant')
+        ] if self.max_history else []
+        return [{'role': 'system', 'content': self.system_prompt}, *history, {'role': 'user', 'content': message}]
+
+    def reply(self, message: str, session_history: List[Dict]) -> str:
+        give_up = time.monotonic() + self.deadline
+        if not self._slots.acquire(timeout=self.deadline):
+            raise BackendError('No free backend slot before the deadline')
+        try:
+            return self._complete(self.messages(message, session_history), give_up)
+        finally:
+            self._slots.release()
+
+    def _complete(self, messages: List[Dict], give_up: float) -> str:
+        payload = {'model': self.model, 'messages': messages}
+        self.retry_budget.record_request()
+        attempt = 0
+        while True:
+            remaining = give_up - time.monotonic()
+            if remaining <= 0:
+                raise BackendError('Deadline exceeded')
+            try:
+                response = self.session.post(self.url, json=payload, timeout=min(self.timeout, remaining), stream=True)
+                if response.status_code not in RETRY_STATUSES:
+                    if not response.ok:
+                        response.close()
+                        raise BackendError(f'Backend answered {response.status_code}')
+                    return self._content(self._read(response, give_up))
+                response.close()
+                error = BackendError(f'Backend answered {response.status_code}')
+            except (requests.RequestException, urllib3.exceptions.HTTPError) as exc:
+                error = BackendError(str(exc))
+            attempt += 1
+            if attempt > self.max_retries or not self.retry_budget.try_retry():
+                raise error
+            backoff = min(0.05 * 2 ** (attempt - 1), give_up - time.monotonic())
+            if backoff > 0:
+                time.sleep(backoff)
+
+    @staticmethod
+    def _read(response, give_up: float) -> bytes:
+        # The timeout only bounds each socket read, so a body streamed slowly
+        # enough could outlast the deadline; check it between reads
+        body = bytearray()
+        try:
+            while True:
+                chunk = response.raw.read1(READ_SIZE, decode_content=True)
+                if not chunk:
+                    return bytes(body)
+                body += chunk
+                if time.monotonic() > give_up:
+                    raise BackendError('Deadline exceeded while reading the reply')
+        finally:
+            response.close()
+
+    @staticmethod
+    def _content(body: bytes) -> str:
+        try:
+            content = json.loads(body)['choices'][0]['message']['content']
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise BackendError('Malformed completion response')
+        if not isinstance(content, str) or not content.strip():
+            raise BackendError('Empty completion')
+        return content.strip()
+
+
+def configured_backend() -> Optional[ChatBackend]:
+    """The backend from ``settings.AI_CHATBOT_BACKEND``, or None for rule-based replies."""
+    options = dict(getattr(settings, 'AI_CHATBOT_BACKEND', {}))
+    url = options.pop('url', '')
+    if not url:
+        return None
+    retry_ratio = options.pop('retry_ratio', 0.1)
+    return OpenAIChatBackend(url, retry_budget=RetryBudget(ratio=retry_ratio), **options)
@@ -0,0 +1,138 @@
+import base64
+import json
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .caching import shared_cache
+from .models import ChatMessage, MentalHealthSession
+
+
+def _cache():
+    return shared_cache('AI_CHATBOT_HISTORY_CACHE')
+
+
+def _size() -> int:
+    return getattr(settings, 'AI_CHATBOT_HISTORY_SIZE', 10)
+
+
+def _history_key(user_id: int) -> str:
+    # One daily check-in session per user and session_date, so no session lookup is needed
+    return f'chat_history:{user_id}:{timezone.localdate().isoformat()}'
+
+
+def load_history(user_id: int) -> List[Dict]:
+    """The last ``AI_CHATBOT_HISTORY_SIZE`` messages of the user's check-in today, oldest first.
+
+    Served from a cached ring; on a miss a single query reads just that
+    window through the (session, created_at, id) index and refills the ring.
+    Without a shared cache every call runs that query.
+    """
+    cache = _cache()
+    key = _history_key(user_id)
+    history = cache.get(key) if cache is not None else None
+    if history is None:
+        session = MentalHealthSession.objects.filter(
+            user_id=user_id, session_type='daily_checkin', session_date=timezone.localdate()
+        ).values('pk')
+        # Pinning the session lets the index yield the window without sorting
+        recent = ChatMessage.objects.filter(session_id=Subquery(session)).order_by(
+            '-created_at', '-id'
+        ).values('role', 'content')[:_size()]
+        history = list(reversed(recent))
+        if cache is not None:
+            cache.set(key, history, getattr(settings, 'AI_CHATBOT_HISTORY_TTL', 3600))
+    return history
+
+
+def append_turn(user_id: int, message: str, reply: str) -> None:
+    """Push a saved user message and its reply onto the cached ring, if there is one.
+
+    Without a cached ring the next ``load_history`` reads the saved rows.
+    """
+    cache = _cache()
+    if cache is None:
+        return
+    key = _history_key(user_id)
+    history = cache.get(key)
+    if history is None:
+        return
+    size = _size()
+    history = history + [{'role': 'user', 'content': message}, {'role': 'assistant', 'content': reply}]
+    cache.set(key, history[-size:] if size else [], getattr(settings, 'AI_CHATBOT_HISTORY_TTL', 3600))
+
+
+# Sessions read per history page once the current one runs out, so every
+# page costs a fixed number of index range scans
+HISTORY_PAGE_SESSIONS = 3
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(session_id: int, session_created, message_created=None, message_id: Optional[int] = None) -> str:
+    position = [session_id, session_created.isoformat()]
+    if message_id is not None:
+        position += [message_created.isoformat(), message_id]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        session_id, session_created = int(position[0]), parse_datetime(position[1])
+        message_created = message_id = None
+        if len(position) > 2:
+            message_created, message_id = parse_datetime(position[2]), int(position[3])
+    except (ValueError, TypeError, IndexError, KeyError):
+        raise InvalidCursor('Malformed history cursor')
+    if session_created is None or (message_id is not None and message_created is None):
+        raise InvalidCursor('Malformed history cursor')
+    return session_id, session_created, message_created, message_id
+
+
+def history_page(user_id: int, cursor: Optional[str] = None, limit: int = 50) -> Tuple[List[Dict], Optional[str]]:
+    """A page of the user's chat messages across sessions, newest first, and the cursor of the next page.
+
+    Sessions are walked newest first and each one is read by keyset on
+    (created_at, id) through the (session, created_at, id) index, taking
+    only what the page still lacks. The cursor records the session and the
+    last message returned, so a page never re-reads earlier pages and costs
+    the same however long the history is. Raises ``InvalidCursor`` for a
+    cursor this function did not produce.
+    """
+    messages = ChatMessage.objects.filter(session__user_id=user_id).order_by('-created_at', '-id').values(
+        'id', 'session_id', 'role', 'content', 'created_at'
+    )
+    sessions = MentalHealthSession.objects.filter(user_id=user_id).order_by('-created_at', '-id')
+    page, position = [], None
+    if cursor:
+        session_id, session_created, message_created, message_id = decode_cursor(cursor)
+        position = (session_id, session_created)
+        if message_id is not None:
+            page = list(messages.filter(session_id=session_id).filter(
+                Q(created_at__lt=message_created) | Q(created_at=message_created, id__lt=message_id)
+            )[:limit])
+        sessions = sessions.filter(
+            Q(created_at__lt=session_created) | Q(created_at=session_created, id__lt=session_id)
+        )
+    exhausted = True
+    if len(page) < limit:
+        older = list(sessions.values_list('id', 'created_at')[:HISTORY_PAGE_SESSIONS + 1])
+        exhausted = len(older) <= HISTORY_PAGE_SESSIONS
+        for session_id, session_created in older[:HISTORY_PAGE_SESSIONS]:
+            position = (session_id, session_created)
+            page += messages.filter(session_id=session_id)[:limit - len(page)]
+            if len(page) == limit:
+                break
+    if len(page) == limit:
+        last = page[-1]
+        return page, encode_cursor(*position, last['created_at'], last['id'])
+    if not exhausted:
+        # The page came up short on near-empty sessions; carry on after the last one read
+        return page, encode_cursor(*position)
+    return page, None
@@ -0,0 +1,58 @@
+from typing import Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.utils import timezone
+
+from .chat_history import append_turn
+from .models import ChatMessage, MentalHealthSession
+from .mood_rollups import refresh_rollups
+from .upserts import conflict_target
+from .write_behind import get_message_buffer, write_behind_enabled
+
+
+def _upsert_session(user, reply: str, mood_rating, stress_level) -> MentalHealthSession:
+    today = timezone.localdate()
+    values = {'mood_rating': mood_rating, 'stress_level': stress_level, 'ai_response': reply}
+    session, = MentalHealthSession.objects.bulk_create(
+        [MentalHealthSession(user=user, session_type='daily_checkin', session_date=today, notes='', **values)],
+        update_conflicts=True,
+        unique_fields=conflict_target(['user', 'session_type', 'session_date']),
+        update_fields=list(values),
+    )
+    if session.pk is None:
+        # The backend does not return upserted ids (MySQL)
+        session = MentalHealthSession.objects.get(user=user, session_type='daily_checkin', session_date=today)
+    return session
+
+
+def save_chat_turn(user, message: str, reply: str, mood_rating, stress_level) -> Tuple[ChatMessage, ChatMessage]:
+    """Record a user message and the chatbot's reply in today's check-in session.
+
+    One transaction: an upsert of the session on its (user, session_type,
+    session_date) key that also sets the ratings and latest reply, a
+    refresh of the user's mood rollups for today (the upsert fires no
+    signals), and one ``bulk_create`` of both messages. In write-behind
+    mode the messages are instead handed to the message buffer once the
+    transaction commits. Returns the (user message, reply message);
+    buffered ones are not saved yet.
+    """
+    with transaction.atomic():
+        session = _upsert_session(user, reply, mood_rating, stress_level)
+        refresh_rollups(user.pk, timezone.localdate())
+        messages = [
+            ChatMessage(session=session, content=message, role='user'),
+            ChatMessage(session=session, content=reply, role='assistant'),
+        ]
+        if write_behind_enabled():
+            # The flusher uses its own connection, so it must see the session committed.
+            # The turn is already saved by then: a failing inline flush is logged, not raised.
+            transaction.on_commit(lambda: get_message_buffer().put(messages), robust=True)
+        else:
+            ChatMessage.objects.bulk_create(messages)
+    append_turn(user.pk, message, reply)
+    return messages[0], messages[1]
+
+
+# Transactions cannot span async ORM calls, so async views run the turn in a thread
+asave_chat_turn = sync_to_async(save_chat_turn)
@@ -1,12 +1,66 @@
 import random
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+import time
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+
+from .automaton import KeywordAutomaton
+from .chat_backends import BackendError
+from .mood_trends import point_trends
+from .rules import Rule, RulePipeline
+
+
+# Mood keyword tables in priority order: the first table with a hit decides
+# the mood, entrepreneur-specific phrases before general mood words.
+MOOD_KEYWORDS = [
+    ('happy', ['business is good', 'sales up', 'successful', 'profitable', 'growth', 'excited about business']),
+    ('sad', ['business failing', 'no sales', 'losing money', 'want to quit', 'business is hard']),
+    ('anxious', ['cash flow', 'financial stress', 'market uncertainty', 'competition', 'business anxiety']),
+    ('stressed', ['overwhelmed', 'too much work', 'burnout', 'work life balance', 'business stress']),
+    ('happy', ['happy', 'good', 'great', 'wonderful', 'excited', 'joy', 'pleased']),
+    ('sad', ['sad', 'depressed', 'down', 'blue', 'miserable', 'hopeless']),
+    ('anxious', ['anxious', 'worried', 'nervous', 'panic', 'fear', 'scared']),
+    ('stressed', ['stressed', 'overwhelmed', 'pressure', 'tired', 'exhausted']),
+]
+
+CHALLENGE_KEYWORDS = [
+    ('financial_worries', ['money', 'cash', 'financial', 'funding', 'revenue', 'profit']),
+    ('work_life_balance', ['work life', 'balance', 'family', 'personal time', 'boundaries']),
+    ('loneliness', ['alone', 'lonely', 'isolated', 'no support', 'no one understands']),
+    ('imposter_syndrome', ['imposter', 'not good enough', 'don\'t belong', 'not qualified']),
+    ('failure_fear', ['failure', 'fail', 'losing', 'going to fail', 'what if']),
+]
+
+# In priority order; crisis always comes first
+INTENT_KEYWORDS = {
+    'crisis': ['suicide', 'kill myself', 'end it all', 'no reason to live', 'want to die'],
+    'greeting': ['hello', 'hi', 'hey', 'start', 'begin'],
+    'professional_help': ['help', 'therapy', 'counselor', 'professional', 'support'],
+    'entrepreneur_support': ['mentor', 'coach', 'network', 'other entrepreneurs', 'business support'],
+}
+
+_AUTOMATON = KeywordAutomaton({
+    **{('mood', rank): words for rank, (_, words) in enumerate(MOOD_KEYWORDS)},
+    **{('challenge', name): words for name, words in CHALLENGE_KEYWORDS},
+    **{('intent', name): words for name, words in INTENT_KEYWORDS.items()},
+})
+
+
+class MessageSignals(NamedTuple):
+    mood: str
+    challenges: List[str]
+    crisis: bool
+    intent: Optional[str]
+    intents: FrozenSet[str]
 
 
 class MentalHealthChatbot:
     """AI-powered mental health support chatbot specifically for entrepreneurs"""
     
-    def __init__(self):
+    def __init__(self, backend=None):
+        # Optional ChatBackend for model-generated replies; rules answer without one
+        self.backend = backend
         self.greetings = [
             "Hello entrepreneur! How are you feeling today? Running a business can be challenging, and I'm here to support you.",
             "Hi there! I'm your entrepreneurial mental health companion. How's your business journey affecting your well-being today?",
@@ -118,103 +172,119 @@ class MentalHealthChatbot:
             ]
         }
 
+        # Ordered response rules; the first one that applies decides the reply
+        self.rules = RulePipeline([
+            Rule('crisis', lambda signals: signals.crisis, self._resource_reply('crisis')),
+            Rule('greeting', lambda signals: 'greeting' in signals.intents, self._greeting_reply),
+            Rule('professional_help', lambda signals: 'professional_help' in signals.intents,
+                 self._resource_reply('professional_help')),
+            Rule('entrepreneur_support', lambda signals: 'entrepreneur_support' in signals.intents,
+                 self._resource_reply('entrepreneur_support')),
+            Rule('mood', lambda signals: True, self._mood_reply),
+        ])
+
+    def classify(self, message: str) -> MessageSignals:
+        """Mood, challenges, crisis flag and intent of ``message`` from one scan"""
+        found = _AUTOMATON.scan(message)
+
+        mood = 'neutral'
+        for rank, (label, _) in enumerate(MOOD_KEYWORDS):
+            if ('mood', rank) in found:
+                mood = label
+                break
+        challenges = [name for name, _ in CHALLENGE_KEYWORDS if ('challenge', name) in found]
+        intents = [name for name in INTENT_KEYWORDS if ('intent', name) in found]
+        return MessageSignals(
+            mood, challenges, 'crisis' in intents, intents[0] if intents else None, frozenset(intents)
+        )
+
+    def classify_batch(self, messages: Iterable[str]) -> List[MessageSignals]:
+        """``classify`` over many messages, in order"""
+        return [self.classify(message) for message in messages]
+
     def analyze_entrepreneur_mood(self, message: str) -> str:
         """Analyze user message to determine mood with entrepreneur context"""
-        message_lower = message.lower()
-        
-        # Entrepreneur-specific indicators
-        if any(word in message_lower for word in ['business is good', 'sales up', 'successful', 'profitable', 'growth', 'excited about business']):
-            return 'happy'
-        
-        if any(word in message_lower for word in ['business failing', 'no sales', 'losing money', 'want to quit', 'business is hard']):
-            return 'sad'
-        
-        if any(word in message_lower for word in ['cash flow', 'financial stress', 'market uncertainty', 'competition', 'business anxiety']):
-            return 'anxious'
-        
-        if any(word in message_lower for word in ['overwhelmed', 'too much work', 'burnout', 'work life balance', 'business stress']):
-            return 'stressed'
-        
-        # General mood indicators
-        if any(word in message_lower for word in ['happy', 'good', 'great', 'wonderful', 'excited', 'joy', 'pleased']):
-            return 'happy'
-        
-        if any(word in message_lower for word in ['sad', 'depressed', 'down', 'blue', 'miserable', 'hopeless']):
-            return 'sad'
-        
-        if any(word in message_lower for word in ['anxious', 'worried', 'nervous', 'panic', 'fear', 'scared']):
-            return 'anxious'
-        
-        if any(word in message_lower for word in ['stressed', 'overwhelmed', 'pressure', 'tired', 'exhausted']):
-            return 'stressed'
-        
-        return 'neutral'
+        return self.classify(message).mood
 
     def identify_entrepreneur_challenges(self, message: str) -> List[str]:
         """Identify specific entrepreneurial challenges mentioned"""
-        message_lower = message.lower()
-        challenges = []
-        
-        if any(word in message_lower for word in ['money', 'cash', 'financial', 'funding', 'revenue', 'profit']):
-            challenges.append('financial_worries')
-        
-        if any(word in message_lower for word in ['work life', 'balance', 'family', 'personal time', 'boundaries']):
-            challenges.append('work_life_balance')
-        
-        if any(word in message_lower for word in ['alone', 'lonely', 'isolated', 'no support', 'no one understands']):
-            challenges.append('loneliness')
-        
-        if any(word in message_lower for word in ['imposter', 'not good enough', 'don\'t belong', 'not qualified']):
-            challenges.append('imposter_syndrome')
-        
-        if any(word in message_lower for word in ['failure', 'fail', 'losing', 'going to fail', 'what if']):
-            challenges.append('failure_fear')
-        
-        return challenges
+        return self.classify(message).challenges
 
     def generate_entrepreneur_response(self, message: str, session_history: List[Dict] = None) -> str:
         """Generate appropriate AI response for entrepreneurs"""
-        if not session_history:
-            session_history = []
-        
-        # Check for greetings
-        if any(word in message.lower() for word in ['hello', 'hi', 'hey', 'start', 'begin']):
-            return random.choice(self.greetings)
-        
-        # Analyze mood with entrepreneur context
-        mood = self.analyze_entrepreneur_mood(message)
-        
-        # Identify specific entrepreneurial challenges
-        challenges = self.identify_entrepreneur_challenges(message)
-        
+        start = time.perf_counter_ns()
+        signals = self.classify(message)
+        self.rules.record('classify', True, time.perf_counter_ns() - start)
+        # Crisis replies always come from the vetted resource list
+        if self.backend is not None and not signals.crisis:
+            reply = self._backend_reply(message, session_history or [])
+            if reply is not None:
+                return reply
+        return self.rules.run(message, signals)
+
+    def _backend_reply(self, message: str, session_history: List[Dict]) -> Optional[str]:
+        start = time.perf_counter_ns()
+        try:
+            reply = self.backend.reply(message, session_history)
+        except BackendError:
+            reply = None
+        self.rules.record('backend', reply is not None, time.perf_counter_ns() - start)
+        return reply
+
+    async def agenerate_entrepreneur_response(self, message: str, session_history: List[Dict] = None) -> str:
+        """Async ``generate_entrepreneur_response`` for async views.
+
+        Rule matching is a few microseconds of CPU, so it runs inline; a
+        blocking model backend runs in a worker thread so the event loop
+        keeps serving other connections while it waits.
+        """
+        if self.backend is not None and self.backend.blocking:
+            return await sync_to_async(self.generate_entrepreneur_response, thread_sensitive=False)(
+                message, session_history
+            )
+        return self.generate_entrepreneur_response(message, session_history)
+
+    def stream_entrepreneur_response(self, message: str, session_history: List[Dict] = None) -> Iterator[str]:
+        """Reply to ``message`` as text chunks, for streaming to the client.
+
+        The rule-based reply is ready at once, so it is a single chunk; a
+        token-generating backend yields its tokens here as they arrive.
+        """
+        yield self.generate_entrepreneur_response(message, session_history)
+
+    async def astream_entrepreneur_response(self, message: str, session_history: List[Dict] = None) -> AsyncIterator[str]:
+        """Async ``stream_entrepreneur_response``; a blocking backend runs off the event loop."""
+        yield await self.agenerate_entrepreneur_response(message, session_history)
+
+    def _resource_reply(self, kind: str):
+        return lambda message, signals: random.choice(self.entrepreneur_resources[kind])
+
+    def _greeting_reply(self, message: str, signals: MessageSignals) -> str:
+        return random.choice(self.greetings)
+
+    def _mood_reply(self, message: str, signals: MessageSignals) -> str:
+        mood = signals.mood
+
         # Generate mood-appropriate response
         mood_response = random.choice(self.entrepreneur_mood_responses.get(mood, self.entrepreneur_mood_responses['neutral']))
-        
+
         # Add entrepreneur-specific coping strategies
         if mood in ['anxious', 'stressed', 'sad']:
             coping_strategy = random.choice(self.entrepreneur_coping_strategies.get(mood, self.entrepreneur_coping_strategies['business_specific']))
             mood_response = f"{mood_response} {coping_strategy}"
-        
+
         # Add challenge-specific responses
-        if challenges:
-            challenge_response = random.choice(self.entrepreneur_challenges.get(challenges[0], [""]))
+        if signals.challenges:
+            challenge_response = random.choice(self.entrepreneur_challenges.get(signals.challenges[0], [""]))
             if challenge_response:
                 mood_response = f"{mood_response} {challenge_response}"
-        
-        # Check for crisis indicators
-        if any(word in message.lower() for word in ['suicide', 'kill myself', 'end it all', 'no reason to live', 'want to die']):
-            return random.choice(self.entrepreneur_resources['crisis'])
-        
-        # Check for help-seeking
-        if any(word in message.lower() for word in ['help', 'therapy', 'counselor', 'professional', 'support']):
-            return random.choice(self.entrepreneur_resources['professional_help'])
-        
-        # Check for entrepreneur-specific help
-        if any(word in message.lower() for word in ['mentor', 'coach', 'network', 'other entrepreneurs', 'business support']):
-            return random.choice(self.entrepreneur_resources['entrepreneur_support'])
-        
+
         return mood_response
 
+    def rule_stats(self) -> Dict[str, Dict[str, float]]:
+        """Hit counts and timings of message classification and each response rule"""
+        return self.rules.stats()
+
     def suggest_entrepreneur_resources(self, mood: str, stress_level: int, challenges: List[str] = None) -> List[str]:
         """Suggest mental health resources specifically for entrepreneurs"""
         suggestions = []
@@ -240,38 +310,37 @@ class MentalHealthChatbot:
         
         return suggestions[:3]  # Return top 3 suggestions
 
-    def track_mood_trends(self, sessions: List[Dict]) -> Dict:
-        """Analyze mood trends from session history"""
-        if not sessions:
+    def track_mood_trends(self, sessions: List[Dict], window: int = 7, today: Optional[date] = None) -> Dict:
+        """Analyze the mood trend of the last ``window`` days of session history
+
+        Each entry is a session, or a daily rollup whose ``mood_rating`` is
+        the day's mean over ``session_count`` sessions. Entries without a
+        ``date`` count as one per day. See ``mood_trends.window_stats``.
+        """
+        report = point_trends(sessions, [window], today)[window] if sessions else None
+        if not report or not report['sessions']:
             return {'trend': 'stable', 'average_mood': 5, 'sessions_count': 0}
-        
-        recent_sessions = sessions[-7:]  # Last 7 sessions
-        mood_scores = [session.get('mood_rating', 5) for session in recent_sessions]
-        
-        if len(mood_scores) < 2:
-            return {'trend': 'stable', 'average_mood': sum(mood_scores) / len(mood_scores), 'sessions_count': len(mood_scores)}
-        
-        # Calculate trend
-        first_half = mood_scores[:len(mood_scores)//2]
-        second_half = mood_scores[len(mood_scores)//2:]
-        
-        first_avg = sum(first_half) / len(first_half)
-        second_avg = sum(second_half) / len(second_half)
-        
-        if second_avg > first_avg + 1:
-            trend = 'improving'
-        elif second_avg < first_avg - 1:
-            trend = 'declining'
-        else:
-            trend = 'stable'
-        
+        mood = report['mood']
         return {
-            'trend': trend,
-            'average_mood': sum(mood_scores) / len(mood_scores),
-            'sessions_count': len(mood_scores),
-            'recent_mood': mood_scores[-1] if mood_scores else 5
+            'trend': report['trend'],
+            'average_mood': mood['mean'],
+            'sessions_count': report['sessions'],
+            'recent_mood': sessions[-1].get('mood_rating', 5),
+            'ewma_mood': mood['ewma'],
+            'mood_slope': mood['slope'],
+            'mood_volatility': mood['volatility'],
+            'change_point': mood['change_point'],
         }
 
 
 # Global chatbot instance
 chatbot = MentalHealthChatbot()
+
+
+def label_messages(rows: List[Tuple[int, str]]) -> List[Tuple[int, str, List[str]]]:
+    """(id, mood, challenges) labels for (id, content) rows.
+
+    A plain function of plain data so it can be shipped to worker processes.
+    """
+    signals = chatbot.classify_batch(content for _, content in rows)
+    return [(pk, signal.mood, signal.challenges) for (pk, _), signal in zip(rows, signals)]
@@ -0,0 +1,77 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set
+
+from core.text import sub_phrases
+from mentors.models import Mentor
+from .models import MentorFocusToken
+
+
+def focus_keys(phrases: Iterable[str]) -> Set[str]:
+    """Index keys of a mentor's focus phrases: every run of words a mentee phrase can match."""
+    return {part[:200] for phrase in phrases for part in sub_phrases(phrase)}
+
+
+def reindex_mentor(mentor: Mentor) -> None:
+    """Bring the index rows of one mentor in line with its focus_area_tokens."""
+    wanted = focus_keys(mentor.focus_area_tokens)
+    existing = set(
+        MentorFocusToken.objects.filter(mentor=mentor).values_list('token', flat=True)
+    )
+    stale = existing - wanted
+    if stale:
+        MentorFocusToken.objects.filter(mentor=mentor, token__in=stale).delete()
+    added = wanted - existing
+    if added:
+        MentorFocusToken.objects.bulk_create(
+            [MentorFocusToken(mentor=mentor, token=token) for token in added],
+            ignore_conflicts=True,
+        )
+
+
+def rebuild_index(batch_size: int = 1000) -> int:
+    """Rebuild the whole index from Mentor.focus_area_tokens; return rows written."""
+    MentorFocusToken.objects.all().delete()
+    rows = []
+    written = 0
+    for mentor_id, tokens in Mentor.objects.values_list('id', 'focus_area_tokens').iterator(chunk_size=batch_size):
+        rows.extend(
+            MentorFocusToken(mentor_id=mentor_id, token=token)
+            for token in focus_keys(tokens)
+        )
+        if len(rows) >= batch_size:
+            MentorFocusToken.objects.bulk_create(rows, batch_size=batch_size)
+            written += len(rows)
+            rows = []
+    if rows:
+        MentorFocusToken.objects.bulk_create(rows, batch_size=batch_size)
+        written += len(rows)
+    return written
+
+
+class FocusIndex:
+    """In-memory snapshot of the inverted index: token -> set of mentor IDs."""
+
+    def __init__(self, postings: Dict[str, Set[int]]):
+        self.postings = postings
+
+    @classmethod
+    def load(cls, mentor_ids: Optional[Iterable[int]] = None) -> 'FocusIndex':
+        """Load postings for all mentors, or only for ``mentor_ids``."""
+        rows = MentorFocusToken.objects.all()
+        if mentor_ids is not None:
+            rows = rows.filter(mentor_id__in=list(mentor_ids))
+        postings: Dict[str, Set[int]] = defaultdict(set)
+        for token, mentor_id in rows.values_list('token', 'mentor_id').iterator(chunk_size=5000):
+            postings[token].add(mentor_id)
+        return cls(dict(postings))
+
+    def lookup(self, token: str) -> Set[int]:
+        """Mentor IDs with ``token``, a stemmed phrase, inside one of their focus phrases."""
+        return self.postings.get(token, set())
+
+    def mentor_ids_for(self, tokens: Iterable[str]) -> Set[int]:
+        """Union of the mentors matching any of ``tokens``."""
+        found: Set[int] = set()
+        for token in tokens:
+            found |= self.lookup(token)
+        return found
@@ -0,0 +1,137 @@
+import zlib
+from typing import List
+
+import numpy as np
+from django.conf import settings
+
+from core.text import sub_phrases
+
+
+STAGES = ['idea', 'startup', 'growth', 'established']
+INDUSTRY_DIMS = 32
+TOKEN_DIMS = 128
+# stage one-hot | hashed industry | hashed focus tokens | availability | rating
+DIMS = len(STAGES) + INDUSTRY_DIMS + TOKEN_DIMS + 2
+
+# Feature group weights loosely follow the score_match weight table
+STAGE_WEIGHT = 0.30
+INDUSTRY_WEIGHT = 0.25
+TOKEN_WEIGHT = 0.45
+BOOST_WEIGHT = 0.10
+
+DEFAULTS = {
+    'tables': 16,
+    'bits': 12,
+    'candidates': 300,
+    'seed': 7,
+}
+
+
+def _bucket(value: str, dims: int) -> int:
+    return zlib.crc32(value.encode('utf-8')) % dims
+
+
+def _features(vector: np.ndarray, stage: str, industry: str, tokens: List[str], available: float, rating: float) -> None:
+    if stage in STAGES:
+        vector[STAGES.index(stage)] = STAGE_WEIGHT
+    if industry:
+        vector[len(STAGES) + _bucket(industry.lower(), INDUSTRY_DIMS)] = INDUSTRY_WEIGHT
+    if tokens:
+        offset = len(STAGES) + INDUSTRY_DIMS
+        token_weight = TOKEN_WEIGHT / np.sqrt(len(set(tokens)))
+        for token in set(tokens):
+            vector[offset + _bucket(token, TOKEN_DIMS)] += token_weight
+    vector[-2] = BOOST_WEIGHT * available
+    vector[-1] = BOOST_WEIGHT * rating
+
+
+class MentorLSH:
+    """Random-hyperplane (SimHash) LSH over mentor feature vectors.
+
+    Each of ``tables`` hash tables keys mentors by the sign pattern of
+    ``bits`` random projections. A mentee is hashed the same way; mentors
+    sharing a bucket in any table are candidates, and if that yields too
+    few, buckets one bit away are probed in order of the smallest
+    projection margin.
+    """
+
+    def __init__(self, pool, tables: int = 16, bits: int = 12, candidates: int = 300, seed: int = 7):
+        if not 1 <= bits <= 63:
+            raise ValueError("bits must be between 1 and 63")
+        self.pool = pool
+        self.tables = tables
+        self.bits = bits
+        self.candidates = candidates
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((DIMS, tables * bits)).astype(np.float32)
+        self.weights = (np.int64(1) << np.arange(bits, dtype=np.int64))
+
+        keys = np.empty((tables, pool.size), dtype=np.int64)
+        chunk = 10000
+        for start in range(0, pool.size, chunk):
+            mentors = pool.mentors[start:start + chunk]
+            block = np.zeros((len(mentors), DIMS), dtype=np.float32)
+            for offset, mentor in enumerate(mentors):
+                _features(
+                    block[offset],
+                    mentor.business_stage_expertise,
+                    mentor.industry,
+                    [part for phrase in mentor.focus_area_tokens for part in sub_phrases(phrase)],
+                    1.0 if mentor.availability_status == 'available' else 0.0,
+                    min((mentor.average_rating or 0.0) / 5.0, 1.0),
+                )
+            keys[:, start:start + len(mentors)] = self._keys(block @ self.planes).T
+        self.order = np.argsort(keys, axis=1, kind='stable')
+        self.sorted_keys = np.take_along_axis(keys, self.order, axis=1)
+
+    @classmethod
+    def from_settings(cls, pool) -> 'MentorLSH':
+        options = {**DEFAULTS, **getattr(settings, 'AI_MATCHING_LSH', {})}
+        return cls(pool, **options)
+
+    def _keys(self, projections: np.ndarray) -> np.ndarray:
+        bits = (projections > 0).reshape(len(projections), self.tables, self.bits)
+        return (bits.astype(np.int64) * self.weights).sum(axis=2)
+
+    def query_vector(self, mentee) -> np.ndarray:
+        vector = np.zeros(DIMS, dtype=np.float32)
+        _features(
+            vector,
+            mentee.business_stage,
+            mentee.industry,
+            mentee.challenge_tokens + mentee.goal_tokens,
+            1.0,
+            1.0,
+        )
+        return vector
+
+    def _bucket_rows(self, table: int, key: int) -> np.ndarray:
+        keys = self.sorted_keys[table]
+        lo, hi = np.searchsorted(keys, key, 'left'), np.searchsorted(keys, key, 'right')
+        return self.order[table, lo:hi]
+
+    def candidates_for(self, mentee, target: int = None) -> np.ndarray:
+        """Pool rows likely to score highly for ``mentee``, best-colliding first."""
+        target = target or self.candidates
+        projections = (self.query_vector(mentee) @ self.planes).reshape(self.tables, self.bits)
+        keys = self._keys(projections.reshape(1, -1))[0]
+
+        collisions = np.zeros(self.pool.size, dtype=np.int32)
+        found = 0
+        for table in range(self.tables):
+            rows = self._bucket_rows(table, int(keys[table]))
+            found += int(np.count_nonzero(collisions[rows] == 0))
+            collisions[rows] += 1
+        if found < target:
+            # Multi-probe: flip the least certain bits first
+            margins = np.abs(projections).ravel()
+            for flat in np.argsort(margins, kind='stable'):
+                table, bit = divmod(int(flat), self.bits)
+                rows = self._bucket_rows(table, int(keys[table] ^ (1 << bit)))
+                found += int(np.count_nonzero(collisions[rows] == 0))
+                collisions[rows] += 1
+                if found >= target:
+                    break
+
+        rows = np.flatnonzero(collisions)
+        return rows[np.argsort(-collisions[rows], kind='stable')[:target]]
@@ -0,0 +1,57 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ai_support.assignment import assign_mentees
+from mentees.models import ConnectionRequest
+
+SUGGESTION_MESSAGE = "Suggested by the SheConnect mentor assignment."
+
+
+class Command(BaseCommand):
+    help = "Assign unmatched mentees to mentors within mentor capacity, maximizing total match score"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=50, help="Candidate mentors considered per mentee")
+        parser.add_argument('--min-score', type=int, default=1, help="Lowest score worth suggesting")
+        parser.add_argument('--rounds', type=int, default=3,
+                            help="Solver rounds for mentees crowded out of all their candidates")
+        parser.add_argument('--output', help="Write the assignment as JSON to this path")
+        parser.add_argument('--create-requests', action='store_true',
+                            help="Create pending ConnectionRequests for the suggested pairs")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        pairs = assign_mentees(k=options['k'], min_score=options['min_score'], rounds=options['rounds'])
+        elapsed = time.perf_counter() - start
+
+        total = sum(score for _, _, score in pairs)
+        self.stdout.write(
+            f"Assigned {len(pairs)} mentee(s) to {len({mentor.pk for _, mentor, _ in pairs})} mentor(s), "
+            f"total score {total}, mean {total / len(pairs) if pairs else 0:.1f} in {elapsed:.2f}s"
+        )
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(
+                    [{'mentee_id': mentee.pk, 'mentor_id': mentor.pk, 'score': score} for mentee, mentor, score in pairs],
+                    fh, indent=2,
+                )
+                fh.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        if options['create_requests']:
+            # bulk_create returns every object, skipped conflicts included,
+            # so the rows inserted are counted in the table
+            with transaction.atomic():
+                before = ConnectionRequest.objects.count()
+                ConnectionRequest.objects.bulk_create(
+                    [ConnectionRequest(mentee=mentee, mentor=mentor, message=SUGGESTION_MESSAGE) for mentee, mentor, _ in pairs],
+                    ignore_conflicts=True,
+                )
+                created = ConnectionRequest.objects.count() - before
+            self.stdout.write(self.style.SUCCESS(
+                f"Created {created} connection request(s); {len(pairs) - created} pair(s) already had one."
+            ))
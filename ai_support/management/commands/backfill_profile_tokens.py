@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ai_support.focus_index import rebuild_index
+from ai_support.match_cache import bump_pool_version
+from mentees.models import Mentee
+from mentors.models import Mentor
+
+
+def backfill(queryset, fields, batch_size):
+    changed, batch = 0, []
+    for obj in queryset.iterator(chunk_size=batch_size):
+        before = [getattr(obj, field) for field in fields]
+        obj.refresh_tokens()
+        if [getattr(obj, field) for field in fields] != before:
+            # Bumping updated_at lets cached mentor pools notice the change
+            obj.updated_at = timezone.now()
+            batch.append(obj)
+        if len(batch) >= batch_size:
+            queryset.model.objects.bulk_update(batch, fields + ['updated_at'])
+            changed += len(batch)
+            batch = []
+    if batch:
+        queryset.model.objects.bulk_update(batch, fields + ['updated_at'])
+        changed += len(batch)
+    return changed
+
+
+class Command(BaseCommand):
+    help = "Recompute the pre-tokenized matching fields of every mentor and mentee"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        mentors = backfill(
+            Mentor.objects.only('id', 'key_focus_areas', 'focus_area_tokens', 'updated_at'), ['focus_area_tokens'], batch_size
+        )
+        mentees = backfill(
+            Mentee.objects.only('id', 'main_challenges', 'mentorship_goals', 'challenge_tokens', 'goal_tokens', 'updated_at'),
+            ['challenge_tokens', 'goal_tokens'],
+            batch_size,
+        )
+        written = rebuild_index(batch_size)
+        bump_pool_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated tokens of {mentors} mentor(s) and {mentees} mentee(s); indexed {written} focus token(s)."
+        ))
+        if mentors or mentees:
+            self.stdout.write("Run rematch_all to refresh the materialized match scores.")
@@ -0,0 +1,179 @@
+import contextlib
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ai_support.materialization import ranked_matches, refresh_mentee
+from ai_support.matching_engine import clear_mentor_pool, get_mentor_pool
+from ai_support.services import score_match, top_matches
+from ai_support.synthetic import disposable_database, percentile, populate
+from mentors.models import Mentor
+
+
+# Mentees whose score rows are written for the ranked_matches pass (one row per mentor each)
+MATERIALIZED_MENTEES = 10
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark score_match, top_matches and the materialized ranked_matches path against "
+        "synthetic mentor populations, in a throwaway test database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help="Mentor population sizes to benchmark")
+        parser.add_argument('--calls', type=int, default=100, help="top_matches calls per size")
+        parser.add_argument('--mentees', type=int, default=50, help="Distinct synthetic mentees to query with")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help="Write JSON results to this path")
+        parser.add_argument('--compare', help="Earlier JSON results to print deltas against")
+        parser.add_argument('--current-database', action='store_true',
+                            help="Use the current database instead of creating a test database; "
+                                 "only for databases that are already disposable")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        results = {
+            'commit': git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'seed': options['seed'],
+            'calls': options['calls'],
+            'sizes': {},
+        }
+        with contextlib.nullcontext() if options['current_database'] else disposable_database():
+            for size in options['sizes']:
+                self.stdout.write(f"Benchmarking {size} mentor(s)...")
+                results['sizes'][str(size)] = self.run_size(rng, size, options['calls'], options['mentees'])
+                self.report(size, results['sizes'][str(size)])
+
+        payload = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(payload + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(payload)
+
+        if options['compare']:
+            with open(options['compare']) as fh:
+                self.compare(json.load(fh), results)
+
+    def run_size(self, rng, size, calls, mentee_count):
+        # Everything is created inside a transaction that is rolled back, so
+        # sizes do not see each other's mentors
+        with transaction.atomic():
+            mentees = populate(rng, size, mentee_count)
+            clear_mentor_pool()
+
+            with CaptureQueriesContext(connection) as cold_queries:
+                start = time.perf_counter()
+                top_matches(mentees[0])
+                cold_ms = (time.perf_counter() - start) * 1000
+
+            latencies, queries = [], []
+            for i in range(calls):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    top_matches(mentees[i % len(mentees)])
+                    latencies.append((time.perf_counter() - start) * 1000)
+                queries.append(len(captured))
+
+            # tracemalloc slows allocation down, so memory gets its own passes
+            peaks = []
+            for i in range(min(calls, 20)):
+                tracemalloc.start()
+                top_matches(mentees[i % len(mentees)])
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            clear_mentor_pool()
+            tracemalloc.start()
+            top_matches(mentees[0])
+            cold_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            sample = list(Mentor.objects.all()[:200])
+            start = time.perf_counter()
+            for mentor in sample:
+                score_match(mentees[0], mentor)
+            score_match_us = (time.perf_counter() - start) * 1e6 / max(1, len(sample))
+
+            # The mentee-facing path: write each mentee's score rows, then read them
+            pool = get_mentor_pool()
+            materialized = mentees[:MATERIALIZED_MENTEES]
+            materialize_ms = []
+            for mentee in materialized:
+                start = time.perf_counter()
+                refresh_mentee(mentee, pool)
+                materialize_ms.append((time.perf_counter() - start) * 1000)
+            ranked_latencies, ranked_queries = [], []
+            for i in range(calls):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    ranked_matches(materialized[i % len(materialized)])
+                    ranked_latencies.append((time.perf_counter() - start) * 1000)
+                ranked_queries.append(len(captured))
+
+            transaction.set_rollback(True)
+        clear_mentor_pool()
+
+        return {
+            'cold_ms': round(cold_ms, 3),
+            'cold_queries': len(cold_queries),
+            'cold_peak_kib': round(cold_peak / 1024, 1),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            'queries_per_call': round(sum(queries) / len(queries), 2) if queries else 0.0,
+            'peak_kib_per_call': round(max(peaks) / 1024, 1) if peaks else 0.0,
+            'score_match_us': round(score_match_us, 2),
+            'materialize_ms': round(percentile(materialize_ms, 50), 3),
+            'ranked_p50_ms': round(percentile(ranked_latencies, 50), 3),
+            'ranked_p99_ms': round(percentile(ranked_latencies, 99), 3),
+            'ranked_queries_per_call': (
+                round(sum(ranked_queries) / len(ranked_queries), 2) if ranked_queries else 0.0
+            ),
+        }
+
+    def report(self, size, row):
+        self.stdout.write(
+            f"  {size}: p50 {row['p50_ms']} ms, p99 {row['p99_ms']} ms, "
+            f"{row['queries_per_call']} queries/call, peak {row['peak_kib_per_call']} KiB/call "
+            f"(cold {row['cold_ms']} ms)"
+        )
+        self.stdout.write(
+            f"  {size} ranked_matches: p50 {row['ranked_p50_ms']} ms, p99 {row['ranked_p99_ms']} ms, "
+            f"{row['ranked_queries_per_call']} queries/call (materialize {row['materialize_ms']} ms/mentee)"
+        )
+
+    def compare(self, before, after):
+        self.stdout.write(f"Compared with {before.get('commit') or 'baseline'}:")
+        for size, row in after['sizes'].items():
+            old = before.get('sizes', {}).get(size)
+            if not old:
+                continue
+            parts = []
+            for key in ('p50_ms', 'p99_ms', 'queries_per_call', 'peak_kib_per_call', 'ranked_p50_ms', 'ranked_p99_ms'):
+                if old.get(key):
+                    change = (row[key] - old[key]) / old[key] * 100
+                    parts.append(f"{key} {old[key]} -> {row[key]} ({change:+.1f}%)")
+            self.stdout.write(f"  {size}: " + ', '.join(parts))
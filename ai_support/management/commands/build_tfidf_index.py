@@ -0,0 +1,32 @@
+import os
+
+from django.core.management.base import BaseCommand
+from ai_support.tfidf import TfidfIndex, index_path, refresh, reset_tfidf_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the mentor TF-IDF index and save it to AI_MATCHING_TFIDF_PATH. "
+        "With --update, apply only the mentor changes since the saved index; "
+        "run that periodically so processes start from a recent snapshot."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--update', action='store_true',
+                            help="Refresh the saved index incrementally instead of rebuilding it")
+
+    def handle(self, *args, **options):
+        path = index_path()
+        if options['update'] and path and os.path.exists(path):
+            index = TfidfIndex.load(path)
+        else:
+            index = TfidfIndex()
+        changed = refresh(index) or not options['update']
+        if path and changed:
+            index.compact()
+            index.save(path)
+            reset_tfidf_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {index.size} mentor(s), {len(index.vocab)} term(s)"
+            + (f" into {path}." if path and changed else ".")
+        ))
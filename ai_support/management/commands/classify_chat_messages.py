@@ -0,0 +1,111 @@
+import json
+import multiprocessing
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from ai_support.chatbot_service import label_messages
+from ai_support.models import ChatMessage
+
+
+def _batches(rows, size):
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Label stored user chat messages with mood and challenges for analytics"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes; 1 classifies in-process")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Messages per fetch, task and bulk write")
+        parser.add_argument('--relabel', action='store_true', help="Also reclassify messages that already have labels")
+        parser.add_argument('--checkpoint', default=str(settings.BASE_DIR / '.classify_checkpoint.json'),
+                            help="Progress file used to resume an interrupted run")
+        parser.add_argument('--resume', action='store_true', help="Continue the run recorded in --checkpoint")
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        if options['resume']:
+            if not os.path.exists(checkpoint):
+                raise CommandError(f"No checkpoint at {checkpoint}")
+            with open(checkpoint) as fh:
+                state = json.load(fh)
+            self.stdout.write(f"Resuming run started {state['started']}: {state['labeled']} message(s) after id {state['last_id']}.")
+        else:
+            state = {'started': timezone.now().isoformat(), 'relabel': options['relabel'], 'last_id': 0, 'labeled': 0}
+            self.save_state(checkpoint, state)
+
+        messages = ChatMessage.objects.filter(role='user', pk__gt=state['last_id']).order_by('pk')
+        if not state['relabel']:
+            messages = messages.filter(mood__isnull=True)
+        chunk_size = max(1, options['chunk_size'])
+        rows = messages.values_list('pk', 'content').iterator(chunk_size=chunk_size)
+
+        labeled = 0
+        begin = time.monotonic()
+
+        def write(labels):
+            nonlocal labeled
+            # Few distinct labels exist, so one UPDATE per label beats a
+            # per-row CASE from bulk_update by an order of magnitude.
+            groups = defaultdict(list)
+            for pk, mood, challenges in labels:
+                groups[mood, tuple(challenges)].append(pk)
+            with transaction.atomic():
+                for (mood, challenges), ids in groups.items():
+                    for start in range(0, len(ids), 500):
+                        ChatMessage.objects.filter(pk__in=ids[start:start + 500]).update(
+                            mood=mood, challenges=list(challenges)
+                        )
+            labeled += len(labels)
+            # Chunks are written in id order, so everything up to here is done
+            state['last_id'] = labels[-1][0]
+            state['labeled'] += len(labels)
+            self.save_state(checkpoint, state)
+            elapsed = time.monotonic() - begin
+            self.stdout.write(
+                f"[id {state['last_id']}] {labeled} message(s) in {elapsed:.1f}s "
+                f"({labeled / elapsed if elapsed else 0:.0f} msg/s)"
+            )
+
+        if options['workers'] <= 1:
+            for batch in _batches(rows, chunk_size):
+                write(label_messages(batch))
+        else:
+            # Workers only see plain (id, content) tuples, so they are spawned
+            # fresh and never touch the database connection being streamed.
+            in_flight = deque()
+            with ProcessPoolExecutor(
+                max_workers=options['workers'], mp_context=multiprocessing.get_context('spawn')
+            ) as executor:
+                for batch in _batches(rows, chunk_size):
+                    in_flight.append(executor.submit(label_messages, batch))
+                    if len(in_flight) >= 2 * options['workers']:
+                        write(in_flight.popleft().result())
+                while in_flight:
+                    write(in_flight.popleft().result())
+
+        os.remove(checkpoint)
+        elapsed = time.monotonic() - begin
+        self.stdout.write(self.style.SUCCESS(
+            f"Labeled {labeled} message(s) in {elapsed:.1f}s "
+            f"({labeled / elapsed if elapsed else 0:.0f} msg/s)."
+        ))
+
+    def save_state(self, path, state):
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as fh:
+            json.dump(state, fh)
+        os.replace(tmp, path)
@@ -0,0 +1,28 @@
+import json
+
+from django.core.management.base import BaseCommand
+from ai_support.mood_rollups import iter_user_trends
+from ai_support.mood_trends import WINDOWS
+
+
+class Command(BaseCommand):
+    help = "Compute 7/30/90-day mood trends of every user from the daily rollups, as JSON lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help="Only this user (repeatable)")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Users computed together in one matrix")
+        parser.add_argument(
+            '--flagged', action='store_true',
+            help="Only users whose mood is declining or shifted in some window",
+        )
+
+    def handle(self, *args, **options):
+        written = 0
+        for user_id, report in iter_user_trends(options['user_ids'], batch_size=options['batch_size']):
+            if options['flagged'] and not any(
+                report[window]['trend'] == 'declining' or report[window]['mood']['change_point'] for window in WINDOWS
+            ):
+                continue
+            self.stdout.write(json.dumps({'user_id': user_id, 'windows': report}))
+            written += 1
+        self.stderr.write(self.style.SUCCESS(f"Computed trends for {written} user(s)."))
@@ -0,0 +1,80 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from ai_support.lsh import MentorLSH
+from ai_support.synthetic import memory_pool, percentile
+
+
+class Command(BaseCommand):
+    help = "Report LSH candidate recall and latency against the exact top_matches scorer"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                            help="Mentor population sizes to evaluate")
+        parser.add_argument('--queries', type=int, default=50, help="Synthetic mentees to query with")
+        parser.add_argument('--k', type=int, default=10, help="Depth of the top-k compared for recall")
+        parser.add_argument('--tables', type=int, nargs='+', default=[4, 8, 16])
+        parser.add_argument('--bits', type=int, nargs='+', default=[10, 12, 14])
+        parser.add_argument('--candidates', type=int, nargs='+', default=[300])
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help="Write JSON results to this path")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        results = {'k': options['k'], 'queries': options['queries'], 'sizes': {}}
+        for size in options['sizes']:
+            self.stdout.write(f"Evaluating {size} mentor(s)...")
+            # Built in memory: the report never reads or writes the database
+            pool, mentees = memory_pool(rng, size, options['queries'])
+            results['sizes'][str(size)] = self.run_size(pool, mentees, options)
+
+        payload = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(payload + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(payload)
+
+    def run_size(self, pool, mentees, options):
+        k = options['k']
+        exact, exact_ms = [], []
+        for mentee in mentees:
+            start = time.perf_counter()
+            ranked = pool.top(mentee, k)
+            exact_ms.append((time.perf_counter() - start) * 1000)
+            # Ties make ids ambiguous, so recall is judged against the k-th best score
+            exact.append(ranked[-1][1] if ranked else 0)
+
+        row = {'mentors': pool.size, 'exact_p50_ms': round(percentile(exact_ms, 50), 3), 'configs': []}
+        self.stdout.write(f"  exact: p50 {row['exact_p50_ms']} ms")
+        for tables in options['tables']:
+            for bits in options['bits']:
+                for candidates in options['candidates']:
+                    start = time.perf_counter()
+                    lsh = MentorLSH(pool, tables=tables, bits=bits, candidates=candidates, seed=options['seed'])
+                    build_ms = (time.perf_counter() - start) * 1000
+                    hits, total, latencies = 0, 0, []
+                    for mentee, threshold in zip(mentees, exact):
+                        start = time.perf_counter()
+                        ranked = pool.top(mentee, k, lsh.candidates_for(mentee))
+                        latencies.append((time.perf_counter() - start) * 1000)
+                        hits += sum(1 for _, score, _ in ranked if score >= threshold)
+                        total += min(k, pool.size)
+                    config = {
+                        'tables': tables,
+                        'bits': bits,
+                        'candidates': candidates,
+                        'build_ms': round(build_ms, 1),
+                        'recall_at_k': round(hits / total, 4) if total else 1.0,
+                        'p50_ms': round(percentile(latencies, 50), 3),
+                    }
+                    row['configs'].append(config)
+                    self.stdout.write(
+                        f"  L={tables} b={bits} c={candidates}: recall@{k} {config['recall_at_k']}, "
+                        f"p50 {config['p50_ms']} ms (build {config['build_ms']} ms)"
+                    )
+        return row
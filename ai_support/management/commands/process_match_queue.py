@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from ai_support.materialization import process_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute AIMatchingScore rows for mentees and mentors changed since the last run. "
+        "Match pages serve the existing rows until then, so run this from cron or with "
+        "--interval as a long-running worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help="Keep running, draining the queue every this many seconds")
+
+    def handle(self, *args, **options):
+        while True:
+            mentors, mentees = process_queue()
+            if mentors or mentees or not options['interval']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Refreshed scores for {mentors} mentor(s) and {mentees} mentee(s)."
+                ))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
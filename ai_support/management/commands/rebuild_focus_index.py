@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from ai_support.focus_index import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the mentor focus-area inverted index from scratch"
+
+    def handle(self, *args, **options):
+        written = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} focus token(s)."))
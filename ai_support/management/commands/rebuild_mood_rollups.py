@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from ai_support.mood_rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily and weekly mood rollups from MentalHealthSession rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help="Only rebuild this user's rollups (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_rollups(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} mood rollup(s)."))
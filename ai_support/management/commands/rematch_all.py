@@ -0,0 +1,163 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, time as dt_time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ai_support.match_cache import bump_pool_version
+from ai_support.materialization import rescore_chunk
+from ai_support.models import AIMatchingScore, MatchRefreshQueue
+from mentees.models import Mentee
+from mentors.models import Mentor
+
+
+def _init_worker():
+    # Spawned workers need their own app registry; forked ones must not
+    # reuse the parent's database sockets.
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def _parse_since(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"--since must be an ISO date or datetime, got {value!r}")
+        parsed = datetime.combine(day, dt_time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _chunks(ids, size):
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+class Command(BaseCommand):
+    help = "Recompute mentee x mentor AIMatchingScore rows for the whole population"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes; 1 scores in-process")
+        parser.add_argument('--chunk-size', type=int, default=200, help="Mentees per task")
+        parser.add_argument('--since', help="Only rescore profiles changed since this ISO date/datetime")
+        parser.add_argument('--checkpoint', default=str(settings.BASE_DIR / '.rematch_checkpoint.json'),
+                            help="Progress file used to resume an interrupted run")
+        parser.add_argument('--resume', action='store_true', help="Continue the run recorded in --checkpoint")
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        if options['resume']:
+            if not os.path.exists(checkpoint):
+                raise CommandError(f"No checkpoint at {checkpoint}")
+            with open(checkpoint) as fh:
+                state = json.load(fh)
+            state['done'] = []
+            if os.path.exists(f"{checkpoint}.done"):
+                with open(f"{checkpoint}.done") as fh:
+                    state['done'] = [int(line) for line in fh if line.strip()]
+            self.stdout.write(f"Resuming run started {state['started']}: {len(state['done'])}/{len(state['tasks'])} chunk(s) done.")
+        else:
+            state = self.plan(options)
+            self.save_state(checkpoint, state)
+            open(f"{checkpoint}.done", 'w').close()
+
+        done = set(state['done'])
+        pending = [i for i in range(len(state['tasks'])) if i not in done]
+        total = len(state['tasks'])
+        rows_written = 0
+        begin = time.monotonic()
+
+        progress = open(f"{checkpoint}.done", 'a')
+
+        def record(index, rows):
+            nonlocal rows_written
+            rows_written += rows
+            state['done'].append(index)
+            # One line per finished chunk; the plan itself is written once
+            progress.write(f"{index}\n")
+            progress.flush()
+            elapsed = time.monotonic() - begin
+            self.stdout.write(
+                f"[{len(state['done'])}/{total}] {rows_written} row(s) in {elapsed:.1f}s "
+                f"({rows_written / elapsed if elapsed else 0:.0f} rows/s)"
+            )
+
+        with progress:
+            if options['workers'] <= 1:
+                for index in pending:
+                    task = state['tasks'][index]
+                    record(index, rescore_chunk(task['mentees'], task['mentors']))
+            elif pending:
+                connections.close_all()
+                with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as executor:
+                    futures = {
+                        executor.submit(rescore_chunk, state['tasks'][index]['mentees'], state['tasks'][index]['mentors']): index
+                        for index in pending
+                    }
+                    for future in as_completed(futures):
+                        record(futures[future], future.result())
+
+        self.clear_queue(state)
+        # Cached match lists were built from the rows just replaced
+        bump_pool_version()
+        os.remove(checkpoint)
+        os.remove(f"{checkpoint}.done")
+        elapsed = time.monotonic() - begin
+        self.stdout.write(self.style.SUCCESS(
+            f"Rescored {rows_written} row(s) in {elapsed:.1f}s "
+            f"({rows_written / elapsed if elapsed else 0:.0f} rows/s)."
+        ))
+
+    def plan(self, options):
+        started = timezone.now()
+        mentees = Mentee.objects.filter(is_active=True).order_by('id')
+        chunk_size = max(1, options['chunk_size'])
+        tasks = []
+        if options['since']:
+            since = _parse_since(options['since'])
+            changed = list(mentees.filter(updated_at__gte=since).values_list('id', flat=True))
+            tasks.extend({'mentees': ids, 'mentors': None} for ids in _chunks(changed, chunk_size))
+            mentor_ids = list(Mentor.objects.filter(updated_at__gte=since).values_list('id', flat=True))
+            if mentor_ids:
+                others = list(mentees.exclude(updated_at__gte=since).values_list('id', flat=True))
+                tasks.extend({'mentees': ids, 'mentors': mentor_ids} for ids in _chunks(others, chunk_size))
+        else:
+            all_ids = list(mentees.values_list('id', flat=True))
+            tasks.extend({'mentees': ids, 'mentors': None} for ids in _chunks(all_ids, chunk_size))
+        self.stdout.write(f"Planned {len(tasks)} chunk(s) of up to {chunk_size} mentee(s).")
+        return {'started': started.isoformat(), 'since': options['since'], 'tasks': tasks, 'done': []}
+
+    def save_state(self, path, state):
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as fh:
+            json.dump({key: value for key, value in state.items() if key != 'done'}, fh)
+        os.replace(tmp, path)
+
+    def clear_queue(self, state):
+        # The run covered every change queued before it started
+        started = datetime.fromisoformat(state['started'])
+        queued = MatchRefreshQueue.objects.filter(queued_at__lte=started)
+        if not state['since']:
+            queued.delete()
+            AIMatchingScore.objects.filter(Q(mentor__is_active=False) | Q(mentor__is_verified=False)).delete()
+            return
+        mentor_ids = set()
+        for task in state['tasks']:
+            if task['mentors'] is None:
+                queued.filter(kind='mentee', object_id__in=task['mentees']).delete()
+            else:
+                mentor_ids.update(task['mentors'])
+        queued.filter(kind='mentor', object_id__in=mentor_ids).delete()
+        AIMatchingScore.objects.filter(mentor_id__in=mentor_ids).filter(
+            Q(mentor__is_active=False) | Q(mentor__is_verified=False)
+        ).delete()
@@ -0,0 +1,77 @@
+import time
+from typing import List, Tuple
+
+from django.conf import settings
+
+from mentees.models import Mentee
+from mentors.models import Mentor
+from .caching import shared_cache
+from .materialization import ranked_matches
+
+
+POOL_VERSION_KEY = 'ai_match:pool'
+
+
+def _cache():
+    return shared_cache('AI_MATCHING_CACHE')
+
+
+def _mentee_version_key(mentee_id: int) -> str:
+    return f'ai_match:mentee:{mentee_id}'
+
+
+def _result_key(mentee_id: int, limit: int) -> str:
+    return f'ai_match:results:{mentee_id}:{limit}'
+
+
+def _new_version() -> int:
+    # Time-based rather than a counter so an evicted version key can never
+    # come back as a value that older cached results were stored under.
+    return time.time_ns()
+
+
+def _version(cache, key: str, found: dict) -> int:
+    version = found.get(key)
+    if version is None:
+        # Never set or evicted: start a fresh version unless another process just did
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_pool_version() -> None:
+    """Invalidate every cached match list (a mentor changed)."""
+    cache = _cache()
+    if cache is not None:
+        cache.set(POOL_VERSION_KEY, _new_version(), None)
+
+
+def bump_mentee_version(mentee_id: int) -> None:
+    """Invalidate the cached match lists of one mentee."""
+    cache = _cache()
+    if cache is not None:
+        cache.set(_mentee_version_key(mentee_id), _new_version(), None)
+
+
+def cached_matches(mentee: Mentee, limit: int = 3) -> List[Tuple[Mentor, int, str]]:
+    """``ranked_matches`` behind a versioned per-mentee cache entry.
+
+    The versions and the stored result come back in one ``get_many`` call;
+    the result is only used if it was stored under the current versions.
+    Without a shared cache every call reads the rows.
+    """
+    cache = _cache()
+    if cache is None:
+        return ranked_matches(mentee, limit)
+    version_key = _mentee_version_key(mentee.pk)
+    result_key = _result_key(mentee.pk, limit)
+    found = cache.get_many([POOL_VERSION_KEY, version_key, result_key])
+
+    versions = (_version(cache, POOL_VERSION_KEY, found), _version(cache, version_key, found))
+    cached = found.get(result_key)
+    if cached is not None and cached[0] == versions:
+        return cached[1]
+
+    results = ranked_matches(mentee, limit)
+    cache.set(result_key, (versions, results), getattr(settings, 'AI_MATCHING_CACHE_TTL', 900))
+    return results
@@ -0,0 +1,209 @@
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+
+from mentees.models import Mentee
+from mentors.models import Mentor
+from .focus_index import FocusIndex
+from .lsh import MentorLSH
+from .tfidf import TfidfIndex, get_tfidf_index
+
+
+# Same weights as services.score_match
+WEIGHTS = {
+    'business_stage': 0.30,
+    'industry': 0.25,
+    'challenge': 0.25,
+    'goals': 0.20,
+}
+
+
+def candidate_mode() -> str:
+    """'exact' scores every mentor, 'lsh' re-ranks only LSH candidates.
+
+    Only the on-the-fly rankers (``top_matches``, ``batch_top_matches``)
+    use it. The materialized rows behind ``ranked_matches`` hold a score for
+    every mentor, so they are always computed against the full pool.
+    """
+    return getattr(settings, 'AI_MATCHING_CANDIDATES', 'exact')
+
+
+def text_similarity_mode() -> str:
+    """'keyword' (0/100 focus-area hits) or 'tfidf' (graded cosine similarity)."""
+    return getattr(settings, 'AI_MATCHING_TEXT_SIMILARITY', 'keyword')
+
+
+class MentorPool:
+    """Mentor pool encoded once into NumPy arrays for vectorized scoring.
+
+    Challenge and goal overlap come from the focus-token inverted index:
+    the mentors matching any of a mentee's phrases are found with set
+    unions and turned into a mask over the pool.
+    """
+
+    def __init__(self, mentors: Sequence[Mentor], focus_index: Optional[FocusIndex] = None):
+        self.mentors = list(mentors)
+        self.focus_index = focus_index if focus_index is not None else FocusIndex.load()
+        size = len(self.mentors)
+        self.size = size
+        self.ids = np.fromiter((m.pk for m in self.mentors), dtype=np.int64, count=size)
+
+        self.stage_codes: Dict[str, int] = {}
+        self.industry_codes: Dict[str, int] = {}
+        stage = np.empty(size, dtype=np.int32)
+        industry = np.empty(size, dtype=np.int32)
+        for row, mentor in enumerate(self.mentors):
+            stage[row] = self.stage_codes.setdefault(mentor.business_stage_expertise, len(self.stage_codes))
+            industry[row] = self.industry_codes.setdefault(
+                (mentor.industry or '').lower(), len(self.industry_codes)
+            )
+        self.stage = stage
+        self.industry = industry
+
+        self.available = np.fromiter(
+            (m.availability_status == 'available' for m in self.mentors), dtype=bool, count=size
+        )
+        ratings = np.fromiter(
+            (getattr(m, 'average_rating', 0.0) or 0.0 for m in self.mentors),
+            dtype=np.float64, count=size,
+        )
+        self.availability_boost = np.where(self.available, 10, 0).astype(np.int64)
+        self.rating_boost = np.minimum(np.trunc(ratings * 2).astype(np.int64), 10)
+        self._lsh = None
+
+    def overlap(self, tokens: Sequence[str], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """0/100 component for any of the phrases ``tokens`` appearing in a mentor's focus areas."""
+        ids = self.ids if rows is None else self.ids[rows]
+        mentor_ids = self.focus_index.mentor_ids_for(tokens)
+        if not mentor_ids:
+            return np.zeros(len(ids), dtype=np.int64)
+        hits = np.isin(ids, np.fromiter(mentor_ids, dtype=np.int64, count=len(mentor_ids)))
+        return np.where(hits, 100, 0).astype(np.int64)
+
+    def components(
+        self, mentee: Mentee, rows: Optional[np.ndarray] = None, tfidf: Optional[TfidfIndex] = None
+    ) -> Dict[str, np.ndarray]:
+        """Component score arrays for ``mentee`` against every mentor, or only ``rows``.
+
+        ``tfidf`` reuses an already refreshed index instead of checking it per call.
+        """
+        def pick(values):
+            return values if rows is None else values[rows]
+
+        stage_code = self.stage_codes.get(mentee.business_stage, -1)
+        industry_code = self.industry_codes.get((mentee.industry or '').lower(), -1)
+        if text_similarity_mode() == 'tfidf':
+            tfidf = tfidf or get_tfidf_index()
+            ids = pick(self.ids)
+            challenge = np.rint(tfidf.similarity_for(mentee.main_challenges, ids) * 100).astype(np.int64)
+            goals = np.rint(tfidf.similarity_for(mentee.mentorship_goals, ids) * 100).astype(np.int64)
+        else:
+            challenge = self.overlap(mentee.challenge_tokens, rows)
+            goals = self.overlap(mentee.goal_tokens, rows)
+        return {
+            'business_stage': np.where(pick(self.stage) == stage_code, 100, 0).astype(np.int64),
+            'industry': np.where(pick(self.industry) == industry_code, 100, 0).astype(np.int64),
+            'challenge': challenge,
+            'goals': goals,
+            'availability_boost': pick(self.availability_boost),
+            'rating_boost': pick(self.rating_boost),
+        }
+
+    @staticmethod
+    def overall(components: Dict[str, np.ndarray]) -> np.ndarray:
+        """Overall scores, matching the float arithmetic of ``score_match``."""
+        base = (
+            components['business_stage'] * WEIGHTS['business_stage'] +
+            components['industry'] * WEIGHTS['industry'] +
+            components['challenge'] * WEIGHTS['challenge'] +
+            components['goals'] * WEIGHTS['goals']
+        ).astype(np.int64)
+        boosts = components['availability_boost'] + components['rating_boost']
+        return np.minimum(100, base + boosts)
+
+    def score(
+        self, mentee: Mentee, rows: Optional[np.ndarray] = None, tfidf: Optional[TfidfIndex] = None
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Return (overall scores, components) for ``mentee`` against the pool or ``rows``."""
+        components = self.components(mentee, rows, tfidf)
+        return self.overall(components), components
+
+    def top(
+        self, mentee: Mentee, limit: int = 3, rows: Optional[np.ndarray] = None, tfidf: Optional[TfidfIndex] = None
+    ) -> List[Tuple[Mentor, int, str]]:
+        """Top ``limit`` (mentor, score, reasoning) tuples, best first.
+
+        ``rows`` restricts ranking to a candidate subset of the pool (kept in
+        pool order). Ties keep pool order, like the stable sort in the
+        original loop.
+        """
+        if not self.size or limit <= 0:
+            return []
+        if rows is not None:
+            rows = np.sort(np.asarray(rows, dtype=np.int64))
+        scores, components = self.score(mentee, rows, tfidf)
+        order = np.argsort(-scores, kind='stable')[:limit]
+        return [
+            (self.mentors[row if rows is None else rows[row]], int(scores[row]), format_reasoning(components, row))
+            for row in order
+        ]
+
+    def lsh(self) -> MentorLSH:
+        """Random-projection LSH index over this pool, built on first use."""
+        if self._lsh is None:
+            self._lsh = MentorLSH.from_settings(self)
+        return self._lsh
+
+    def candidate_top(
+        self, mentee: Mentee, limit: int = 3, tfidf: Optional[TfidfIndex] = None
+    ) -> List[Tuple[Mentor, int, str]]:
+        """Like ``top`` but only re-ranks the LSH candidates for ``mentee``."""
+        lsh = self.lsh()
+        if self.size <= lsh.candidates:
+            return self.top(mentee, limit, tfidf=tfidf)
+        return self.top(mentee, limit, lsh.candidates_for(mentee), tfidf)
+
+
+def format_reasoning(components: Dict[str, np.ndarray], row: int) -> str:
+    return (
+        f"Stage: {components['business_stage'][row]}/100, Industry: {components['industry'][row]}/100, "
+        f"Challenges: {components['challenge'][row]}/100, Goals: {components['goals'][row]}/100, "
+        f"Boosts: {components['availability_boost'][row] + components['rating_boost'][row]}"
+    )
+
+
+def matchable_mentors():
+    return Mentor.objects.filter(is_active=True, is_verified=True)
+
+
+_pool: Optional[MentorPool] = None
+_pool_fingerprint = None
+_pool_lock = threading.Lock()
+
+
+def _fingerprint():
+    # Any save bumps updated_at and any delete drops the count, so this one
+    # aggregate notices changes made by other processes too.
+    stats = Mentor.objects.aggregate(count=Count('id'), latest=Max('updated_at'))
+    return stats['count'], stats['latest']
+
+
+def get_mentor_pool() -> MentorPool:
+    """Return the encoded pool of matchable mentors, rebuilding it when stale."""
+    global _pool, _pool_fingerprint
+    fingerprint = _fingerprint()
+    with _pool_lock:
+        if _pool is None or fingerprint != _pool_fingerprint:
+            _pool = MentorPool(matchable_mentors())
+            _pool_fingerprint = fingerprint
+        return _pool
+
+
+def clear_mentor_pool():
+    global _pool, _pool_fingerprint
+    with _pool_lock:
+        _pool = None
+        _pool_fingerprint = None
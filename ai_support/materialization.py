@@ -0,0 +1,174 @@
+from typing import Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from mentees.models import Mentee
+from mentors.models import Mentor
+from .focus_index import FocusIndex
+from .matching_engine import MentorPool, format_reasoning, get_mentor_pool, matchable_mentors
+from .models import AIMatchingScore, MatchRefreshQueue
+from .upserts import conflict_target
+
+
+# Sent by process_queue after it rewrites score rows: ``mentor_ids`` and
+# ``mentee_ids`` list what was refreshed, so cached match lists can be dropped
+scores_refreshed = Signal()
+
+SCORE_UPDATE_FIELDS = [
+    'business_stage_match',
+    'industry_match',
+    'challenge_expertise_match',
+    'goal_alignment_match',
+    'overall_score',
+    'matching_reasoning',
+    'updated_at',
+]
+
+
+def enqueue(kind: str, object_ids: Iterable[int]) -> None:
+    """Mark mentees or mentors as needing their score rows recomputed."""
+    now = timezone.now()
+    MatchRefreshQueue.objects.bulk_create(
+        [MatchRefreshQueue(kind=kind, object_id=object_id, queued_at=now) for object_id in object_ids],
+        update_conflicts=True,
+        unique_fields=conflict_target(['kind', 'object_id']),
+        update_fields=['queued_at'],
+    )
+
+
+def dequeue(kind: str, object_ids: Iterable[int], started) -> None:
+    # Entries re-queued after ``started`` saw a newer change; keep them.
+    MatchRefreshQueue.objects.filter(
+        kind=kind, object_id__in=list(object_ids), queued_at__lte=started
+    ).delete()
+
+
+def score_rows(pool: MentorPool, mentee: Mentee) -> List[AIMatchingScore]:
+    """Build unsaved AIMatchingScore rows for ``mentee`` against the pool."""
+    scores, components = pool.score(mentee)
+    return [
+        AIMatchingScore(
+            mentee_id=mentee.pk,
+            mentor_id=int(pool.ids[row]),
+            business_stage_match=int(components['business_stage'][row]),
+            industry_match=int(components['industry'][row]),
+            challenge_expertise_match=int(components['challenge'][row]),
+            goal_alignment_match=int(components['goals'][row]),
+            overall_score=int(scores[row]),
+            matching_reasoning=format_reasoning(components, row),
+        )
+        for row in range(pool.size)
+    ]
+
+
+def upsert_scores(rows: List[AIMatchingScore], batch_size: int = 1000) -> None:
+    if rows:
+        AIMatchingScore.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=conflict_target(['mentee', 'mentor']),
+            update_fields=SCORE_UPDATE_FIELDS,
+        )
+
+
+def refresh_mentee(mentee: Mentee, pool: Optional[MentorPool] = None) -> int:
+    """Recompute every score row of one mentee; return rows written."""
+    pool = pool or get_mentor_pool()
+    rows = score_rows(pool, mentee)
+    upsert_scores(rows)
+    return len(rows)
+
+
+def mentor_subpool(mentor_ids: Iterable[int]) -> MentorPool:
+    """Pool holding only the matchable mentors among ``mentor_ids``."""
+    mentor_ids = list(mentor_ids)
+    return MentorPool(matchable_mentors().filter(id__in=mentor_ids), FocusIndex.load(mentor_ids))
+
+
+def refresh_mentors(mentor_ids: Iterable[int], batch_size: int = 500) -> int:
+    """Recompute the score rows of the given mentors for every active mentee."""
+    mentor_ids = list(mentor_ids)
+    pool = mentor_subpool(mentor_ids)
+    # Mentors that are no longer matchable lose their rows
+    gone = set(mentor_ids) - {int(pk) for pk in pool.ids}
+    if gone:
+        AIMatchingScore.objects.filter(mentor_id__in=gone).delete()
+    if not pool.size:
+        return 0
+
+    written = 0
+    rows: List[AIMatchingScore] = []
+    for mentee in Mentee.objects.filter(is_active=True).iterator(chunk_size=batch_size):
+        rows.extend(score_rows(pool, mentee))
+        if len(rows) >= batch_size:
+            upsert_scores(rows)
+            written += len(rows)
+            rows = []
+    upsert_scores(rows)
+    return written + len(rows)
+
+
+def rescore_chunk(mentee_ids: List[int], mentor_ids: Optional[List[int]] = None) -> int:
+    """Recompute rows for a chunk of mentees, optionally only against ``mentor_ids``.
+
+    Used by the rematch_all command, including from worker processes.
+    """
+    pool = mentor_subpool(mentor_ids) if mentor_ids is not None else get_mentor_pool()
+    rows: List[AIMatchingScore] = []
+    for mentee in Mentee.objects.filter(id__in=mentee_ids, is_active=True):
+        rows.extend(score_rows(pool, mentee))
+    with transaction.atomic():
+        upsert_scores(rows)
+    return len(rows)
+
+
+def process_queue() -> Tuple[int, int]:
+    """Drain the refresh queue; return (mentors, mentees) processed."""
+    started = timezone.now()
+    queued = list(MatchRefreshQueue.objects.filter(queued_at__lte=started).values_list('kind', 'object_id'))
+    mentor_ids = [object_id for kind, object_id in queued if kind == 'mentor']
+    mentee_ids = [object_id for kind, object_id in queued if kind == 'mentee']
+
+    if mentor_ids:
+        with transaction.atomic():
+            refresh_mentors(mentor_ids)
+            dequeue('mentor', mentor_ids, started)
+
+    if mentee_ids:
+        pool = get_mentor_pool()
+        for mentee in Mentee.objects.filter(id__in=mentee_ids):
+            with transaction.atomic():
+                if mentee.is_active:
+                    refresh_mentee(mentee, pool)
+                else:
+                    AIMatchingScore.objects.filter(mentee=mentee).delete()
+                dequeue('mentee', [mentee.pk], started)
+        # Deleted mentees only need their queue entries cleared
+        dequeue('mentee', mentee_ids, started)
+
+    if mentor_ids or mentee_ids:
+        scores_refreshed.send(sender=MatchRefreshQueue, mentor_ids=mentor_ids, mentee_ids=mentee_ids)
+    return len(mentor_ids), len(mentee_ids)
+
+
+def ranked_matches(mentee: Mentee, limit: int = 3) -> List[Tuple[Mentor, int, str]]:
+    """Top ``limit`` (mentor, score, reasoning) tuples read from AIMatchingScore.
+
+    Rows are served as they are: changed mentees and mentors wait in the
+    queue for ``process_match_queue``. A mentee with nothing to read yet,
+    such as a new one, is queued and ranked in memory in the meantime.
+    """
+    rows = list(
+        AIMatchingScore.objects
+        .filter(mentee=mentee, mentor__is_active=True, mentor__is_verified=True)
+        .select_related('mentor')
+        .order_by('-overall_score', '-mentor_id')[:limit]
+    )
+    if rows:
+        return [(row.mentor, row.overall_score, row.matching_reasoning) for row in rows]
+    if not MatchRefreshQueue.objects.filter(kind='mentee', object_id=mentee.pk).exists():
+        enqueue('mentee', [mentee.pk])
+    return get_mentor_pool().top(mentee, limit)
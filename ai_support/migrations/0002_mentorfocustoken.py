@@ -0,0 +1,36 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_focus_index(apps, schema_editor):
+    Mentor = apps.get_model('mentors', 'Mentor')
+    MentorFocusToken = apps.get_model('ai_support', 'MentorFocusToken')
+    rows = []
+    for mentor_id, text in Mentor.objects.values_list('id', 'key_focus_areas').iterator():
+        tokens = {part.strip()[:200] for part in (text or '').lower().split(',') if part.strip()}
+        rows.extend(MentorFocusToken(mentor_id=mentor_id, token=token) for token in tokens)
+    MentorFocusToken.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_support', '0001_initial'),
+        ('mentors', '0002_mentor_average_rating_mentor_rating_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MentorFocusToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=200)),
+                ('mentor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='focus_tokens', to='mentors.mentor')),
+            ],
+            options={
+                'db_table': 'mentor_focus_tokens',
+                'unique_together': {('mentor', 'token')},
+            },
+        ),
+        migrations.RunPython(build_focus_index, migrations.RunPython.noop),
+    ]
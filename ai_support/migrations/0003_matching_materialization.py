@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_support', '0002_mentorfocustoken'),
+        ('mentees', '0002_mentee_languages_mentee_onboarding_complete_and_more'),
+        ('mentors', '0002_mentor_average_rating_mentor_rating_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchRefreshQueue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('mentee', 'Mentee'), ('mentor', 'Mentor')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('queued_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'match_refresh_queue',
+                'ordering': ['queued_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='aimatchingscore',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='aimatchingscore',
+            index=models.Index(fields=['mentee', '-overall_score'], name='ai_match_mentee_rank_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='matchrefreshqueue',
+            unique_together={('kind', 'object_id')},
+        ),
+    ]
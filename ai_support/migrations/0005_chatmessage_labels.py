@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_support', '0004_backfill_profile_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='challenges',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='mood',
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_support', '0005_chatmessage_labels'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['session', 'created_at', 'id'], name='chat_msg_session_created'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:43
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_session_dates(apps, schema_editor):
+    MentalHealthSession = apps.get_model('ai_support', 'MentalHealthSession')
+
+    # Several rows may share a day; only the latest one (the row the chat
+    # views kept appending to) gets the key, the rest stay NULL.
+    seen, batch = set(), []
+    sessions = MentalHealthSession.objects.only('id', 'user_id', 'session_type', 'created_at').order_by(
+        'user_id', 'session_type', '-created_at', '-id'
+    )
+    for session in sessions.iterator(chunk_size=1000):
+        key = (session.user_id, session.session_type, timezone.localdate(session.created_at))
+        if key in seen:
+            continue
+        seen.add(key)
+        session.session_date = key[2]
+        batch.append(session)
+        if len(batch) >= 1000:
+            MentalHealthSession.objects.bulk_update(batch, ['session_date'])
+            batch = []
+    if batch:
+        MentalHealthSession.objects.bulk_update(batch, ['session_date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_support', '0006_chatmessage_session_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentalhealthsession',
+            name='session_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_session_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Separate from the backfill so the data update and the ALTER TABLE run
+    # in different transactions on PostgreSQL.
+
+    dependencies = [
+        ('ai_support', '0007_mentalhealthsession_session_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='mentalhealthsession',
+            constraint=models.UniqueConstraint(fields=('user', 'session_type', 'session_date'), name='unique_mental_health_session_per_day'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:52
+
+import uuid
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_support', '0008_unique_mental_health_session_per_day'),
+    ]
+
+    operations = [
+        # Added without a default first: a callable default would give every
+        # existing row the same key. Existing rows keep NULL, which unique allows.
+        migrations.AddField(
+            model_name='chatmessage',
+            name='idempotency_key',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='idempotency_key',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_support', '0009_chatmessage_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mentalhealthsession',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='mh_session_user_created'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_support', '0010_mentalhealthsession_user_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MoodRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week')], max_length=4)),
+                ('period_start', models.DateField()),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('mood_sum', models.PositiveIntegerField(default=0)),
+                ('mood_min', models.PositiveSmallIntegerField()),
+                ('mood_max', models.PositiveSmallIntegerField()),
+                ('stress_sum', models.PositiveIntegerField(default=0)),
+                ('stress_min', models.PositiveSmallIntegerField()),
+                ('stress_max', models.PositiveSmallIntegerField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mood_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'mood_rollups',
+                'ordering': ['user', 'period', 'period_start'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'period', 'period_start'), name='unique_mood_rollup_period')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:06
+
+from django.db import migrations
+from django.db.models import Count, DateField, Max, Min, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+
+
+def backfill_mood_rollups(apps, schema_editor):
+    MentalHealthSession = apps.get_model('ai_support', 'MentalHealthSession')
+    MoodRollup = apps.get_model('ai_support', 'MoodRollup')
+
+    for period, trunc in (('day', TruncDate('created_at')), ('week', TruncWeek('created_at', output_field=DateField()))):
+        groups = MentalHealthSession.objects.annotate(start=trunc).order_by().values('user_id', 'start').annotate(
+            session_count=Count('id'),
+            mood_sum=Sum('mood_rating'), mood_min=Min('mood_rating'), mood_max=Max('mood_rating'),
+            stress_sum=Sum('stress_level'), stress_min=Min('stress_level'), stress_max=Max('stress_level'),
+        )
+        batch = []
+        for group in groups.iterator(chunk_size=2000):
+            batch.append(MoodRollup(period=period, period_start=group.pop('start'), **group))
+            if len(batch) >= 1000:
+                MoodRollup.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            MoodRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_support', '0011_moodrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_mood_rollups, migrations.RunPython.noop),
+    ]
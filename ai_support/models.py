@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
@@ -26,16 +28,59 @@ class MentalHealthSession(models.Model):
     )
     notes = models.TextField(blank=True)
     ai_response = models.TextField()
+    # Local day of a chat check-in, set by the chat-turn upsert; one session per user, type and day
+    session_date = models.DateField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = 'mental_health_sessions'
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'session_type', 'session_date'], name='unique_mental_health_session_per_day'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='mh_session_user_created'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.session_type} ({self.created_at.date()})"
 
 
+class MoodRollup(models.Model):
+    """Per-user mood and stress totals of the sessions created in one local day or week"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='mood_rollups')
+    period = models.CharField(max_length=4, choices=[('day', 'Day'), ('week', 'Week')])
+    # The day itself, or the Monday starting the week
+    period_start = models.DateField()
+    session_count = models.PositiveIntegerField(default=0)
+    mood_sum = models.PositiveIntegerField(default=0)
+    mood_min = models.PositiveSmallIntegerField()
+    mood_max = models.PositiveSmallIntegerField()
+    stress_sum = models.PositiveIntegerField(default=0)
+    stress_min = models.PositiveSmallIntegerField()
+    stress_max = models.PositiveSmallIntegerField()
+
+    class Meta:
+        db_table = 'mood_rollups'
+        ordering = ['user', 'period', 'period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'period', 'period_start'], name='unique_mood_rollup_period'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.period} {self.period_start} ({self.session_count} sessions)"
+
+    @property
+    def avg_mood(self):
+        return self.mood_sum / self.session_count if self.session_count else None
+
+    @property
+    def avg_stress(self):
+        return self.stress_sum / self.session_count if self.session_count else None
+
+
 class AIMatchingScore(models.Model):
     """AI matching scores between mentees and mentors"""
     mentee = models.ForeignKey('mentees.Mentee', on_delete=models.CASCADE, related_name='ai_matches')
@@ -54,11 +99,15 @@ class AIMatchingScore(models.Model):
     matching_reasoning = models.TextField(blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'ai_matching_scores'
         ordering = ['-overall_score']
         unique_together = ['mentee', 'mentor']
+        indexes = [
+            models.Index(fields=['mentee', '-overall_score'], name='ai_match_mentee_rank_idx'),
+        ]
 
     def __str__(self):
         return f"{self.mentee.user.email} ↔ {self.mentor.name} (Score: {self.overall_score})"
@@ -80,6 +129,27 @@ class AIMatchingScore(models.Model):
         return self.overall_score
 
 
+class MatchRefreshQueue(models.Model):
+    """Mentees and mentors whose materialized AIMatchingScore rows are stale"""
+    kind = models.CharField(
+        max_length=10,
+        choices=[
+            ('mentee', 'Mentee'),
+            ('mentor', 'Mentor'),
+        ]
+    )
+    object_id = models.PositiveBigIntegerField()
+    queued_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'match_refresh_queue'
+        ordering = ['queued_at']
+        unique_together = ['kind', 'object_id']
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} (queued {self.queued_at})"
+
+
 class MentalHealthResource(models.Model):
     """Local mental health resources for Sri Lanka"""
     name = models.CharField(max_length=200)
@@ -121,11 +191,34 @@ class ChatMessage(models.Model):
             ('assistant', 'AI Assistant'),
         ]
     )
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Analytics labels filled in by classify_chat_messages; null until classified
+    mood = models.CharField(max_length=20, null=True, blank=True, db_index=True)
+    challenges = models.JSONField(default=list, blank=True)
+    # Makes buffered (write-behind) inserts safe to retry; null on rows older than the buffer
+    idempotency_key = models.UUIDField(default=uuid.uuid4, unique=True, null=True, editable=False)
+    # Set when the message is built, not when it reaches the database
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         db_table = 'chat_messages'
         ordering = ['created_at']
+        indexes = [
+            # Latest messages of a session in order, for the chatbot's history window
+            models.Index(fields=['session', 'created_at', 'id'], name='chat_msg_session_created'),
+        ]
 
     def __str__(self):
         return f"{self.session.user.email} - {self.role} ({self.created_at})"
+
+
+class MentorFocusToken(models.Model):
+    """Inverted index entry: one normalized key_focus_areas token of a mentor"""
+    mentor = models.ForeignKey('mentors.Mentor', on_delete=models.CASCADE, related_name='focus_tokens')
+    token = models.CharField(max_length=200, db_index=True)
+
+    class Meta:
+        db_table = 'mentor_focus_tokens'
+        unique_together = ['mentor', 'token']
+
+    def __str__(self):
+        return f"{self.token} → {self.mentor_id}"
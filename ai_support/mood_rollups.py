@@ -0,0 +1,189 @@
+import datetime
+import itertools
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import MentalHealthSession, MoodRollup
+from .mood_trends import WINDOWS, matrix_trends
+from .upserts import conflict_target
+
+ROLLUP_FIELDS = ['session_count', 'mood_sum', 'mood_min', 'mood_max', 'stress_sum', 'stress_min', 'stress_max']
+
+
+def week_start(day: datetime.date) -> datetime.date:
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def _midnight(day: datetime.date) -> datetime.datetime:
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def _stats(prefix: str, only: Optional[Q] = None) -> Dict:
+    return {
+        f'{prefix}_session_count': Count('id', filter=only),
+        f'{prefix}_mood_sum': Sum('mood_rating', filter=only),
+        f'{prefix}_mood_min': Min('mood_rating', filter=only),
+        f'{prefix}_mood_max': Max('mood_rating', filter=only),
+        f'{prefix}_stress_sum': Sum('stress_level', filter=only),
+        f'{prefix}_stress_min': Min('stress_level', filter=only),
+        f'{prefix}_stress_max': Max('stress_level', filter=only),
+    }
+
+
+def refresh_rollups(user_id: int, day: datetime.date) -> None:
+    """Recompute the user's rollups for ``day`` and its week from their sessions.
+
+    Sessions are re-rated in place, so the two buckets are recomputed
+    rather than adjusted: one aggregate over the week's sessions (the day
+    via a filtered aggregate) and one upsert. Emptied buckets are deleted.
+    Call it inside the transaction that changed the sessions.
+    """
+    week = week_start(day)
+    stats = MentalHealthSession.objects.filter(
+        user_id=user_id, created_at__gte=_midnight(week), created_at__lt=_midnight(week + datetime.timedelta(days=7))
+    ).aggregate(
+        **_stats('day', Q(created_at__gte=_midnight(day), created_at__lt=_midnight(day + datetime.timedelta(days=1)))),
+        **_stats('week'),
+    )
+    rows, empty = [], []
+    for period, start in (('day', day), ('week', week)):
+        values = {field: stats[f'{period}_{field}'] for field in ROLLUP_FIELDS}
+        if values['session_count']:
+            rows.append(MoodRollup(user_id=user_id, period=period, period_start=start, **values))
+        else:
+            empty.append(Q(period=period, period_start=start))
+    if rows:
+        MoodRollup.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=conflict_target(['user', 'period', 'period_start']),
+            update_fields=ROLLUP_FIELDS,
+        )
+    if empty:
+        MoodRollup.objects.filter(Q(*empty, _connector=Q.OR), user_id=user_id).delete()
+
+
+def _daily_rows(sessions) -> Iterator[MoodRollup]:
+    days = sessions.annotate(day=TruncDate('created_at')).order_by('user_id', 'day').values('user_id', 'day').annotate(
+        session_count=Count('id'),
+        mood_sum=Sum('mood_rating'), mood_min=Min('mood_rating'), mood_max=Max('mood_rating'),
+        stress_sum=Sum('stress_level'), stress_min=Min('stress_level'), stress_max=Max('stress_level'),
+    )
+    for row in days.iterator(chunk_size=2000):
+        yield MoodRollup(
+            user_id=row['user_id'], period='day', period_start=row['day'],
+            **{field: row[field] for field in ROLLUP_FIELDS},
+        )
+
+
+def _merge(week: MoodRollup, day: MoodRollup) -> None:
+    week.session_count += day.session_count
+    week.mood_sum += day.mood_sum
+    week.stress_sum += day.stress_sum
+    week.mood_min = min(week.mood_min, day.mood_min)
+    week.mood_max = max(week.mood_max, day.mood_max)
+    week.stress_min = min(week.stress_min, day.stress_min)
+    week.stress_max = max(week.stress_max, day.stress_max)
+
+
+def rebuild_rollups(user_ids: Optional[List[int]] = None, batch_size: int = 1000) -> int:
+    """Rebuild the rollups of every user, or of ``user_ids``, from scratch; return rows written.
+
+    One grouped query yields the daily rows in (user, day) order and each
+    week is summed from its days as they stream past.
+    """
+    sessions = MentalHealthSession.objects.all()
+    rollups = MoodRollup.objects.all()
+    if user_ids is not None:
+        sessions = sessions.filter(user_id__in=user_ids)
+        rollups = rollups.filter(user_id__in=user_ids)
+    written = 0
+    with transaction.atomic():
+        rollups.delete()
+        rows: List[MoodRollup] = []
+        week = None
+        for day in _daily_rows(sessions):
+            start = week_start(day.period_start)
+            if week is not None and (week.user_id, week.period_start) == (day.user_id, start):
+                _merge(week, day)
+            else:
+                if week is not None:
+                    rows.append(week)
+                week = MoodRollup(
+                    user_id=day.user_id, period='week', period_start=start,
+                    **{field: getattr(day, field) for field in ROLLUP_FIELDS},
+                )
+            rows.append(day)
+            if len(rows) >= batch_size:
+                MoodRollup.objects.bulk_create(rows, batch_size=batch_size)
+                written += len(rows)
+                rows = []
+        if week is not None:
+            rows.append(week)
+        if rows:
+            MoodRollup.objects.bulk_create(rows, batch_size=batch_size)
+            written += len(rows)
+    return written
+
+
+def daily_series(user_id: int, days: int) -> List[Dict]:
+    """The user's latest ``days`` daily rollups as mood points, oldest first."""
+    rollups = MoodRollup.objects.filter(user_id=user_id, period='day').order_by('-period_start')[:days]
+    return [
+        {
+            'date': rollup.period_start,
+            'mood_rating': round(rollup.avg_mood, 1),
+            'stress_level': round(rollup.avg_stress, 1),
+            'session_count': rollup.session_count,
+        }
+        for rollup in reversed(list(rollups))
+    ]
+
+
+def _trend_block(block: List[Tuple[int, list]], span: int, windows, today: datetime.date) -> Iterator[Tuple[int, Dict]]:
+    rows = len(block)
+    mood = np.full((rows, span), np.nan)
+    stress = np.full((rows, span), np.nan)
+    counts = np.zeros((rows, span), dtype=np.int64)
+    records = [(row, *record) for row, (_, group) in enumerate(block) for record in group]
+    row, day, count, mood_sum, stress_sum = (np.array(column) for column in zip(*records))
+    # Column span - 1 is today
+    column = span - 1 - np.array([(today - start).days for start in day], dtype=np.int64)
+    counts[row, column] = count
+    mood[row, column] = mood_sum / count
+    stress[row, column] = stress_sum / count
+    ages = np.arange(span - 1, -1, -1)
+    reports = matrix_trends(mood, stress, counts, ages, windows, today)
+    return zip((user_id for user_id, _ in block), reports)
+
+
+def iter_user_trends(user_ids: Optional[List[int]] = None, windows=WINDOWS, batch_size: int = 2000,
+                     today: Optional[datetime.date] = None) -> Iterator[Tuple[int, Dict]]:
+    """(user id, trend report) of every user, or of ``user_ids``, with a session in the longest window.
+
+    The daily rollups of the longest window are streamed in user order and
+    every ``batch_size`` users become one (users, days) matrix, so the
+    statistics are computed for the whole block at once.
+    """
+    today = today or timezone.localdate()
+    span = max(windows)
+    rollups = MoodRollup.objects.filter(
+        period='day', period_start__gt=today - datetime.timedelta(days=span), period_start__lte=today
+    )
+    if user_ids is not None:
+        rollups = rollups.filter(user_id__in=user_ids)
+    rows = rollups.order_by('user_id', 'period_start').values_list(
+        'user_id', 'period_start', 'session_count', 'mood_sum', 'stress_sum'
+    ).iterator(chunk_size=5000)
+    block = []
+    for user_id, group in itertools.groupby(rows, key=itemgetter(0)):
+        block.append((user_id, [record[1:] for record in group]))
+        if len(block) >= batch_size:
+            yield from _trend_block(block, span, windows, today)
+            block = []
+    if block:
+        yield from _trend_block(block, span, windows, today)
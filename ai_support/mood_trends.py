@@ -0,0 +1,156 @@
+import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Trailing windows, in days, that trends are reported over
+WINDOWS = (7, 30, 90)
+# EWMA half-life as a fraction of the window
+EWMA_HALFLIFE = 0.25
+# A change point needs this many observed days on each side and a
+# two-sample t statistic above CHANGE_POINT_T between them. The best of
+# up to 90 splits is taken, so the bar sits well above the usual 2: on
+# noisy flat series 4.0 flags about 1%, and still catches 3-point shifts.
+CHANGE_POINT_MIN_DAYS = 3
+CHANGE_POINT_T = 4.0
+# Change in mean mood across a window, in rating points, that counts as improving or declining
+TREND_THRESHOLD = 1.0
+
+
+def _change_points(y: np.ndarray, m: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Strongest shift in mean of each row: (t statistic, first column after it, shift)."""
+    rows, cols = y.shape
+    if cols < 2:
+        return np.zeros(rows), np.zeros(rows, dtype=np.int64), np.full(rows, np.nan)
+    count, total, squares = np.cumsum(m, axis=1), np.cumsum(y, axis=1), np.cumsum(y * y, axis=1)
+    # Split after column j: the left side is columns 0..j
+    nl, sl, ql = count[:, :-1], total[:, :-1], squares[:, :-1]
+    nr, sr, qr = count[:, -1:] - nl, total[:, -1:] - sl, squares[:, -1:] - ql
+    # Only split right after an observed day so equivalent splits are not repeated
+    valid = (nl >= CHANGE_POINT_MIN_DAYS) & (nr >= CHANGE_POINT_MIN_DAYS) & (m[:, :-1] > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shift = sr / nr - sl / nl
+        pooled = np.maximum((ql - sl ** 2 / nl) + (qr - sr ** 2 / nr), 0.0) / (count[:, -1:] - 2)
+        t = np.abs(shift) / np.sqrt(pooled * (1 / nl + 1 / nr))
+    # A clean step between two flat runs has zero variance: infinitely significant
+    t = np.where(valid & ~np.isnan(t), t, 0.0)
+    best = t.argmax(axis=1)
+    picked = np.arange(rows)
+    after = (np.arange(cols) > best[:, None]) & (m > 0)
+    return t[picked, best], after.argmax(axis=1), shift[picked, best]
+
+
+def window_stats(values: np.ndarray, counts: np.ndarray, ages: np.ndarray, window: int) -> Dict[str, np.ndarray]:
+    """Trend statistics of each row of ``values`` over its columns under ``window`` days old.
+
+    ``values`` is a (rows, columns) array of daily means in time order, NaN
+    where a row has no data, ``counts`` the sessions behind each mean and
+    ``ages`` the age in days of each column (0 is today). Every statistic
+    is an array with one entry per row, NaN where the row has too little
+    data for it.
+    """
+    inside = ages < window
+    values, counts, ages = values[:, inside], counts[:, inside], ages[inside]
+    observed = ~np.isnan(values) & (counts > 0)
+    m = observed.astype(float)
+    y = np.where(observed, values, 0.0)
+    weights = np.where(observed, counts, 0)
+    n = m.sum(axis=1)
+    t = -ages.astype(float)
+    decay = m * 0.5 ** (ages / max(window * EWMA_HALFLIFE, 1.0))
+    st, sy, stt, sty, syy = (m * t).sum(1), y.sum(1), (m * t * t).sum(1), (y * t).sum(1), (y * y).sum(1)
+    spread = n * stt - st ** 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (y * weights).sum(1) / weights.sum(1)
+        ewma = (y * decay).sum(1) / decay.sum(1)
+        # Least-squares slope of the daily means, in rating points per day
+        slope = np.where(spread > 1e-9, (n * sty - st * sy) / spread, np.nan)
+        volatility = np.where(n > 1, np.sqrt(np.maximum(syy - sy ** 2 / n, 0.0) / (n - 1)), np.nan)
+    change_t, change_column, change_shift = _change_points(y, m)
+    change_point = change_t > CHANGE_POINT_T
+    return {
+        'days': n.astype(np.int64),
+        'sessions': weights.sum(1).astype(np.int64),
+        'mean': mean,
+        'ewma': ewma,
+        'slope': slope,
+        'volatility': volatility,
+        'change_point': change_point,
+        'change_age': np.where(change_point, ages[change_column] if ages.size else 0, -1),
+        'change_shift': np.where(change_point, change_shift, np.nan),
+    }
+
+
+def trend_label(slope: float, window: int) -> str:
+    """'improving', 'declining' or 'stable' for a mood slope over ``window`` days."""
+    # Expected gap between the means of the window's two halves
+    change = slope * window / 2
+    if change > TREND_THRESHOLD:
+        return 'improving'
+    if change < -TREND_THRESHOLD:
+        return 'declining'
+    return 'stable'
+
+
+def _number(value) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 3)
+
+
+def matrix_trends(mood: np.ndarray, stress: np.ndarray, counts: np.ndarray, ages: np.ndarray,
+                  windows: Sequence[int] = WINDOWS, today: Optional[datetime.date] = None) -> List[Dict]:
+    """Per-row trend reports for (rows, columns) arrays of daily mean mood and stress.
+
+    Each report maps every window to its session and day counts, the mood
+    trend label and the mood and stress statistics of ``window_stats``.
+    Change points give the age in days of the first day after the shift,
+    and its date when ``today`` is known.
+    """
+    reports: List[Dict] = [{} for _ in range(mood.shape[0])]
+    for window in windows:
+        series = {'mood': window_stats(mood, counts, ages, window), 'stress': window_stats(stress, counts, ages, window)}
+        for row, report in enumerate(reports):
+            entry = {'days': int(series['mood']['days'][row]), 'sessions': int(series['mood']['sessions'][row])}
+            for name, stats in series.items():
+                change = None
+                if stats['change_point'][row]:
+                    age = int(stats['change_age'][row])
+                    change = {'age': age, 'shift': _number(stats['change_shift'][row])}
+                    if today:
+                        change['date'] = (today - datetime.timedelta(days=age)).isoformat()
+                entry[name] = {
+                    'mean': _number(stats['mean'][row]),
+                    'ewma': _number(stats['ewma'][row]),
+                    'slope': _number(stats['slope'][row]),
+                    'volatility': _number(stats['volatility'][row]),
+                    'change_point': change,
+                }
+            slope = series['mood']['slope'][row]
+            entry['trend'] = 'stable' if np.isnan(slope) else trend_label(slope, window)
+            report[window] = entry
+    return reports
+
+
+def point_arrays(points: Sequence[Dict], today: Optional[datetime.date] = None):
+    """(mood, stress, counts, ages) arrays of one row from session dicts or daily rollup points.
+
+    Points carry ``mood_rating``, ``stress_level``, optionally
+    ``session_count`` and a ``date``; points without dates are taken as
+    one per day, the last one today.
+    """
+    size = len(points)
+    mood = np.array([[point.get('mood_rating', 5) for point in points]], dtype=float)
+    stress = np.array([[point.get('stress_level', 5) for point in points]], dtype=float)
+    counts = np.array([[point.get('session_count', 1) for point in points]], dtype=np.int64)
+    if size and all(point.get('date') for point in points):
+        today = today or max(point['date'] for point in points)
+        ages = np.array([(today - point['date']).days for point in points], dtype=np.int64)
+    else:
+        ages = np.arange(size - 1, -1, -1, dtype=np.int64)
+    return mood, stress, counts, ages
+
+
+def point_trends(points: Sequence[Dict], windows: Sequence[int] = WINDOWS,
+                 today: Optional[datetime.date] = None) -> Dict:
+    """Trend report of a single user's points over ``windows`` (see ``matrix_trends``)."""
+    mood, stress, counts, ages = point_arrays(points, today)
+    return matrix_trends(mood, stress, counts, ages, windows, today)[0]
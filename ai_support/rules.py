@@ -0,0 +1,60 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional
+
+
+class Rule(NamedTuple):
+    """One step of a response pipeline: if ``applies`` holds, ``respond`` decides the reply."""
+    name: str
+    applies: Callable[[Any], bool]
+    respond: Callable[[str, Any], str]
+
+
+class RulePipeline:
+    """Ordered rules evaluated until the first one that applies.
+
+    Every evaluation is counted and timed per rule; ``stats()`` returns the
+    totals so the cost and hit distribution of each rule can be inspected.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = list(rules)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            # name -> [evaluated, hits, total_ns]
+            self._stats: Dict[str, list] = {rule.name: [0, 0, 0] for rule in self.rules}
+
+    def record(self, name: str, hit: bool, elapsed_ns: int) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(name, [0, 0, 0])
+            stats[0] += 1
+            stats[1] += int(hit)
+            stats[2] += elapsed_ns
+
+    def run(self, message: str, signals: Any) -> Optional[str]:
+        """Reply of the first rule that applies to ``signals``, or None."""
+        for rule in self.rules:
+            start = time.perf_counter_ns()
+            hit = rule.applies(signals)
+            reply = rule.respond(message, signals) if hit else None
+            self.record(rule.name, hit, time.perf_counter_ns() - start)
+            if hit:
+                return reply
+        return None
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-rule evaluation and hit counts with total and mean time, in pipeline order."""
+        with self._lock:
+            snapshot = {name: list(values) for name, values in self._stats.items()}
+        return {
+            name: {
+                'evaluated': evaluated,
+                'hits': hits,
+                'total_ms': round(total_ns / 1e6, 3),
+                'mean_us': round(total_ns / evaluated / 1e3, 2) if evaluated else 0.0,
+            }
+            for name, (evaluated, hits, total_ns) in snapshot.items()
+        }
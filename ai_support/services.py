@@ -1,6 +1,9 @@
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Tuple
+from core.text import phrase_matches
 from mentees.models import Mentee
 from mentors.models import Mentor
+from .matching_engine import candidate_mode, get_mentor_pool, text_similarity_mode
+from .tfidf import get_tfidf_index
 
 
 def score_match(mentee: Mentee, mentor: Mentor) -> Tuple[int, str, dict]:
@@ -9,18 +12,15 @@ def score_match(mentee: Mentee, mentor: Mentor) -> Tuple[int, str, dict]:
     business_stage = 100 if mentor.business_stage_expertise == mentee.business_stage else 0
     industry = 100 if mentor.industry.lower() == mentee.industry.lower() else 0
 
-    # Simple text overlaps
-    challenge = 0
-    for word in mentee.main_challenges.lower().split(','):
-        if word.strip() and word.strip() in mentor.key_focus_areas.lower():
-            challenge = 100
-            break
-
-    goals = 0
-    for word in mentee.mentorship_goals.lower().split(','):
-        if word.strip() and word.strip() in mentor.key_focus_areas.lower():
-            goals = 100
-            break
+    if text_similarity_mode() == 'tfidf':
+        # Graded TF-IDF cosine similarity against the mentor's profile text
+        tfidf = get_tfidf_index()
+        challenge = int(round(tfidf.similarity_for(mentee.main_challenges, [mentor.pk])[0] * 100))
+        goals = int(round(tfidf.similarity_for(mentee.mentorship_goals, [mentor.pk])[0] * 100))
+    else:
+        # A mentee phrase found, as whole stemmed words, in a mentor's focus phrases
+        challenge = 100 if phrase_matches(mentee.challenge_tokens, mentor.focus_area_tokens) else 0
+        goals = 100 if phrase_matches(mentee.goal_tokens, mentor.focus_area_tokens) else 0
 
     # Availability and rating boost
     availability_boost = 10 if mentor.availability_status == 'available' else 0
@@ -59,13 +59,19 @@ def score_match(mentee: Mentee, mentor: Mentor) -> Tuple[int, str, dict]:
 
 
 def top_matches(mentee: Mentee, limit: int = 3) -> List[Tuple[Mentor, int, str]]:
-    mentors = Mentor.objects.filter(is_active=True, is_verified=True)
-    scored = []
-    for m in mentors:
-        score, reasoning, _ = score_match(mentee, m)
-        scored.append((m, score, reasoning))
-    scored.sort(key=lambda x: x[1], reverse=True)
-    return scored[:limit]
-
+    """Rank active, verified mentors for ``mentee`` with the vectorized pool scorer."""
+    pool = get_mentor_pool()
+    if candidate_mode() == 'lsh':
+        return pool.candidate_top(mentee, limit)
+    return pool.top(mentee, limit)
 
 
+def batch_top_matches(
+    mentees: Iterable[Mentee], limit: int = 3
+) -> Iterator[Tuple[Mentee, List[Tuple[Mentor, int, str]]]]:
+    """Yield (mentee, top matches) for many mentees against one shared mentor pool."""
+    pool = get_mentor_pool()
+    tfidf = get_tfidf_index() if text_similarity_mode() == 'tfidf' else None
+    rank = pool.candidate_top if candidate_mode() == 'lsh' else pool.top
+    for mentee in mentees:
+        yield mentee, rank(mentee, limit, tfidf=tfidf)
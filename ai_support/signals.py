@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from mentees.models import Mentee
+from mentors.models import Mentor
+from .focus_index import reindex_mentor
+from .match_cache import bump_mentee_version, bump_pool_version
+from .materialization import enqueue, scores_refreshed
+from .models import MentalHealthSession
+from .mood_rollups import refresh_rollups
+
+
+@receiver(post_save, sender=Mentor)
+def update_focus_index(sender, instance, raw=False, **kwargs):
+    """Keep the focus-token inverted index in step with saved mentors."""
+    if raw:
+        return
+    reindex_mentor(instance)
+
+
+@receiver(post_save, sender=Mentor)
+def queue_mentor_rescore(sender, instance, raw=False, **kwargs):
+    """Mark a saved mentor's AIMatchingScore rows as stale."""
+    if raw:
+        return
+    enqueue('mentor', [instance.pk])
+
+
+@receiver(post_save, sender=Mentee)
+def queue_mentee_rescore(sender, instance, raw=False, **kwargs):
+    """Mark a saved mentee's AIMatchingScore rows as stale."""
+    if raw:
+        return
+    enqueue('mentee', [instance.pk])
+
+
+@receiver(post_save, sender=Mentor)
+@receiver(post_delete, sender=Mentor)
+def invalidate_cached_matches(sender, instance, raw=False, **kwargs):
+    """Any mentor change can reorder every mentee's cached matches."""
+    if raw:
+        return
+    bump_pool_version()
+
+
+@receiver(post_save, sender=Mentee)
+@receiver(post_delete, sender=Mentee)
+def invalidate_mentee_matches(sender, instance, raw=False, **kwargs):
+    """Drop the cached matches of a changed mentee."""
+    if raw:
+        return
+    bump_mentee_version(instance.pk)
+
+
+@receiver(scores_refreshed)
+def invalidate_refreshed_matches(sender, mentor_ids=(), mentee_ids=(), **kwargs):
+    """Cached match lists may hold the rows process_queue just replaced."""
+    if mentor_ids:
+        bump_pool_version()
+    for mentee_id in mentee_ids:
+        bump_mentee_version(mentee_id)
+
+
+@receiver(post_save, sender=MentalHealthSession)
+@receiver(post_delete, sender=MentalHealthSession)
+def update_mood_rollups(sender, instance, raw=False, origin=None, **kwargs):
+    """Recompute the day and week rollups of a saved or deleted session."""
+    if raw:
+        return
+    # Deleting a user cascades to its sessions and its rollups alike
+    if isinstance(origin, get_user_model()) or getattr(origin, 'model', None) is get_user_model():
+        return
+    refresh_rollups(instance.user_id, timezone.localdate(instance.created_at))
@@ -0,0 +1,127 @@
+import random
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import List, Tuple
+
+from django.contrib.auth import get_user_model
+from django.test.utils import setup_databases, teardown_databases
+
+from mentees.models import Mentee
+from mentors.models import Mentor
+from .focus_index import FocusIndex, focus_keys
+from .matching_engine import MentorPool
+from .models import MentorFocusToken
+
+
+FOCUS_AREAS = [
+    'Digital Marketing', 'Business Strategy', 'Brand Development', 'Market Entry',
+    'Financial Planning', 'Investment Strategy', 'Funding', 'Budget Management',
+    'Export Markets', 'Supply Chain', 'Hiring', 'Leadership', 'E-commerce',
+    'Product Design', 'Pricing', 'Sales', 'Customer Service', 'Legal Compliance',
+    'Tourism', 'Agritech', 'Handicrafts', 'Social Media', 'Operations', 'Fundraising',
+]
+INDUSTRIES = ['Technology', 'Finance', 'Retail', 'Agriculture', 'Tourism', 'Apparel', 'Food', 'Healthcare']
+STAGES = ['idea', 'startup', 'growth', 'established']
+AVAILABILITY = ['available', 'available', 'busy', 'unavailable']
+
+
+def percentile(values, pct):
+    """Nearest-rank ``pct`` percentile of ``values`` (0.0 when empty)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def _mentors(rng: random.Random, size: int, tag: str) -> List[Mentor]:
+    mentors = [
+        Mentor(
+            name=f"Bench Mentor {i}",
+            expertise=rng.choice(FOCUS_AREAS),
+            years_experience=rng.randint(1, 30),
+            short_bio="Synthetic benchmark mentor",
+            key_focus_areas=', '.join(rng.sample(FOCUS_AREAS, rng.randint(2, 5))),
+            availability_status=rng.choice(AVAILABILITY),
+            industry=rng.choice(INDUSTRIES),
+            business_stage_expertise=rng.choice(STAGES),
+            email=f"{tag}-mentor{i}@bench.invalid",
+            average_rating=round(rng.uniform(0, 5), 1),
+            is_verified=True,
+            is_active=True,
+        )
+        for i in range(size)
+    ]
+    # bulk_create skips save(), so derive the token fields here
+    for mentor in mentors:
+        mentor.refresh_tokens()
+    return mentors
+
+
+def _mentee(rng: random.Random, **fields) -> Mentee:
+    mentee = Mentee(
+        business_stage=rng.choice(STAGES),
+        industry=rng.choice(INDUSTRIES),
+        main_challenges=', '.join(area.lower() for area in rng.sample(FOCUS_AREAS, 3)),
+        mentorship_goals=', '.join(area.lower() for area in rng.sample(FOCUS_AREAS, 2)),
+        **fields,
+    )
+    mentee.refresh_tokens()
+    return mentee
+
+
+def memory_pool(rng: random.Random, size: int, mentee_count: int) -> Tuple[MentorPool, List[Mentee]]:
+    """A pool of ``size`` synthetic mentors and ``mentee_count`` mentees that never touch the database."""
+    mentors = _mentors(rng, size, f"memory{size}")
+    postings = defaultdict(set)
+    for pk, mentor in enumerate(mentors, start=1):
+        mentor.pk = pk
+        for key in focus_keys(mentor.focus_area_tokens):
+            postings[key].add(pk)
+    mentees = [_mentee(rng, pk=pk) for pk in range(1, mentee_count + 1)]
+    return MentorPool(mentors, FocusIndex(dict(postings))), mentees
+
+
+@contextmanager
+def disposable_database():
+    """Run the block against a freshly created and migrated test database.
+
+    Same as the test runner: the default database's TEST settings name it,
+    and it is destroyed afterwards, so benchmark rows never reach the live
+    tables.
+    """
+    config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+    try:
+        yield
+    finally:
+        teardown_databases(config, verbosity=0)
+
+
+def populate(rng: random.Random, size: int, mentee_count: int) -> List[Mentee]:
+    """Bulk-create ``size`` synthetic mentors and ``mentee_count`` mentees.
+
+    Only the new mentors are added to the focus index; run this in a
+    disposable database (see ``disposable_database``).
+    """
+    User = get_user_model()
+    tag = f"bench{size}-{rng.randrange(1 << 30)}"
+    mentors = Mentor.objects.bulk_create(_mentors(rng, size, tag), batch_size=2000)
+    if any(mentor.pk is None for mentor in mentors):
+        mentors = list(Mentor.objects.filter(email__startswith=f"{tag}-mentor").only('id', 'focus_area_tokens'))
+    MentorFocusToken.objects.bulk_create(
+        [MentorFocusToken(mentor_id=mentor.pk, token=key) for mentor in mentors for key in focus_keys(mentor.focus_area_tokens)],
+        batch_size=2000,
+    )
+
+    users = User.objects.bulk_create(
+        [
+            User(username=f"{tag}-mentee{i}", email=f"{tag}-mentee{i}@bench.invalid", password='!')
+            for i in range(mentee_count)
+        ]
+    )
+    if any(user.pk is None for user in users):
+        users = list(User.objects.filter(username__startswith=f"{tag}-mentee"))
+    mentees = Mentee.objects.bulk_create([_mentee(rng, user=user) for user in users])
+    if any(mentee.pk is None for mentee in mentees):
+        mentees = list(Mentee.objects.filter(user__username__startswith=f"{tag}-mentee").order_by('pk'))
+    return mentees
@@ -1,14 +1,92 @@
-from django.test import TestCase, Client
+import asyncio
+import contextlib
+import importlib
+import itertools
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import AsyncClient, TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils import timezone
-from .models import MentalHealthSession, ChatMessage
-from .chatbot_service import MentalHealthChatbot
-from mentees.models import Mentee
+from .models import AIMatchingScore, MentalHealthSession, ChatMessage, MatchRefreshQueue, MentorFocusToken, MoodRollup
+from .chatbot_service import CHALLENGE_KEYWORDS, INTENT_KEYWORDS, MOOD_KEYWORDS, MentalHealthChatbot, chatbot
+from .assignment import assign_mentees, remaining_capacity, solve_assignment
+from .chat_history import HISTORY_PAGE_SESSIONS, append_turn, history_page, load_history
+from .chat_turns import save_chat_turn
+from .mood_rollups import iter_user_trends, rebuild_rollups, week_start
+from .mood_trends import WINDOWS, point_trends, window_stats
+from .write_behind import MessageBuffer
+from .chat_backends import BackendError, ChatBackend, OpenAIChatBackend, RetryBudget, configured_backend
+from .focus_index import FocusIndex, rebuild_index
+from .lsh import MentorLSH
+from .caching import check_shared_caches
+from .match_cache import POOL_VERSION_KEY, bump_pool_version, cached_matches
+from .materialization import enqueue, process_queue, ranked_matches
+from .matching_engine import MentorPool, clear_mentor_pool, format_reasoning, get_mentor_pool
+from .services import score_match, top_matches
+from .views import MOOD_CHART_DAYS
+from .synthetic import memory_pool, populate
+from .tfidf import TfidfIndex, get_tfidf_index, refresh as refresh_tfidf, reset_tfidf_index
+from mentees.models import ConnectionRequest, Mentee
+from mentors.models import Mentor
 import json
 
 User = get_user_model()
 
+LOCAL_MEMORY_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@contextlib.contextmanager
+def assertNumDataQueries(test, count):
+    """assertNumQueries, leaving out the database cache's reads, writes and their savepoints."""
+    with CaptureQueriesContext(connection) as context:
+        yield
+    table = connection.ops.quote_name(settings.CACHES['default']['LOCATION'])
+    queries = []
+    for sql in (query['sql'] for query in context.captured_queries):
+        if table in sql:
+            continue
+        if queries and queries[-1].startswith('SAVEPOINT') and sql == f'RELEASE {queries[-1]}':
+            queries.pop()
+            continue
+        queries.append(sql)
+    test.assertEqual(len(queries), count, '\n'.join(queries))
+
+
+
+@contextlib.contextmanager
+def emulate_mysql_upserts(manager, unique_fields):
+    """Run ``manager``'s upserts as MySQL does: on its unique key, unnamed, returning no ids."""
+    targets = []
+    bulk_create = manager.bulk_create
+
+    def upsert(objs, **kwargs):
+        targets.append(kwargs['unique_fields'])
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', True):
+            bulk_create(objs, **{**kwargs, 'unique_fields': unique_fields})
+        for obj in objs:
+            obj.pk = None
+        return objs
+
+    with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False), \
+            mock.patch.object(manager, 'bulk_create', side_effect=upsert):
+        yield targets
+
 
 class MentalHealthChatTests(TestCase):
     def setUp(self):
@@ -110,6 +188,115 @@ class MentalHealthChatTests(TestCase):
         self.assertEqual(user_message.content, 'I am feeling sad')
         self.assertIsNotNone(ai_message.content)
 
+    async def test_send_message_waits_on_backend_without_blocking(self):
+        """Concurrent async requests overlap their waits on a slow chatbot backend"""
+        async def slow_reply(message, session_history=None):
+            await asyncio.sleep(0.3)
+            return f'reply to {message}'
+
+        await self.async_client.aforce_login(self.user)
+        with mock.patch.object(chatbot, 'agenerate_entrepreneur_response', slow_reply):
+            start = time.monotonic()
+            responses = await asyncio.gather(*[
+                self.async_client.post(
+                    reverse('ai_support:send_message'),
+                    data=json.dumps({'message': f'message {i}', 'mood_rating': 5, 'stress_level': 5}),
+                    content_type='application/json'
+                )
+                for i in range(8)
+            ])
+            elapsed = time.monotonic() - start
+        self.assertEqual([r.status_code for r in responses], [200] * 8)
+        self.assertLess(elapsed, 8 * 0.3 / 2)
+        self.assertEqual(await ChatMessage.objects.filter(role='assistant', content__startswith='reply to').acount(), 8)
+        self.assertEqual(await MentalHealthSession.objects.filter(user=self.user).acount(), 1)
+
+    async def test_mental_health_chat_form_post(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse('ai_support:chat'), {'message': 'Hello there', 'mood_rating': 6, 'stress_level': 3}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(json.loads(response.content)['response'], MentalHealthChatbot().greetings)
+        self.assertEqual(await ChatMessage.objects.filter(session__user=self.user).acount(), 2)
+
+    async def test_stream_message_sends_events_before_saving(self):
+        """The reply streams as server-sent events and the turn is saved afterwards"""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse('ai_support:stream_message'),
+            data=json.dumps({'message': 'I am worried about cash flow', 'mood_rating': 4, 'stress_level': 6}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        chunks = aiter(response.streaming_content)
+        first = (await anext(chunks)).decode()
+        self.assertTrue(first.startswith('event: start\n'))
+        self.assertFalse(await ChatMessage.objects.aexists())
+
+        rest = b''.join([chunk async for chunk in chunks]).decode()
+        events = []
+        for block in (first + rest).strip().split('\n\n'):
+            event, data = block.split('\n')
+            events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+        self.assertEqual([name for name, _ in events], ['start', 'delta', 'done'])
+        self.assertEqual(events[0][1], {'mood_rating': 4, 'stress_level': 6})
+
+        reply = await ChatMessage.objects.select_related('session').aget(role='assistant')
+        self.assertEqual(reply.content, events[1][1]['content'])
+        self.assertEqual((await ChatMessage.objects.aget(role='user')).content, 'I am worried about cash flow')
+        self.assertEqual(reply.session.ai_response, reply.content)
+
+    async def test_stream_message_runs_blocking_backend_off_the_event_loop(self):
+        loop_thread = threading.current_thread()
+        reply_threads = []
+
+        class BlockingBackend(ChatBackend):
+            def reply(self, message, session_history):
+                reply_threads.append(threading.current_thread())
+                return 'from the backend'
+
+        await self.async_client.aforce_login(self.user)
+        with mock.patch.object(chatbot, 'backend', BlockingBackend()):
+            response = await self.async_client.post(
+                reverse('ai_support:stream_message'),
+                data=json.dumps({'message': 'I am worried about cash flow'}),
+                content_type='application/json'
+            )
+            body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn('from the backend', body)
+        self.assertEqual(len(reply_threads), 1)
+        self.assertIsNot(reply_threads[0], loop_thread)
+
+    def test_stream_message_rejects_empty_message(self):
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.post(
+            reverse('ai_support:stream_message'),
+            data=json.dumps({'message': '   '}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ChatMessage.objects.exists())
+
+    async def test_stream_message_requires_csrf_token(self):
+        client = AsyncClient(enforce_csrf_checks=True)
+        await client.aforce_login(self.user)
+        post = lambda **headers: client.post(
+            reverse('ai_support:stream_message'),
+            data=json.dumps({'message': 'Hello'}), content_type='application/json', headers=headers
+        )
+        self.assertEqual((await post()).status_code, 403)
+        self.assertFalse(await ChatMessage.objects.aexists())
+
+        # The chat page sets the cookie its script sends back as X-CSRFToken
+        await client.get(reverse('ai_support:chat'))
+        response = await post(**{'X-CSRFToken': client.cookies['csrftoken'].value})
+        self.assertEqual(response.status_code, 200)
+        [chunk async for chunk in response.streaming_content]
+        self.assertEqual(await ChatMessage.objects.acount(), 2)
+
 
 class ChatbotServiceTests(TestCase):
     def setUp(self):
@@ -169,6 +356,48 @@ class ChatbotServiceTests(TestCase):
         challenges = self.chatbot.identify_entrepreneur_challenges("I feel lonely running my business")
         self.assertIn('loneliness', challenges)
 
+    def test_single_pass_classifier_matches_keyword_scans(self):
+        """One automaton scan agrees with scanning every keyword table separately"""
+        def reference(message):
+            lower = message.lower()
+            hit = lambda words: any(word in lower for word in words)
+            mood = next((label for label, words in MOOD_KEYWORDS if hit(words)), 'neutral')
+            challenges = [name for name, words in CHALLENGE_KEYWORDS if hit(words)]
+            intents = [name for name, words in INTENT_KEYWORDS.items() if hit(words)]
+            return mood, challenges, hit(INTENT_KEYWORDS['crisis']), intents[0] if intents else None, frozenset(intents)
+
+        rng = random.Random(5)
+        vocabulary = [word for _, words in MOOD_KEYWORDS + CHALLENGE_KEYWORDS for word in words]
+        vocabulary += [word for words in INTENT_KEYWORDS.values() for word in words]
+        vocabulary += ['the', 'my', 'Business', 'is', 'and', 'I', 'so', 'WORK', 'life', 'not', 'good', 'no']
+        for _ in range(500):
+            message = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(0, 8)))
+            self.assertEqual(tuple(self.chatbot.classify(message)), reference(message), message)
+
+    def test_crisis_reply(self):
+        response = self.chatbot.generate_entrepreneur_response("Sometimes I want to die")
+        self.assertIn(response, self.chatbot.entrepreneur_resources['crisis'])
+
+    def test_crisis_rule_runs_first_and_exits_early(self):
+        """Crisis wins over a greeting and later rules are never evaluated"""
+        response = self.chatbot.generate_entrepreneur_response("Hi, I want to die")
+        self.assertIn(response, self.chatbot.entrepreneur_resources['crisis'])
+        stats = self.chatbot.rule_stats()
+        self.assertEqual(stats['crisis']['hits'], 1)
+        self.assertEqual(stats['greeting']['evaluated'], 0)
+        self.assertEqual(stats['classify']['evaluated'], 1)
+
+    def test_rule_stats_count_hits(self):
+        self.chatbot.generate_entrepreneur_response("Hello")
+        self.chatbot.generate_entrepreneur_response("I am worried about cash flow")
+        stats = self.chatbot.rule_stats()
+        self.assertEqual(list(stats)[:5], ['crisis', 'greeting', 'professional_help', 'entrepreneur_support', 'mood'])
+        self.assertEqual((stats['crisis']['evaluated'], stats['crisis']['hits']), (2, 0))
+        self.assertEqual((stats['greeting']['evaluated'], stats['greeting']['hits']), (2, 1))
+        self.assertEqual((stats['mood']['evaluated'], stats['mood']['hits']), (1, 1))
+        self.chatbot.rules.reset()
+        self.assertEqual(self.chatbot.rule_stats()['mood']['evaluated'], 0)
+
     def test_mood_trends_tracking(self):
         """Test mood trends analysis"""
         sessions_data = [
@@ -183,6 +412,722 @@ class ChatbotServiceTests(TestCase):
         self.assertIn('sessions_count', trends)
 
 
+class StubModelServer:
+    """Local OpenAI-compatible /chat/completions server for backend tests.
+
+    ``script`` is consumed one entry per request as (status, delay seconds)
+    or (status, delay, seconds between body bytes); once it is empty every
+    request succeeds at once.
+    """
+
+    def __init__(self):
+        self.script = []
+        self.requests = []
+        self.peers = set()
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with stub._lock:
+                    stub.requests.append((self.path, dict(self.headers), body))
+                    stub.peers.add(self.client_address)
+                    status, delay, *trickle = stub.script.pop(0) if stub.script else (200, 0)
+                    stub.active += 1
+                    stub.peak = max(stub.peak, stub.active)
+                time.sleep(delay)
+                with stub._lock:
+                    stub.active -= 1
+                reply = json.dumps({'choices': [{'message': {
+                    'role': 'assistant', 'content': f"model reply to: {body['messages'][-1]['content']}",
+                }}]}).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(reply)))
+                self.end_headers()
+                try:
+                    if trickle:
+                        for i in range(len(reply)):
+                            self.wfile.write(reply[i:i + 1])
+                            self.wfile.flush()
+                            time.sleep(trickle[0])
+                    else:
+                        self.wfile.write(reply)
+                except OSError:
+                    pass  # client gave up
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}/v1'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ChatBackendTests(TestCase):
+    def setUp(self):
+        self.stub = StubModelServer()
+        self.addCleanup(self.stub.close)
+
+    def backend(self, **options):
+        options.setdefault('retry_budget', RetryBudget(ratio=0.5, minimum=10))
+        backend = OpenAIChatBackend(self.stub.url, 'stub-model', api_key='secret', **options)
+        self.addCleanup(backend.session.close)
+        return backend
+
+    def test_backends_must_implement_reply(self):
+        with self.assertRaises(TypeError):
+            ChatBackend()
+
+    def test_reply_sends_history_and_reuses_connection(self):
+        backend = self.backend()
+        history = [{'role': 'user', 'content': 'earlier'}, {'role': 'assistant', 'content': 'answer'}]
+        for _ in range(3):
+            self.assertEqual(backend.reply('How do I cope?', history), 'model reply to: How do I cope?')
+        path, headers, body = self.stub.requests[0]
+        self.assertEqual(path, '/v1/chat/completions')
+        self.assertEqual(headers['Authorization'], 'Bearer secret')
+        self.assertEqual(body['model'], 'stub-model')
+        self.assertEqual([m['role'] for m in body['messages']], ['system', 'user', 'assistant', 'user'])
+        # Keep-alive: all three requests came over one pooled connection
+        self.assertEqual(len(self.stub.peers), 1)
+
+    def test_retries_transient_errors(self):
+        self.stub.script = [(503, 0), (502, 0)]
+        self.assertEqual(self.backend().reply('hi', []), 'model reply to: hi')
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_client_errors_are_not_retried(self):
+        self.stub.script = [(400, 0)]
+        with self.assertRaises(BackendError):
+            self.backend().reply('hi', [])
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_retry_budget_stops_retries(self):
+        budget = RetryBudget(ratio=0, minimum=1)
+        backend = self.backend(retry_budget=budget, max_retries=5)
+        self.stub.script = [(503, 0)] * 4
+        with self.assertRaises(BackendError):
+            backend.reply('first', [])
+        with self.assertRaises(BackendError):
+            backend.reply('second', [])
+        # One retry for the first call, none left for the second
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_concurrency_is_capped(self):
+        backend = self.backend(max_concurrency=2)
+        self.stub.script = [(200, 0.1)] * 6
+        threads = [threading.Thread(target=backend.reply, args=(f'm{i}', [])) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.stub.requests), 6)
+        self.assertEqual(self.stub.peak, 2)
+
+    def test_slow_backend_falls_back_to_rules_at_deadline(self):
+        bot = MentalHealthChatbot(backend=self.backend(deadline=0.2))
+        self.stub.script = [(200, 1.0)] * 3
+        start = time.monotonic()
+        reply = bot.generate_entrepreneur_response('Hello')
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertIn(reply, bot.greetings)
+        stats = bot.rule_stats()['backend']
+        self.assertEqual((stats['evaluated'], stats['hits']), (1, 0))
+
+    def test_slowly_streamed_reply_is_cut_off_at_deadline(self):
+        # Each byte arrives well within the per-read timeout; the whole body would take about 5s
+        bot = MentalHealthChatbot(backend=self.backend(deadline=0.3, timeout=2.0))
+        self.stub.script = [(200, 0, 0.05)]
+        start = time.monotonic()
+        reply = bot.generate_entrepreneur_response('Hello')
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertIn(reply, bot.greetings)
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_chatbot_uses_backend_but_never_for_crisis(self):
+        bot = MentalHealthChatbot(backend=self.backend())
+        self.assertEqual(bot.generate_entrepreneur_response('Hello'), 'model reply to: Hello')
+        self.assertIn(bot.generate_entrepreneur_response('I want to die'), bot.entrepreneur_resources['crisis'])
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_async_reply_runs_off_the_event_loop(self):
+        bot = MentalHealthChatbot(backend=self.backend())
+        self.stub.script = [(200, 0.2)] * 4
+
+        async def burst():
+            start = time.monotonic()
+            replies = await asyncio.gather(*[bot.agenerate_entrepreneur_response(f'm{i}') for i in range(4)])
+            return replies, time.monotonic() - start
+
+        replies, elapsed = asyncio.run(burst())
+        self.assertEqual(replies, [f'model reply to: m{i}' for i in range(4)])
+        self.assertLess(elapsed, 0.6)
+
+    def test_configured_backend_follows_settings(self):
+        with self.settings(AI_CHATBOT_BACKEND={'url': ''}):
+            self.assertIsNone(configured_backend())
+        with self.settings(AI_CHATBOT_BACKEND={'url': self.stub.url, 'model': 'm', 'retry_ratio': 0.2}):
+            backend = configured_backend()
+            self.addCleanup(backend.session.close)
+        self.assertEqual(backend.url, f'{self.stub.url}/chat/completions')
+        self.assertEqual(backend.retry_budget.ratio, 0.2)
+
+
+class ChatTurnServiceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='turns', email='turns@example.com', password='testpass123')
+
+    def test_turn_is_written_in_one_transaction(self):
+        # SAVEPOINT, session upsert, rollup aggregate and upsert, message INSERT, RELEASE
+        with assertNumDataQueries(self, 6):
+            first, reply = save_chat_turn(self.user, 'Hello', 'Hi there', 4, 6)
+        with assertNumDataQueries(self, 6):
+            save_chat_turn(self.user, 'Still here', 'Good to hear', 7, 2)
+
+        session = MentalHealthSession.objects.get(user=self.user)
+        self.assertEqual((session.mood_rating, session.stress_level), (7, 2))
+        self.assertEqual(session.ai_response, 'Good to hear')
+        self.assertEqual(session.session_type, 'daily_checkin')
+        self.assertEqual(
+            list(session.messages.values_list('role', 'content')),
+            [('user', 'Hello'), ('assistant', 'Hi there'), ('user', 'Still here'), ('assistant', 'Good to hear')],
+        )
+        self.assertEqual((first.role, reply.role), ('user', 'assistant'))
+        self.assertLessEqual(first.created_at, reply.created_at)
+
+    def test_session_is_keyed_by_day(self):
+        save_chat_turn(self.user, 'Hello', 'Hi there', 4, 6)
+        session = MentalHealthSession.objects.get(user=self.user)
+        self.assertEqual(session.session_date, timezone.localdate())
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            MentalHealthSession.objects.create(
+                user=self.user, session_type='daily_checkin', session_date=session.session_date,
+                mood_rating=5, stress_level=5,
+            )
+        # A new day starts a new session
+        MentalHealthSession.objects.filter(pk=session.pk).update(session_date=timezone.localdate() - timezone.timedelta(days=1))
+        save_chat_turn(self.user, 'Next day', 'Welcome back', 5, 5)
+        self.assertEqual(MentalHealthSession.objects.filter(user=self.user).count(), 2)
+
+    def test_backends_without_upsert_targets_upsert_on_the_unique_key(self):
+        unique_fields = ['user', 'session_type', 'session_date']
+        with emulate_mysql_upserts(MentalHealthSession.objects, unique_fields) as targets, \
+                emulate_mysql_upserts(MoodRollup.objects, ['user', 'period', 'period_start']):
+            save_chat_turn(self.user, 'Hello', 'Hi there', 4, 6)
+            first, _ = save_chat_turn(self.user, 'Still here', 'Good to hear', 7, 2)
+        self.assertEqual(targets, [None, None])
+        session = MentalHealthSession.objects.get(user=self.user)
+        self.assertEqual((session.mood_rating, session.stress_level, session.ai_response), (7, 2, 'Good to hear'))
+        self.assertEqual(session.session_date, timezone.localdate())
+        self.assertEqual(first.session_id, session.pk)
+        self.assertEqual(session.messages.count(), 4)
+        self.assertEqual(MoodRollup.objects.get(user=self.user, period='day').mood_sum, 7)
+
+    def test_backfill_keys_the_latest_session_of_each_day(self):
+        backfill = importlib.import_module('ai_support.migrations.0007_mentalhealthsession_session_date').backfill_session_dates
+        now = timezone.now()
+        older, latest, yesterday = [
+            MentalHealthSession.objects.create(user=self.user, session_type='daily_checkin', mood_rating=5, stress_level=5)
+            for _ in range(3)
+        ]
+        MentalHealthSession.objects.filter(pk=older.pk).update(created_at=now - timezone.timedelta(minutes=5))
+        MentalHealthSession.objects.filter(pk=yesterday.pk).update(created_at=now - timezone.timedelta(days=1))
+        backfill(django_apps, None)
+        dates = dict(MentalHealthSession.objects.values_list('pk', 'session_date'))
+        self.assertIsNone(dates[older.pk])
+        self.assertEqual(dates[latest.pk], timezone.localdate(now))
+        self.assertEqual(dates[yesterday.pk], timezone.localdate(now - timezone.timedelta(days=1)))
+
+    def test_failed_turn_leaves_nothing_behind(self):
+        with mock.patch.object(ChatMessage.objects, 'bulk_create', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                save_chat_turn(self.user, 'Hello', 'Hi there', 4, 6)
+        self.assertFalse(MentalHealthSession.objects.exists())
+
+
+class WriteBehindTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buffered', email='buffered@example.com', password='testpass123')
+        self.session = MentalHealthSession.objects.create(
+            user=self.user, session_type='daily_checkin', session_date=timezone.localdate(), mood_rating=5, stress_level=5
+        )
+
+    def messages(self, count):
+        return [ChatMessage(session=self.session, content=f'm{i}', role='user') for i in range(count)]
+
+    def test_flush_writes_in_order_and_retries_are_idempotent(self):
+        buffer = MessageBuffer(background=False)
+        batch = self.messages(5)
+        buffer.put(batch)
+        self.assertFalse(ChatMessage.objects.exists())
+        self.assertEqual(buffer.flush(), 5)
+        # The same messages again, as after a commit whose acknowledgement was lost
+        buffer.put(batch)
+        buffer.flush()
+        self.assertEqual(list(ChatMessage.objects.values_list('content', flat=True)), [f'm{i}' for i in range(5)])
+
+    def test_failed_flush_requeues_in_front(self):
+        buffer = MessageBuffer(background=False)
+        buffer.put(self.messages(2))
+        with mock.patch.object(ChatMessage.objects, 'bulk_create', side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError):
+                buffer.flush()
+        buffer.put([ChatMessage(session=self.session, content='later', role='user')])
+        self.assertEqual(len(buffer), 3)
+        buffer.flush()
+        self.assertEqual(list(ChatMessage.objects.values_list('content', flat=True)), ['m0', 'm1', 'later'])
+
+    def test_rejected_rows_are_dead_lettered_without_blocking_the_queue(self):
+        buffer = MessageBuffer(background=False)
+        batch = self.messages(6)
+        poison = ChatMessage(session=self.session, content='poison', role='user')
+        batch.insert(3, poison)
+        bulk_create = ChatMessage.objects.bulk_create
+        attempts = []
+
+        def reject_poison(rows, **kwargs):
+            # Like a row whose session was deleted before the flush
+            attempts.append(len(rows))
+            if poison in rows:
+                raise IntegrityError('FOREIGN KEY constraint failed')
+            return bulk_create(rows, **kwargs)
+
+        buffer.put(batch)
+        with mock.patch.object(ChatMessage.objects, 'bulk_create', side_effect=reject_poison), \
+                self.assertLogs('ai_support.write_behind', 'ERROR'):
+            self.assertEqual(buffer.flush(), 6)
+        self.assertEqual(list(buffer.dead_letters), [poison])
+        self.assertEqual(len(buffer), 0)
+        # Halved down to the bad row instead of retried whole
+        self.assertEqual(attempts[0], 7)
+        self.assertIn(1, attempts)
+        buffer.put([ChatMessage(session=self.session, content='later', role='user')])
+        buffer.flush()
+        self.assertEqual(
+            list(ChatMessage.objects.values_list('content', flat=True)), [f'm{i}' for i in range(6)] + ['later']
+        )
+
+    @override_settings(AI_CHAT_WRITE_BEHIND={'enabled': True})
+    def test_failing_inline_flush_does_not_fail_the_saved_turn(self):
+        cache.clear()
+        buffer = MessageBuffer(background=False)
+        with mock.patch('ai_support.chat_turns.get_message_buffer', return_value=buffer), \
+                mock.patch.object(buffer, 'put', side_effect=RuntimeError('db down')), \
+                self.assertLogs('django.test', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                save_chat_turn(self.user, 'Hello', 'Hi there', 4, 6)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.ai_response, 'Hi there')
+
+    def test_flusher_triggers_on_size_time_and_close(self):
+        buffer = MessageBuffer(batch_size=3, flush_interval=0.2)
+        flushed = threading.Event()
+        with mock.patch.object(buffer, 'flush', side_effect=lambda: flushed.set() or 0):
+            buffer.put(self.messages(3))
+            self.assertTrue(flushed.wait(0.1))  # size trigger, before the interval
+            flushed.clear()
+            buffer.put(self.messages(1))
+            self.assertTrue(flushed.wait(1.0))  # time trigger
+            flushed.clear()
+            buffer.close()
+            self.assertTrue(flushed.is_set())
+        self.assertFalse(buffer._thread.is_alive())
+
+    def test_overflow_flushes_inline(self):
+        buffer = MessageBuffer(max_pending=4, background=False)
+        buffer.put(self.messages(3))
+        self.assertFalse(ChatMessage.objects.exists())
+        buffer.put(self.messages(1))
+        self.assertEqual(ChatMessage.objects.count(), 4)
+
+    @override_settings(AI_CHAT_WRITE_BEHIND={'enabled': True})
+    def test_chat_turn_queues_messages_after_commit(self):
+        cache.clear()
+        buffer = MessageBuffer(background=False)
+        with mock.patch('ai_support.chat_turns.get_message_buffer', return_value=buffer):
+            with self.captureOnCommitCallbacks(execute=True):
+                user_message, reply = save_chat_turn(self.user, 'Hello', 'Hi there', 4, 6)
+        self.assertEqual(len(buffer), 2)
+        self.assertFalse(ChatMessage.objects.exists())
+        self.assertLessEqual(user_message.created_at, reply.created_at)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.ai_response, 'Hi there')
+        buffer.flush()
+        self.assertEqual(list(self.session.messages.values_list('role', flat=True)), ['user', 'assistant'])
+
+
+@override_settings(AI_CHATBOT_HISTORY_SIZE=4)
+class ChatHistoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='history', email='history@example.com', password='testpass123')
+        self.session = MentalHealthSession.objects.create(
+            user=self.user, session_type='daily_checkin', session_date=timezone.localdate(), mood_rating=5, stress_level=5
+        )
+
+    def add_messages(self, count):
+        for i in range(count):
+            ChatMessage.objects.create(session=self.session, content=f'm{i}', role='user' if i % 2 == 0 else 'assistant')
+
+    def test_loads_only_the_latest_window_once(self):
+        self.add_messages(30)
+        with assertNumDataQueries(self, 1):
+            history = load_history(self.user.pk)
+        self.assertEqual([turn['content'] for turn in history], ['m26', 'm27', 'm28', 'm29'])
+        self.assertEqual(history[0], {'role': 'user', 'content': 'm26'})
+        with assertNumDataQueries(self, 0):
+            self.assertEqual(load_history(self.user.pk), history)
+
+    def test_append_turn_keeps_a_bounded_ring(self):
+        self.add_messages(3)
+        load_history(self.user.pk)
+        append_turn(self.user.pk, 'question', 'answer')
+        with assertNumDataQueries(self, 0):
+            history = load_history(self.user.pk)
+        self.assertEqual([turn['content'] for turn in history], ['m1', 'm2', 'question', 'answer'])
+
+    @override_settings(CACHES=LOCAL_MEMORY_CACHES)
+    def test_local_memory_cache_keeps_no_ring(self):
+        self.add_messages(3)
+        load_history(self.user.pk)
+        append_turn(self.user.pk, 'question', 'answer')
+        self.assertIsNone(cache.get(f'chat_history:{self.user.pk}:{timezone.localdate().isoformat()}'))
+        with self.assertNumQueries(1):
+            history = load_history(self.user.pk)
+        self.assertEqual([turn['content'] for turn in history], ['m0', 'm1', 'm2'])
+
+    def test_other_users_and_days_are_separate(self):
+        self.add_messages(2)
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        self.assertEqual(load_history(other.pk), [])
+        MentalHealthSession.objects.filter(pk=self.session.pk).update(session_date=timezone.localdate() - timezone.timedelta(days=1))
+        cache.clear()
+        self.assertEqual(load_history(self.user.pk), [])
+
+    def test_send_message_passes_the_history_window(self):
+        seen = []
+
+        async def reply(message, session_history=None):
+            seen.append([turn['content'] for turn in session_history])
+            return f'reply {len(seen)}'
+
+        self.client.login(username='history', password='testpass123')
+        with mock.patch.object(chatbot, 'agenerate_entrepreneur_response', reply):
+            for text in ['one', 'two', 'three']:
+                self.client.post(
+                    reverse('ai_support:send_message'),
+                    data=json.dumps({'message': text}), content_type='application/json'
+                )
+        self.assertEqual(seen, [[], ['one', 'reply 1'], ['one', 'reply 1', 'two', 'reply 2']])
+        self.assertEqual(
+            [turn['content'] for turn in load_history(self.user.pk)], ['two', 'reply 2', 'three', 'reply 3']
+        )
+
+
+class ChatHistoryPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='pager', email='pager@example.com', password='testpass123')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.start = timezone.now() - timezone.timedelta(days=30)
+        self.expected = []
+
+    def add_session(self, day, count):
+        session = MentalHealthSession.objects.create(
+            user=self.user, session_type='daily_checkin', mood_rating=5, stress_level=5
+        )
+        day_start = self.start + timezone.timedelta(days=day)
+        MentalHealthSession.objects.filter(pk=session.pk).update(created_at=day_start)
+        for i in range(count):
+            # Pairs share a timestamp so the id breaks the tie
+            message = ChatMessage.objects.create(
+                session=session, content=f'd{day}m{i}', role='user',
+                created_at=day_start + timezone.timedelta(seconds=i // 2),
+            )
+            self.expected.insert(0, message.content)
+        return session
+
+    def walk(self, limit):
+        contents, cursor, pages = [], None, 0
+        while True:
+            page, cursor = history_page(self.user.pk, cursor, limit)
+            contents += [message['content'] for message in page]
+            pages += 1
+            if cursor is None:
+                return contents, pages
+
+    def test_pages_cover_every_message_newest_first_across_sessions(self):
+        for day, count in enumerate([5, 0, 3, 1, 7]):
+            self.add_session(day, count)
+        for limit in (1, 2, 4, 50):
+            contents, _ = self.walk(limit)
+            self.assertEqual(contents, self.expected)
+
+    def test_runs_of_empty_sessions_do_not_end_the_history(self):
+        self.add_session(0, 2)
+        for day in range(1, HISTORY_PAGE_SESSIONS * 2 + 2):
+            self.add_session(day, 0)
+        self.add_session(20, 1)
+        contents, pages = self.walk(10)
+        self.assertEqual(contents, self.expected)
+        self.assertGreater(pages, 1)
+
+    def test_page_cost_does_not_depend_on_history_length(self):
+        for day in range(4):
+            self.add_session(day, 30)
+        _, cursor = history_page(self.user.pk, None, 10)
+        with self.assertNumQueries(1):
+            page, cursor = history_page(self.user.pk, cursor, 10)
+        self.assertEqual(len(page), 10)
+        # Straddling two sessions: the cursor session, the session list, the next session
+        _, cursor = history_page(self.user.pk, cursor, 5)
+        with self.assertNumQueries(3):
+            page, _ = history_page(self.user.pk, cursor, 10)
+        self.assertEqual([message['content'] for message in page], self.expected[25:35])
+
+    def test_endpoint_pages_only_the_users_messages(self):
+        self.add_session(0, 3)
+        other = User.objects.create_user(username='snoop', email='snoop@example.com', password='testpass123')
+        other_session = MentalHealthSession.objects.create(
+            user=other, session_type='daily_checkin', mood_rating=5, stress_level=5
+        )
+        ChatMessage.objects.create(session=other_session, content='private', role='user')
+
+        response = self.client.get(reverse('ai_support:chat_history'), {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([message['content'] for message in data['messages']], self.expected[:2])
+        self.assertEqual(set(data['messages'][0]), {'id', 'session_id', 'role', 'content', 'created_at'})
+
+        response = self.client.get(reverse('ai_support:chat_history'), {'limit': 2, 'cursor': data['next_cursor']})
+        data = response.json()
+        self.assertEqual([message['content'] for message in data['messages']], self.expected[2:])
+        self.assertIsNone(data['next_cursor'])
+
+        snooper = Client()
+        snooper.force_login(other)
+        contents = [m['content'] for m in snooper.get(reverse('ai_support:chat_history')).json()['messages']]
+        self.assertEqual(contents, ['private'])
+
+    def test_endpoint_rejects_bad_cursor_and_limit(self):
+        url = reverse('ai_support:chat_history')
+        self.assertEqual(self.client.get(url, {'cursor': 'not-a-cursor'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'limit': '0'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'limit': 'many'}).status_code, 400)
+
+    def test_chat_page_renders_the_latest_page_with_a_cursor_for_older(self):
+        session = MentalHealthSession.objects.create(
+            user=self.user, session_type='daily_checkin', session_date=timezone.localdate(), mood_rating=5, stress_level=5
+        )
+        ChatMessage.objects.bulk_create([
+            ChatMessage(session=session, content=f'today {i}', role='user') for i in range(60)
+        ])
+        response = self.client.get(reverse('ai_support:chat'))
+        shown = response.context['recent_messages']
+        self.assertEqual([m.content for m in shown], [f'today {i}' for i in range(10, 60)])
+        page, _ = history_page(self.user.pk, response.context['history_cursor'], 50)
+        self.assertEqual([m['content'] for m in page], [f'today {i}' for i in range(9, -1, -1)])
+
+
+class MoodRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='rollup', email='rollup@example.com', password='testpass123')
+
+    def rollups(self, user=None):
+        return {
+            (rollup.period, rollup.period_start): (
+                rollup.session_count, rollup.mood_sum, rollup.mood_min, rollup.mood_max,
+                rollup.stress_sum, rollup.stress_min, rollup.stress_max,
+            )
+            for rollup in MoodRollup.objects.filter(user=user or self.user)
+        }
+
+    def test_chat_turns_keep_todays_rollups_current(self):
+        today = timezone.localdate()
+        save_chat_turn(self.user, 'Hello', 'Hi', 4, 6)
+        save_chat_turn(self.user, 'Better now', 'Good', 8, 3)
+        # The turn re-rates the one daily session rather than adding another
+        expected = (1, 8, 8, 8, 3, 3, 3)
+        self.assertEqual(self.rollups(), {('day', today): expected, ('week', week_start(today)): expected})
+
+    def test_saved_and_deleted_sessions_update_their_buckets(self):
+        today = timezone.localdate()
+        sessions = [
+            MentalHealthSession.objects.create(user=self.user, session_type='stress_support', mood_rating=mood, stress_level=9)
+            for mood in (2, 6, 7)
+        ]
+        self.assertEqual(self.rollups()[('day', today)], (3, 15, 2, 7, 27, 9, 9))
+        sessions[0].delete()
+        self.assertEqual(self.rollups()[('day', today)], (2, 13, 6, 7, 18, 9, 9))
+        for session in sessions[1:]:
+            session.delete()
+        self.assertEqual(self.rollups(), {})
+
+    def test_backends_without_upsert_targets_update_rollups(self):
+        today = timezone.localdate()
+        with emulate_mysql_upserts(MoodRollup.objects, ['user', 'period', 'period_start']) as targets:
+            first = MentalHealthSession.objects.create(user=self.user, session_type='motivation', mood_rating=3, stress_level=4)
+            MentalHealthSession.objects.create(user=self.user, session_type='motivation', mood_rating=9, stress_level=2)
+            self.assertEqual(self.rollups()[('day', today)], (2, 12, 3, 9, 6, 2, 4))
+            first.delete()
+        self.assertEqual(set(targets), {None})
+        self.assertEqual(self.rollups()[('week', week_start(today))], (1, 9, 9, 9, 2, 2, 2))
+
+    def test_deleting_a_user_skips_the_per_session_refresh(self):
+        for mood in (2, 6, 7):
+            MentalHealthSession.objects.create(user=self.user, session_type='motivation', mood_rating=mood, stress_level=5)
+        with mock.patch('ai_support.signals.refresh_rollups') as refresh:
+            self.user.delete()
+        refresh.assert_not_called()
+        self.assertFalse(MoodRollup.objects.exists())
+
+    def test_rebuild_matches_incremental_rollups(self):
+        other = User.objects.create_user(username='rollup2', email='rollup2@example.com', password='testpass123')
+        rng = random.Random(7)
+        for user in (self.user, other):
+            for _ in range(5):
+                MentalHealthSession.objects.create(
+                    user=user, session_type='motivation', mood_rating=rng.randint(1, 10), stress_level=rng.randint(1, 10)
+                )
+        incremental = self.rollups()
+
+        MoodRollup.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_mood_rollups', '--user', str(self.user.pk), stdout=out)
+        self.assertEqual(self.rollups(), incremental)
+        self.assertEqual(self.rollups(other), {})
+        self.assertIn('Wrote 2 mood rollup(s).', out.getvalue())
+
+    def test_rebuild_groups_history_by_day_and_week(self):
+        rng = random.Random(11)
+        now = timezone.now()
+        sessions = MentalHealthSession.objects.bulk_create([
+            MentalHealthSession(
+                user=self.user, session_type='motivation', mood_rating=rng.randint(1, 10),
+                stress_level=rng.randint(1, 10), ai_response='',
+            )
+            for _ in range(60)
+        ])
+        for session in sessions:
+            session.created_at = now - timezone.timedelta(hours=rng.randint(0, 24 * 60))
+            MentalHealthSession.objects.filter(pk=session.pk).update(created_at=session.created_at)
+
+        expected = {}
+        for session in sessions:
+            day = timezone.localdate(session.created_at)
+            for key in (('day', day), ('week', week_start(day))):
+                count, mood, stress = expected.get(key, (0, [], []))
+                expected[key] = (count + 1, mood + [session.mood_rating], stress + [session.stress_level])
+        expected = {
+            key: (count, sum(mood), min(mood), max(mood), sum(stress), min(stress), max(stress))
+            for key, (count, mood, stress) in expected.items()
+        }
+        self.assertEqual(rebuild_rollups(batch_size=7), len(expected))
+        self.assertEqual(self.rollups(), expected)
+
+
+class MoodTrendEngineTests(TestCase):
+    def test_window_statistics(self):
+        ages = np.arange(9, -1, -1)
+        rising = np.arange(10, dtype=float)
+        values = np.vstack([rising, rising, np.full(10, np.nan)])
+        values[1, ::2] = np.nan
+        counts = np.where(np.isnan(values), 0, 1)
+        stats = window_stats(values, counts, ages, 7)
+        # Slope of one point per day, with or without gaps; nothing for an empty row
+        np.testing.assert_allclose(stats['slope'][:2], [1.0, 1.0])
+        self.assertTrue(np.isnan(stats['slope'][2]))
+        np.testing.assert_array_equal(stats['days'], [7, 4, 0])
+        np.testing.assert_allclose(stats['mean'][0], rising[3:].mean())
+        np.testing.assert_allclose(stats['volatility'][0], rising[3:].std(ddof=1))
+        # The EWMA leans towards the latest days
+        self.assertGreater(stats['ewma'][0], stats['mean'][0])
+        self.assertLess(stats['ewma'][0], rising[-1])
+
+    def test_change_points_are_dated_and_flat_rows_are_not_flagged(self):
+        rng = np.random.default_rng(3)
+        ages = np.arange(29, -1, -1)
+        flat = 5 + rng.integers(-1, 2, size=30)
+        step = np.where(ages < 12, 8, 4) + rng.integers(-1, 2, size=30)
+        stats = window_stats(np.vstack([flat, step]).astype(float), np.ones((2, 30), dtype=int), ages, 30)
+        np.testing.assert_array_equal(stats['change_point'], [False, True])
+        self.assertEqual(stats['change_age'][1], 11)
+        self.assertGreater(stats['change_shift'][1], 3)
+
+    def test_track_mood_trends_keeps_its_summary(self):
+        today = timezone.localdate()
+        points = [
+            {'date': today - timezone.timedelta(days=6 - i), 'mood_rating': mood, 'stress_level': 5}
+            for i, mood in enumerate([2, 3, 3, 5, 6, 7, 8])
+        ]
+        trends = chatbot.track_mood_trends(points, 7, today)
+        self.assertEqual(trends['trend'], 'improving')
+        self.assertEqual(trends['sessions_count'], 7)
+        self.assertEqual(trends['recent_mood'], 8)
+        self.assertAlmostEqual(trends['average_mood'], 34 / 7, places=3)
+        self.assertGreater(trends['mood_slope'], 0.9)
+        # Nothing inside the window
+        stale = chatbot.track_mood_trends(points, 7, today + timezone.timedelta(days=30))
+        self.assertEqual(stale, {'trend': 'stable', 'average_mood': 5, 'sessions_count': 0})
+
+    def test_batch_matches_per_user_reports(self):
+        rng = random.Random(5)
+        today = timezone.localdate()
+        users = [
+            User.objects.create_user(username=f'trend{i}', email=f'trend{i}@example.com', password='testpass123')
+            for i in range(5)
+        ]
+        rollups = []
+        for user in users[:4]:
+            for age in rng.sample(range(120), 50):
+                mood, stress = rng.randint(1, 10), rng.randint(1, 10)
+                rollups.append(MoodRollup(
+                    user=user, period='day', period_start=today - timezone.timedelta(days=age), session_count=1,
+                    mood_sum=mood, mood_min=mood, mood_max=mood, stress_sum=stress, stress_min=stress, stress_max=stress,
+                ))
+        MoodRollup.objects.bulk_create(rollups)
+
+        reports = dict(iter_user_trends(batch_size=3, today=today))
+        self.assertEqual(sorted(reports), [user.pk for user in users[:4]])
+        for user in users[:4]:
+            points = [
+                {'date': r.period_start, 'mood_rating': r.avg_mood, 'stress_level': r.avg_stress, 'session_count': 1}
+                for r in MoodRollup.objects.filter(user=user, period='day').order_by('period_start')
+            ]
+            self.assertEqual(reports[user.pk], point_trends(points, WINDOWS, today))
+            self.assertEqual(reports[user.pk][90]['days'], len([p for p in points if (today - p['date']).days < 90]))
+
+        out, err = StringIO(), StringIO()
+        call_command('compute_mood_trends', '--user', str(users[0].pk), stdout=out, stderr=err)
+        line = json.loads(out.getvalue())
+        self.assertEqual(line['user_id'], users[0].pk)
+        self.assertEqual(set(line['windows']), {'7', '30', '90'})
+        self.assertIn('Computed trends for 1 user(s).', err.getvalue())
+
+
+class ChatbotRuleStatsViewTests(TestCase):
+    def test_staff_only(self):
+        User.objects.create_user(username='plain', email='plain@example.com', password='testpass123')
+        User.objects.create_user(username='ops', email='ops@example.com', password='testpass123', is_staff=True)
+        self.client.login(username='plain', password='testpass123')
+        self.assertEqual(self.client.get(reverse('ai_support:rule_stats')).status_code, 403)
+        self.client.login(username='ops', password='testpass123')
+        response = self.client.get(reverse('ai_support:rule_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('crisis', response.json()['rules'])
+
+
 class MoodAnalyticsTests(TestCase):
     def setUp(self):
         self.client = Client()
@@ -240,6 +1185,38 @@ class MoodAnalyticsTests(TestCase):
         self.assertContains(response, '2.5')  # Average stress
         self.assertContains(response, '2')    # Total sessions
 
+    def test_mood_analytics_reads_rollups(self):
+        """Statistics cover every session; the chart only the latest days"""
+        self.client.login(username='testuser', password='testpass123')
+        MentalHealthSession.objects.bulk_create([
+            MentalHealthSession(
+                user=self.user, session_type='daily_checkin', mood_rating=1 + i % 10, stress_level=5, ai_response=''
+            )
+            for i in range(MOOD_CHART_DAYS + 30)
+        ])
+        # One session a day, the last one today
+        base = timezone.now() - timezone.timedelta(days=MOOD_CHART_DAYS + 29)
+        for i, pk in enumerate(MentalHealthSession.objects.order_by('id').values_list('pk', flat=True)):
+            MentalHealthSession.objects.filter(pk=pk).update(created_at=base + timezone.timedelta(days=i))
+        # bulk_create and update() skip the rollup signals
+        rebuild_rollups()
+
+        # Session and user lookups, the weekly totals, the daily series and the recent sessions
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('ai_support:mood_analytics'))
+        context = response.context
+        self.assertEqual(context['total_sessions'], MOOD_CHART_DAYS + 30)
+        self.assertEqual(context['avg_mood'], 5.5)
+        self.assertEqual(len(context['mood_data']), MOOD_CHART_DAYS)
+        self.assertEqual(context['mood_data'][-1], 1 + (MOOD_CHART_DAYS + 29) % 10)
+        self.assertEqual(context['dates'], sorted(context['dates']))
+        recent = list(context['sessions'])
+        self.assertEqual(len(recent), 10)
+        self.assertGreater(recent[0]['created_at'], recent[-1]['created_at'])
+        self.assertEqual(context['mood_trends']['sessions_count'], 7)
+        self.assertEqual([window['days'] for window in context['trend_windows']], list(WINDOWS))
+        self.assertEqual(context['trend_windows'][-1]['sessions'], MOOD_CHART_DAYS)
+
 
 class MentalHealthModelsTests(TestCase):
     def setUp(self):
@@ -287,3 +1264,793 @@ class MentalHealthModelsTests(TestCase):
         self.assertEqual(message.content, 'Hello, I need help')
         self.assertEqual(message.role, 'user')
         self.assertEqual(str(message), f"{self.user.email} - user ({message.created_at})")
+
+
+class MatchingEngineTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='matchuser',
+            email='match@example.com',
+            password='testpass123'
+        )
+        self.mentee = Mentee.objects.create(
+            user=self.user,
+            business_stage='startup',
+            industry='Technology',
+            main_challenges='Digital marketing, funding',
+            mentorship_goals='Brand development',
+        )
+        focus_areas = [
+            'Digital Marketing, Business Strategy',
+            'Financial Planning, Funding',
+            'Brand Development, Market Entry',
+            'Operations',
+        ]
+        for i, focus in enumerate(focus_areas):
+            Mentor.objects.create(
+                name=f'Mentor {i}', expertise='Biz', years_experience=5, short_bio='bio',
+                key_focus_areas=focus, industry='Technology' if i % 2 else 'Finance',
+                business_stage_expertise='startup' if i < 2 else 'growth',
+                availability_status='available' if i != 1 else 'busy',
+                average_rating=4.0 + i * 0.3, email=f'mentor{i}@example.com',
+                is_verified=True, is_active=True,
+            )
+
+    def test_pool_matches_score_match(self):
+        """Vectorized scores agree with score_match for every mentor"""
+        pool = MentorPool(Mentor.objects.filter(is_active=True, is_verified=True))
+        scores, components = pool.score(self.mentee)
+        for row, mentor in enumerate(pool.mentors):
+            expected, reasoning, expected_components = score_match(self.mentee, mentor)
+            self.assertEqual(int(scores[row]), expected)
+            self.assertEqual(format_reasoning(components, row), reasoning)
+            for key, value in expected_components.items():
+                self.assertEqual(int(components[key][row]), value)
+
+    def test_top_matches_order(self):
+        """top_matches returns the same ranking as a sorted score_match loop"""
+        mentors = Mentor.objects.filter(is_active=True, is_verified=True)
+        expected = sorted(
+            ((m, score_match(self.mentee, m)[0]) for m in mentors),
+            key=lambda x: x[1], reverse=True,
+        )[:3]
+        results = top_matches(self.mentee)
+        self.assertEqual([(m.pk, s) for m, s, _ in results], [(m.pk, s) for m, s in expected])
+
+    def test_pool_refreshes_after_mentor_change(self):
+        """The cached pool is rebuilt when a mentor is saved"""
+        first = get_mentor_pool()
+        self.assertIs(get_mentor_pool(), first)
+        mentor = Mentor.objects.first()
+        mentor.is_active = False
+        mentor.save()
+        second = get_mentor_pool()
+        self.assertIsNot(second, first)
+        self.assertNotIn(mentor.pk, second.ids)
+
+
+class FocusIndexTests(TestCase):
+    def setUp(self):
+        self.mentor = Mentor.objects.create(
+            name='Index Mentor', expertise='Biz', years_experience=5, short_bio='bio',
+            key_focus_areas='Digital Marketing, Funding', industry='Tech',
+            business_stage_expertise='growth', email='index@example.com',
+            is_verified=True, is_active=True,
+        )
+
+    def test_tokens_follow_mentor_saves(self):
+        """Saving a mentor adds new tokens and drops stale ones"""
+        tokens = set(MentorFocusToken.objects.filter(mentor=self.mentor).values_list('token', flat=True))
+        self.assertEqual(tokens, {'digital', 'market', 'digital market', 'fund'})
+
+        self.mentor.key_focus_areas = 'Funding, Export Markets'
+        self.mentor.save()
+        tokens = set(MentorFocusToken.objects.filter(mentor=self.mentor).values_list('token', flat=True))
+        self.assertEqual(tokens, {'fund', 'export', 'market', 'export market'})
+
+    def test_lookup_matches_stemmed_phrases(self):
+        """Phrases are looked up exactly, in their stemmed form, as runs of focus words"""
+        index = FocusIndex.load()
+        self.assertEqual(index.lookup('market'), {self.mentor.pk})
+        self.assertEqual(index.lookup('digital market'), {self.mentor.pk})
+        self.assertEqual(index.mentor_ids_for(['hire', 'fund']), {self.mentor.pk})
+        self.assertEqual(index.lookup('marketing'), set())
+        self.assertEqual(index.lookup('market fund'), set())
+
+    def test_rebuild_index(self):
+        MentorFocusToken.objects.all().delete()
+        self.assertEqual(rebuild_index(), 4)
+
+
+class ProfileTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='tokenuser', email='token@example.com', password='testpass123'
+        )
+        self.mentee = Mentee.objects.create(
+            user=self.user, business_stage='growth', industry='Tech',
+            main_challenges='Marketing our products, financing', mentorship_goals='Hiring the first employees',
+        )
+        self.mentor = Mentor.objects.create(
+            name='Token Mentor', expertise='Biz', years_experience=5, short_bio='bio',
+            key_focus_areas='Digital Marketing, Hiring', industry='Tech',
+            business_stage_expertise='growth', email='token@example.com',
+            is_verified=True, is_active=True,
+        )
+
+    def test_tokens_are_stored_on_save(self):
+        self.assertEqual(self.mentee.challenge_tokens, ['finance', 'market product'])
+        self.assertEqual(self.mentee.goal_tokens, ['hire first employee'])
+        self.assertEqual(self.mentor.focus_area_tokens, ['digital market', 'hire'])
+
+        self.mentee.main_challenges = 'funding'
+        self.mentee.save(update_fields=['main_challenges'])
+        self.mentee.refresh_from_db()
+        self.assertEqual(self.mentee.challenge_tokens, ['fund'])
+
+    def test_score_match_uses_tokens(self):
+        self.mentee.main_challenges = 'Marketing, financing'
+        self.mentee.mentorship_goals = 'hiring'
+        self.mentee.save()
+        _, _, components = score_match(self.mentee, self.mentor)
+        self.assertEqual(components['challenge'], 100)
+        self.assertEqual(components['goals'], 100)
+
+    def test_one_shared_word_is_not_a_match(self):
+        """A mentee phrase must occur whole inside a focus phrase, as with the old substring check"""
+        self.mentor.key_focus_areas = 'Business Development, Marketing'
+        self.mentor.save()
+        self.mentee.main_challenges = 'business growth strategy'
+        self.mentee.mentorship_goals = 'digital marketing'
+        self.mentee.save()
+        _, _, components = score_match(self.mentee, self.mentor)
+        self.assertEqual((components['challenge'], components['goals']), (0, 0))
+        pool = get_mentor_pool()
+        _, pooled = pool.score(self.mentee)
+        row = list(pool.ids).index(self.mentor.pk)
+        self.assertEqual((pooled['challenge'][row], pooled['goals'][row]), (0, 0))
+
+    def test_backfill_command(self):
+        Mentor.objects.update(focus_area_tokens=[])
+        Mentee.objects.update(challenge_tokens=[], goal_tokens=[])
+        out = StringIO()
+        call_command('backfill_profile_tokens', stdout=out)
+        self.assertIn('1 mentor(s) and 1 mentee(s)', out.getvalue())
+        self.mentor.refresh_from_db()
+        self.assertEqual(self.mentor.focus_area_tokens, ['digital market', 'hire'])
+        self.assertTrue(MentorFocusToken.objects.filter(mentor=self.mentor, token='digital market').exists())
+
+
+class MatchMaterializationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='matuser',
+            email='mat@example.com',
+            password='testpass123'
+        )
+        self.mentee = Mentee.objects.create(
+            user=self.user,
+            business_stage='growth',
+            industry='Tech',
+            main_challenges='funding',
+            mentorship_goals='export',
+        )
+        self.mentors = [
+            Mentor.objects.create(
+                name=f'Mat Mentor {i}', expertise='Biz', years_experience=5, short_bio='bio',
+                key_focus_areas=focus, industry='Tech', business_stage_expertise='growth',
+                email=f'mat{i}@example.com', is_verified=True, is_active=True,
+            )
+            for i, focus in enumerate(['Funding', 'Export Markets', 'Hiring'])
+        ]
+
+    def test_ranked_matches_agree_with_top_matches(self):
+        live = [(m.pk, s, r) for m, s, r in top_matches(self.mentee, limit=3)]
+        # Not materialized yet: ranked in memory, nothing written
+        self.assertEqual([(m.pk, s, r) for m, s, r in ranked_matches(self.mentee, limit=3)], live)
+        self.assertFalse(AIMatchingScore.objects.exists())
+        self.assertTrue(MatchRefreshQueue.objects.filter(kind='mentee', object_id=self.mentee.pk).exists())
+
+        process_queue()
+        self.assertEqual(AIMatchingScore.objects.filter(mentee=self.mentee).count(), 3)
+        self.assertFalse(MatchRefreshQueue.objects.filter(kind='mentee').exists())
+        self.assertEqual([(m.pk, s, r) for m, s, r in ranked_matches(self.mentee, limit=3)], live)
+
+    def test_unmaterialized_mentee_is_queued_again(self):
+        MatchRefreshQueue.objects.all().delete()
+        ranked_matches(self.mentee)
+        self.assertTrue(MatchRefreshQueue.objects.filter(kind='mentee', object_id=self.mentee.pk).exists())
+
+    def test_page_serves_stale_rows_until_the_queue_runs(self):
+        process_queue()
+        hiring = self.mentors[2]
+        hiring.key_focus_areas = 'Funding, Export'
+        hiring.save()
+        self.assertTrue(MatchRefreshQueue.objects.filter(kind='mentor', object_id=hiring.pk).exists())
+
+        with self.assertNumQueries(1):
+            top_mentor, _, _ = ranked_matches(self.mentee, limit=1)[0]
+        self.assertNotEqual(top_mentor.pk, hiring.pk)
+
+        process_queue()
+        self.assertFalse(MatchRefreshQueue.objects.exists())
+        top_mentor, score, _ = ranked_matches(self.mentee, limit=1)[0]
+        self.assertEqual(top_mentor.pk, hiring.pk)
+        self.assertEqual(score, score_match(self.mentee, hiring)[0])
+
+    def test_enqueue_without_conflict_target(self):
+        """MySQL upserts on the unique key itself and rejects unique_fields"""
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False), \
+                mock.patch.object(MatchRefreshQueue.objects, 'bulk_create') as bulk_create:
+            enqueue('mentee', [self.mentee.pk])
+        self.assertIsNone(bulk_create.call_args.kwargs['unique_fields'])
+
+    def test_deactivated_mentor_rows_removed(self):
+        process_queue()
+        mentor = self.mentors[0]
+        mentor.is_active = False
+        mentor.save()
+        process_queue()
+        self.assertFalse(AIMatchingScore.objects.filter(mentor=mentor).exists())
+
+    def test_matching_view_reads_ranked_rows(self):
+        process_queue()
+        self.client.login(username='matuser', password='testpass123')
+        response = self.client.get(reverse('ai_support:matching'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['results']), 3)
+
+
+class MatchCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cacheuser',
+            email='cache@example.com',
+            password='testpass123'
+        )
+        self.mentee = Mentee.objects.create(
+            user=self.user,
+            business_stage='growth',
+            industry='Tech',
+            main_challenges='funding',
+            mentorship_goals='export',
+        )
+        self.mentors = [
+            Mentor.objects.create(
+                name=f'Cache Mentor {i}', expertise='Biz', years_experience=5, short_bio='bio',
+                key_focus_areas=focus, industry='Tech', business_stage_expertise='growth',
+                email=f'cache{i}@example.com', is_verified=True, is_active=True,
+            )
+            for i, focus in enumerate(['Funding', 'Hiring'])
+        ]
+
+    def test_repeat_call_is_served_from_cache(self):
+        first = cached_matches(self.mentee)
+        with assertNumDataQueries(self, 0):
+            second = cached_matches(self.mentee)
+        self.assertEqual([(m.pk, s) for m, s, _ in second], [(m.pk, s) for m, s, _ in first])
+
+    def test_bump_is_seen_by_another_cache_client(self):
+        # A second client of the same cache, as another worker process would hold
+        other = caches.create_connection('default')
+        cached_matches(self.mentee)
+        before = other.get(POOL_VERSION_KEY)
+        self.assertIsNotNone(before)
+        bump_pool_version()
+        self.assertNotEqual(other.get(POOL_VERSION_KEY), before)
+        self.assertEqual(other.get(POOL_VERSION_KEY), cache.get(POOL_VERSION_KEY))
+
+    @override_settings(CACHES=LOCAL_MEMORY_CACHES)
+    def test_local_memory_cache_is_not_used(self):
+        cached_matches(self.mentee)
+        self.assertIsNone(cache.get(POOL_VERSION_KEY))
+        hiring = self.mentors[1]
+        hiring.key_focus_areas = 'Funding, Export'
+        hiring.save()
+        self.assertEqual(cached_matches(self.mentee)[0][0].pk, hiring.pk)
+        self.assertEqual([warning.id for warning in check_shared_caches(None)], ['ai_support.W001'] * 2)
+
+    def test_mentor_save_invalidates(self):
+        self.assertEqual(cached_matches(self.mentee)[0][0].pk, self.mentors[0].pk)
+        hiring = self.mentors[1]
+        hiring.key_focus_areas = 'Funding, Export'
+        hiring.save()
+        self.assertEqual(cached_matches(self.mentee)[0][0].pk, hiring.pk)
+
+    def test_mentee_save_invalidates(self):
+        self.assertEqual(cached_matches(self.mentee)[0][0].pk, self.mentors[0].pk)
+        self.mentee.main_challenges = 'hiring'
+        self.mentee.save()
+        self.assertEqual(cached_matches(self.mentee)[0][0].pk, self.mentors[1].pk)
+
+    def test_processed_queue_invalidates(self):
+        process_queue()
+        self.assertEqual(cached_matches(self.mentee)[0][0].pk, self.mentors[0].pk)
+        hiring = self.mentors[1]
+        hiring.key_focus_areas = 'Funding, Export'
+        hiring.save()
+        # Stale rows until the queue runs, then the refreshed ones
+        self.assertEqual(cached_matches(self.mentee)[0][0].pk, self.mentors[0].pk)
+        process_queue()
+        self.assertEqual(cached_matches(self.mentee)[0][0].pk, hiring.pk)
+
+    def test_evicted_versions_do_not_serve_stale_results(self):
+        cached_matches(self.mentee)
+        self.mentors[0].delete()
+        cache.delete(POOL_VERSION_KEY)
+        self.assertEqual([m.pk for m, _, _ in cached_matches(self.mentee)], [self.mentors[1].pk])
+
+
+class BulkMatchingAPITests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            username='staff', email='staff@example.com', password='testpass123', is_staff=True
+        )
+        self.mentees = []
+        for i in range(5):
+            user = User.objects.create_user(
+                username=f'cohort{i}', email=f'cohort{i}@example.com', password='testpass123'
+            )
+            self.mentees.append(Mentee.objects.create(
+                user=user, business_stage='growth', industry='Tech' if i % 2 else 'Retail',
+                main_challenges='funding', mentorship_goals='export',
+            ))
+        for i, focus in enumerate(['Funding', 'Export Markets', 'Hiring']):
+            Mentor.objects.create(
+                name=f'Bulk Mentor {i}', expertise='Biz', years_experience=5, short_bio='bio',
+                key_focus_areas=focus, industry='Tech', business_stage_expertise='growth',
+                email=f'bulk{i}@example.com', is_verified=True, is_active=True,
+            )
+        self.url = reverse('ai_support:bulk_matching')
+
+    def post(self, payload):
+        return self.client.post(self.url, data=json.dumps(payload), content_type='application/json')
+
+    def lines(self, response):
+        body = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_streams_ndjson_for_ids(self):
+        self.client.login(username='staff', password='testpass123')
+        ids = [self.mentees[0].pk, 999999, self.mentees[1].pk, 888888]
+        response = self.post({'mentee_ids': ids, 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = self.lines(response)
+        # Unknown ids are reported where they were requested
+        self.assertEqual([line['mentee_id'] for line in lines], ids)
+        expected = [(m.pk, s) for m, s, _ in top_matches(self.mentees[0], limit=2)]
+        self.assertEqual([(m['mentor_id'], m['score']) for m in lines[0]['matches']], expected)
+        self.assertEqual([line.get('error') for line in lines], [None, 'Mentee not found', None, 'Mentee not found'])
+
+    def test_filter_and_shared_pool(self):
+        self.client.login(username='staff', password='testpass123')
+        get_mentor_pool()
+        response = self.post({'filter': {'industry': 'Tech'}})
+        with self.assertNumQueries(2):
+            # One pool fingerprint check and one mentee batch, however large the cohort
+            lines = self.lines(response)
+        self.assertEqual([line['mentee_id'] for line in lines], [m.pk for m in self.mentees if m.industry == 'Tech'])
+
+    def test_rejects_non_staff_and_bad_input(self):
+        self.client.login(username='cohort0', password='testpass123')
+        self.assertEqual(self.post({'mentee_ids': [1]}).status_code, 403)
+        self.client.login(username='staff', password='testpass123')
+        self.assertEqual(self.post({}).status_code, 400)
+        self.assertEqual(self.post({'mentee_ids': ['x']}).status_code, 400)
+        # Rejected up front rather than failing inside the stream
+        response = self.post({'filter': {'is_active': 'maybe'}})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'filter is_active must be a boolean')
+        self.assertEqual(self.post({'filter': {'industry': True}}).status_code, 400)
+        self.assertEqual(self.post({'mentee_ids': [1], 'limit': True}).status_code, 400)
+        self.assertEqual(self.post({'filter': {'user__password': 'x'}}).status_code, 400)
+        self.assertEqual(self.post({'mentee_ids': [1], 'limit': 500}).status_code, 400)
+
+
+class MentorAssignmentTests(TestCase):
+    def setUp(self):
+        self.mentees = []
+        for i in range(3):
+            user = User.objects.create_user(
+                username=f'assign{i}', email=f'assign{i}@example.com', password='testpass123'
+            )
+            self.mentees.append(Mentee.objects.create(
+                user=user, business_stage='growth', industry='Tech',
+                main_challenges='funding', mentorship_goals='export',
+            ))
+        self.star = Mentor.objects.create(
+            name='Star', expertise='Biz', years_experience=5, short_bio='bio',
+            key_focus_areas='Funding, Export', industry='Tech', business_stage_expertise='growth',
+            email='star@example.com', is_verified=True, is_active=True, max_mentees=1, average_rating=5.0,
+        )
+        self.others = [
+            Mentor.objects.create(
+                name=f'Other {i}', expertise='Biz', years_experience=5, short_bio='bio',
+                key_focus_areas='Funding', industry='Tech', business_stage_expertise='growth',
+                email=f'other{i}@example.com', is_verified=True, is_active=True, max_mentees=1,
+            )
+            for i in range(2)
+        ]
+
+    def test_solver_is_optimal_on_small_problems(self):
+        rng = np.random.default_rng(1)
+        for _ in range(40):
+            n, m = rng.integers(1, 5), rng.integers(1, 4)
+            scores = rng.integers(0, 101, (n, m)).astype(float)
+            capacity = rng.integers(0, 3, m)
+            rows = np.tile(np.arange(m), (n, 1))
+            assigned = solve_assignment(rows, scores, capacity)
+            for j in range(m):
+                self.assertLessEqual((assigned == j).sum(), capacity[j])
+            best = 0
+            for choice in itertools.product(range(-1, m), repeat=n):
+                if all(choice.count(j) <= capacity[j] for j in range(m)):
+                    best = max(best, sum(scores[i, c] for i, c in enumerate(choice) if c >= 0))
+            self.assertEqual(sum(scores[i, c] for i, c in enumerate(assigned) if c >= 0), best)
+
+    def test_popular_mentor_is_not_swamped(self):
+        pairs = assign_mentees()
+        self.assertEqual(len(pairs), 3)
+        self.assertEqual(sorted(mentor.pk for _, mentor, _ in pairs), sorted([self.star.pk] + [m.pk for m in self.others]))
+
+    def test_open_requests_use_up_capacity(self):
+        ConnectionRequest.objects.create(mentee=self.mentees[0], mentor=self.star, status='accepted')
+        pairs = assign_mentees()
+        self.assertEqual({mentee.pk for mentee, _, _ in pairs}, {self.mentees[1].pk, self.mentees[2].pk})
+        self.assertNotIn(self.star.pk, [mentor.pk for _, mentor, _ in pairs])
+
+    def test_command_creates_requests(self):
+        out = StringIO()
+        call_command('assign_mentors', create_requests=True, stdout=out)
+        self.assertIn('Assigned 3 mentee(s)', out.getvalue())
+        self.assertEqual(ConnectionRequest.objects.filter(status='pending').count(), 3)
+
+    def test_command_counts_only_inserted_requests(self):
+        # A rejected request leaves the mentee unmatched but its pair taken
+        for mentor in [self.star, *self.others]:
+            ConnectionRequest.objects.create(mentee=self.mentees[0], mentor=mentor, status='rejected')
+        out = StringIO()
+        call_command('assign_mentors', create_requests=True, stdout=out)
+        self.assertIn('Assigned 3 mentee(s)', out.getvalue())
+        self.assertIn('Created 2 connection request(s); 1 pair(s) already had one.', out.getvalue())
+        self.assertEqual(ConnectionRequest.objects.filter(status='pending').count(), 2)
+
+    def test_capacity_counts_only_matchable_mentors(self):
+        pool = get_mentor_pool()
+        ConnectionRequest.objects.create(mentee=self.mentees[0], mentor=self.others[0], status='pending')
+        Mentor.objects.filter(pk=self.others[1].pk).update(is_active=False)
+        capacity = dict(zip(pool.ids.tolist(), remaining_capacity(pool).tolist()))
+        self.assertEqual(capacity, {self.star.pk: 1, self.others[0].pk: 0, self.others[1].pk: 0})
+
+
+class RematchAllCommandTests(TestCase):
+    def setUp(self):
+        self.mentees = []
+        for i in range(5):
+            user = User.objects.create_user(username=f'rematch{i}', email=f'rematch{i}@example.com', password='testpass123')
+            self.mentees.append(Mentee.objects.create(
+                user=user, business_stage='startup', industry='Tech',
+                main_challenges='funding', mentorship_goals='hiring',
+            ))
+        for i in range(3):
+            Mentor.objects.create(
+                name=f'Rematch Mentor {i}', expertise='Biz', years_experience=5, short_bio='bio',
+                key_focus_areas='Funding' if i else 'Hiring', industry='Tech',
+                business_stage_expertise='startup', email=f'rematch-mentor{i}@example.com',
+                is_verified=True, is_active=True,
+            )
+        self.tmpdir = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.tmpdir, 'rematch.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_rematch_all_scores_everyone(self):
+        out = StringIO()
+        call_command('rematch_all', workers=1, chunk_size=2, checkpoint=self.checkpoint, stdout=out)
+        self.assertEqual(AIMatchingScore.objects.count(), 15)
+        self.assertFalse(MatchRefreshQueue.objects.exists())
+        self.assertFalse(os.path.exists(self.checkpoint))
+        self.assertIn('rows/s', out.getvalue())
+
+    def test_rematch_all_drops_cached_match_lists(self):
+        cached_matches(self.mentees[0])
+        version = cache.get(POOL_VERSION_KEY)
+        self.assertIsNotNone(version)
+        call_command('rematch_all', workers=1, checkpoint=self.checkpoint, stdout=StringIO())
+        self.assertNotEqual(cache.get(POOL_VERSION_KEY), version)
+
+    def test_resume_skips_finished_chunks(self):
+        mentee_ids = sorted(m.pk for m in self.mentees)
+        with open(self.checkpoint, 'w') as fh:
+            json.dump({
+                'started': timezone.now().isoformat(),
+                'since': None,
+                'tasks': [{'mentees': mentee_ids[:2], 'mentors': None}, {'mentees': mentee_ids[2:], 'mentors': None}],
+            }, fh)
+        with open(f'{self.checkpoint}.done', 'w') as fh:
+            fh.write('0\n')
+        call_command('rematch_all', workers=1, resume=True, checkpoint=self.checkpoint, stdout=StringIO())
+        self.assertEqual(AIMatchingScore.objects.count(), 9)
+        self.assertFalse(AIMatchingScore.objects.filter(mentee_id__in=mentee_ids[:2]).exists())
+
+    def test_since_limits_to_changed_profiles(self):
+        call_command('rematch_all', workers=1, checkpoint=self.checkpoint, stdout=StringIO())
+        AIMatchingScore.objects.update(overall_score=0)
+        later = timezone.now()
+        self.mentees[0].save()
+        call_command('rematch_all', workers=1, since=later.isoformat(), checkpoint=self.checkpoint, stdout=StringIO())
+        self.assertEqual(AIMatchingScore.objects.filter(overall_score__gt=0).count(), 3)
+
+
+class ClassifyChatMessagesCommandTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='labels', email='labels@example.com', password='testpass123')
+        session = MentalHealthSession.objects.create(user=user, mood_rating=5, stress_level=5)
+        contents = ['I am worried about cash flow', 'Feeling lonely and isolated', 'just checking in'] * 3
+        self.messages = [ChatMessage.objects.create(session=session, content=text, role='user') for text in contents]
+        self.reply = ChatMessage.objects.create(session=session, content='I am so happy to help', role='assistant')
+        self.tmpdir = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.tmpdir, 'classify.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def assert_labeled(self, messages):
+        expected = MentalHealthChatbot().classify_batch(m.content for m in messages)
+        for message, signals in zip(messages, expected):
+            message.refresh_from_db()
+            self.assertEqual((message.mood, message.challenges), (signals.mood, signals.challenges))
+
+    def test_labels_user_messages(self):
+        out = StringIO()
+        call_command('classify_chat_messages', workers=1, chunk_size=4, checkpoint=self.checkpoint, stdout=out)
+        self.assert_labeled(self.messages)
+        self.assertEqual(self.messages[0].mood, 'anxious')
+        self.assertEqual(self.messages[1].challenges, ['loneliness'])
+        self.reply.refresh_from_db()
+        self.assertIsNone(self.reply.mood)
+        self.assertFalse(os.path.exists(self.checkpoint))
+        self.assertIn('msg/s', out.getvalue())
+
+    def test_worker_pool_matches_in_process(self):
+        call_command('classify_chat_messages', workers=2, chunk_size=2, checkpoint=self.checkpoint, stdout=StringIO())
+        self.assert_labeled(self.messages)
+
+    def test_resume_starts_after_checkpoint(self):
+        with open(self.checkpoint, 'w') as fh:
+            json.dump({'started': timezone.now().isoformat(), 'relabel': False,
+                       'last_id': self.messages[3].pk, 'labeled': 4}, fh)
+        call_command('classify_chat_messages', workers=1, resume=True, checkpoint=self.checkpoint, stdout=StringIO())
+        self.assertEqual(ChatMessage.objects.filter(mood__isnull=False).count(), 5)
+        self.assert_labeled(self.messages[4:])
+
+    def test_skips_labeled_messages_unless_relabel(self):
+        ChatMessage.objects.filter(pk=self.messages[0].pk).update(mood='happy')
+        call_command('classify_chat_messages', workers=1, checkpoint=self.checkpoint, stdout=StringIO())
+        self.messages[0].refresh_from_db()
+        self.assertEqual(self.messages[0].mood, 'happy')
+        call_command('classify_chat_messages', workers=1, relabel=True, checkpoint=self.checkpoint, stdout=StringIO())
+        self.assert_labeled(self.messages)
+
+
+class BenchmarkMatchingCommandTests(TestCase):
+    def test_benchmark_writes_results_and_rolls_back(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        output = os.path.join(tmpdir, 'bench.json')
+        call_command('benchmark_matching', sizes=[30], calls=5, mentees=3, output=output,
+                     current_database=True, stdout=StringIO())
+        with open(output) as fh:
+            results = json.load(fh)
+        row = results['sizes']['30']
+        for key in ('p50_ms', 'p99_ms', 'queries_per_call', 'peak_kib_per_call', 'ranked_p50_ms', 'materialize_ms'):
+            self.assertIn(key, row)
+        self.assertFalse(Mentor.objects.exists())
+        self.assertFalse(Mentee.objects.exists())
+
+        out = StringIO()
+        call_command('benchmark_matching', sizes=[30], calls=5, mentees=3, compare=output,
+                     current_database=True, stdout=out)
+        self.assertIn('p50_ms', out.getvalue())
+
+    def test_populate_leaves_existing_index_alone(self):
+        mentor = Mentor.objects.create(
+            name='Real Mentor', expertise='Biz', years_experience=5, short_bio='bio',
+            key_focus_areas='Pricing', industry='Tech', business_stage_expertise='growth',
+            email='real@example.com', is_verified=True, is_active=True,
+        )
+        populate(random.Random(1), 20, 2)
+        self.assertTrue(MentorFocusToken.objects.filter(mentor=mentor, token='price').exists())
+
+    def test_populate_returns_saved_rows_without_returned_ids(self):
+        # As on MySQL, whose bulk inserts do not return primary keys
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            mentees = populate(random.Random(2), 20, 3)
+        self.assertEqual(len(mentees), 3)
+        self.assertTrue(all(mentee.pk for mentee in mentees))
+        self.assertEqual(Mentee.objects.filter(pk__in=[mentee.pk for mentee in mentees]).count(), 3)
+        self.assertEqual(MentorFocusToken.objects.values('mentor').distinct().count(), 20)
+
+    def test_memory_pool_skips_database(self):
+        with self.assertNumQueries(0):
+            pool, mentees = memory_pool(random.Random(1), 50, 3)
+            results = pool.top(mentees[0], 5)
+        self.assertEqual(pool.size, 50)
+        self.assertEqual(len(results), 5)
+
+
+class MentorLSHTests(TestCase):
+    def setUp(self):
+        self.mentees = populate(random.Random(3), 400, 5)
+        self.pool = MentorPool(Mentor.objects.filter(is_active=True, is_verified=True))
+
+    def test_candidates_are_unique_pool_rows(self):
+        """LSH returns up to the requested number of distinct pool rows"""
+        lsh = MentorLSH(self.pool, tables=4, bits=8, candidates=50)
+        rows = lsh.candidates_for(self.mentees[0])
+        self.assertLessEqual(len(rows), 50)
+        self.assertGreater(len(rows), 0)
+        self.assertEqual(len(set(rows.tolist())), len(rows))
+        self.assertTrue(((rows >= 0) & (rows < self.pool.size)).all())
+
+    def test_candidate_top_reranks_exactly(self):
+        """Candidate results carry the exact scores, in score order"""
+        lsh = MentorLSH(self.pool, tables=4, bits=8, candidates=50)
+        results = self.pool.top(self.mentees[0], 5, lsh.candidates_for(self.mentees[0]))
+        self.assertEqual(len(results), 5)
+        for mentor, score, _ in results:
+            self.assertEqual(score, score_match(self.mentees[0], mentor)[0])
+        self.assertEqual([s for _, s, _ in results], sorted((s for _, s, _ in results), reverse=True))
+
+    def test_top_matches_lsh_mode(self):
+        """Re-ranking half the pool still finds most of the exact top 10"""
+        options = {'tables': 16, 'bits': 6, 'candidates': 200}
+        self.assertLess(len(MentorLSH(self.pool, **options).candidates_for(self.mentees[0])), self.pool.size)
+        hits = 0
+        for mentee in self.mentees:
+            clear_mentor_pool()
+            # Ties make ids ambiguous, so a hit is any score reaching the exact 10th best
+            threshold = top_matches(mentee, 10)[-1][1]
+            with self.settings(AI_MATCHING_CANDIDATES='lsh', AI_MATCHING_LSH=options):
+                clear_mentor_pool()
+                results = top_matches(mentee, 10)
+            self.assertEqual(len(results), 10)
+            hits += sum(1 for _, score, _ in results if score >= threshold)
+        clear_mentor_pool()
+        # About 0.5 for a random half of the pool; these settings reach 0.76
+        self.assertGreaterEqual(hits / (10 * len(self.mentees)), 0.7)
+
+    def test_recall_report(self):
+        out = StringIO()
+        call_command('lsh_recall_report', sizes=[60], queries=3, k=3, tables=[4], bits=[6],
+                     candidates=[20], stdout=out)
+        self.assertIn('recall_at_k', out.getvalue())
+
+
+class TfidfIndexTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.path = os.path.join(self.tmpdir, 'tfidf.npz')
+        reset_tfidf_index()
+        self.addCleanup(reset_tfidf_index)
+        self.finance = Mentor.objects.create(
+            name='Finance Mentor', expertise='Financial Planning', years_experience=5,
+            short_bio='Helps founders raise seed funding and manage cash flow.',
+            key_focus_areas='Funding, Budget Management', industry='Finance',
+            business_stage_expertise='startup', email='tfidf-finance@example.com',
+            is_verified=True, is_active=True,
+        )
+        self.marketing = Mentor.objects.create(
+            name='Marketing Mentor', expertise='Digital Marketing', years_experience=5,
+            short_bio='Builds brands through social media campaigns.',
+            key_focus_areas='Brand Development, Social Media', industry='Tech',
+            business_stage_expertise='growth', email='tfidf-marketing@example.com',
+            is_verified=True, is_active=True,
+        )
+
+    def test_top_k_ranks_relevant_mentor_first(self):
+        with self.settings(AI_MATCHING_TFIDF_PATH=self.path):
+            index = get_tfidf_index()
+            ranked = index.top_k('struggling with cash flow and funding', k=2)
+            self.assertEqual(ranked[0][0], self.finance.pk)
+            self.assertTrue(0 < ranked[0][1] <= 1)
+            # Requests never write the file; build_tfidf_index does
+            self.assertFalse(os.path.exists(self.path))
+            call_command('build_tfidf_index', stdout=StringIO())
+            self.assertTrue(os.path.exists(self.path))
+
+    def test_query_reads_one_snapshot_while_the_index_changes(self):
+        index = TfidfIndex()
+        index.update([self.finance, self.marketing])
+        ids = [self.finance.pk, self.marketing.pk]
+        expected = index.similarity_for('cash flow funding', ids)
+        ranked = index.top_k('cash flow funding')
+        zebra = Mentor(pk=10 ** 6, key_focus_areas='Zebra Breeding', expertise='', short_bio='')
+        postings = index.postings
+
+        def refreshed_after_snapshot():
+            # A refresh landing mid-query: a new term, then a compaction renumbering the rows
+            snapshot = postings()
+            index.update([zebra])
+            index.remove([self.finance.pk])
+            return snapshot
+
+        with mock.patch.object(index, 'postings', refreshed_after_snapshot):
+            np.testing.assert_allclose(index.similarity_for('cash flow funding zebra', ids), expected)
+        index.update([self.finance])
+        index.remove([zebra.pk])
+        with mock.patch.object(index, 'postings', refreshed_after_snapshot):
+            self.assertEqual([mentor_id for mentor_id, _ in index.top_k('cash flow funding zebra')],
+                             [mentor_id for mentor_id, _ in ranked])
+
+    def test_incremental_refresh_and_reload(self):
+        with self.settings(AI_MATCHING_TFIDF_PATH=self.path, AI_MATCHING_TFIDF_REFRESH_SECONDS=0):
+            call_command('build_tfidf_index', stdout=StringIO())
+            get_tfidf_index()
+            self.marketing.key_focus_areas = 'Funding, Investor Pitching'
+            self.marketing.save()
+            self.finance.delete()
+            index = get_tfidf_index()
+            self.assertEqual(set(index.row_of), {self.marketing.pk})
+            self.assertGreater(index.similarity_for('investor pitching', [self.marketing.pk])[0], 0)
+
+            call_command('build_tfidf_index', update=True, stdout=StringIO())
+            reloaded = TfidfIndex.load(self.path)
+            self.assertEqual(reloaded.row_of, index.row_of)
+            self.assertEqual(reloaded.synced, index.synced)
+
+    def test_fingerprint_checked_once_per_interval(self):
+        user = User.objects.create_user(username='tfidfttl', email='tfidfttl@example.com', password='testpass123')
+        mentee = Mentee.objects.create(
+            user=user, business_stage='startup', industry='Finance',
+            main_challenges='cash flow and funding', mentorship_goals='build my brand',
+        )
+        with self.settings(AI_MATCHING_TFIDF_PATH=self.path, AI_MATCHING_TEXT_SIMILARITY='tfidf',
+                           AI_MATCHING_TFIDF_REFRESH_SECONDS=60):
+            get_tfidf_index()
+            with self.assertNumQueries(0):
+                for mentor in (self.finance, self.marketing):
+                    score_match(mentee, mentor)
+
+    def test_refresh_includes_saves_in_the_synced_tick(self):
+        with self.settings(AI_MATCHING_TFIDF_PATH=self.path, AI_MATCHING_TFIDF_REFRESH_SECONDS=0):
+            index = get_tfidf_index()
+            synced_at = Mentor.objects.get(pk=self.marketing.pk).updated_at
+            # A second write landing in the same tick as the synced one
+            Mentor.objects.filter(pk=self.finance.pk).update(
+                key_focus_areas='Investor Pitching', updated_at=synced_at
+            )
+            Mentor.objects.create(
+                name='Later Mentor', expertise='Ops', years_experience=2, short_bio='Runs operations.',
+                key_focus_areas='Operations', industry='Retail', business_stage_expertise='growth',
+                email='tfidf-later@example.com', is_verified=True, is_active=True,
+            )
+            get_tfidf_index()
+            self.assertGreater(index.similarity_for('investor pitching', [self.finance.pk])[0], 0)
+
+    def test_removed_rows_are_compacted(self):
+        index = TfidfIndex()
+        refresh_tfidf(index)
+        index.remove([self.finance.pk])
+        self.assertEqual(list(index.mentor_ids), [self.marketing.pk])
+        self.assertEqual(index.row_of, {self.marketing.pk: 0})
+        self.assertNotIn('cash', index.vocab)
+        self.assertEqual(index.top_k('social media brands', k=2)[0][0], self.marketing.pk)
+
+    def test_graded_components_in_tfidf_mode(self):
+        user = User.objects.create_user(username='tfidfuser', email='tfidf@example.com', password='testpass123')
+        mentee = Mentee.objects.create(
+            user=user, business_stage='startup', industry='Finance',
+            main_challenges='cash flow and funding', mentorship_goals='build my brand',
+        )
+        with self.settings(AI_MATCHING_TFIDF_PATH=self.path, AI_MATCHING_TEXT_SIMILARITY='tfidf'):
+            _, _, components = score_match(mentee, self.finance)
+            self.assertTrue(0 < components['challenge'] < 100)
+            pool = MentorPool(Mentor.objects.filter(is_active=True, is_verified=True))
+            scores, pool_components = pool.score(mentee)
+            for row, mentor in enumerate(pool.mentors):
+                self.assertEqual(int(scores[row]), score_match(mentee, mentor)[0])
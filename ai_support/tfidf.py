@@ -0,0 +1,299 @@
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.dateparse import parse_datetime
+
+from core.text import tokenize
+from mentors.models import Mentor
+
+
+# Compact the arrays once this fraction of their rows belongs to removed mentors
+COMPACT_DEAD_FRACTION = 0.25
+
+
+def mentor_document(mentor: Mentor) -> str:
+    """Text a mentor is indexed under."""
+    return ' '.join([mentor.key_focus_areas or '', mentor.expertise or '', mentor.short_bio or ''])
+
+
+class TfidfIndex:
+    """Incrementally maintained TF-IDF vectors over mentor profiles.
+
+    Term counts are kept as COO arrays (row, term, count) with per-term
+    document frequencies, so one mentor can be replaced without re-reading
+    the others. Weighted, L2-normalized postings are rebuilt lazily from
+    those arrays the first time a query needs them.
+    """
+
+    def __init__(self):
+        self.vocab: Dict[str, int] = {}
+        self.df = np.zeros(0, dtype=np.int64)
+        self.mentor_ids = np.zeros(0, dtype=np.int64)
+        self.row_of: Dict[int, int] = {}
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.cols = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.float64)
+        self.synced = (0, '')
+        self._postings = None
+        self._lock = threading.RLock()
+
+    @property
+    def size(self) -> int:
+        return len(self.row_of)
+
+    def update(self, mentors: Iterable[Mentor]) -> None:
+        """Add or replace the documents of ``mentors``."""
+        docs = [(mentor.pk, Counter(tokenize(mentor_document(mentor)))) for mentor in mentors]
+        with self._lock:
+            self._drop([mentor_id for mentor_id, _ in docs])
+            rows, cols, counts, new_ids = [], [], [], []
+            for mentor_id, terms in docs:
+                row = self.row_of.get(mentor_id)
+                if row is None:
+                    row = self.row_of[mentor_id] = len(self.mentor_ids) + len(new_ids)
+                    new_ids.append(mentor_id)
+                for term, count in terms.items():
+                    col = self.vocab.get(term)
+                    if col is None:
+                        col = self.vocab[term] = len(self.vocab)
+                    rows.append(row)
+                    cols.append(col)
+                    counts.append(count)
+            if new_ids:
+                self.mentor_ids = np.concatenate([self.mentor_ids, np.array(new_ids, dtype=np.int64)])
+            if len(self.df) < len(self.vocab):
+                self.df = np.concatenate([self.df, np.zeros(len(self.vocab) - len(self.df), dtype=np.int64)])
+            if cols:
+                cols_arr = np.array(cols, dtype=np.int64)
+                self.df += np.bincount(cols_arr, minlength=len(self.vocab))
+                self.rows = np.concatenate([self.rows, np.array(rows, dtype=np.int64)])
+                self.cols = np.concatenate([self.cols, cols_arr])
+                self.counts = np.concatenate([self.counts, np.array(counts, dtype=np.float64)])
+            self._postings = None
+
+    def remove(self, mentor_ids: Iterable[int]) -> None:
+        """Drop the documents of ``mentor_ids``."""
+        with self._lock:
+            for mentor_id in self._drop(mentor_ids):
+                self.mentor_ids[self.row_of.pop(mentor_id)] = -1
+            self._postings = None
+            if len(self.mentor_ids) - self.size > COMPACT_DEAD_FRACTION * len(self.mentor_ids):
+                self.compact()
+
+    def compact(self) -> None:
+        """Renumber rows and terms, dropping removed mentors and terms no document uses."""
+        with self._lock:
+            live = self.mentor_ids >= 0
+            used = self.df > 0
+            row_map = np.cumsum(live) - 1
+            col_map = np.cumsum(used) - 1
+            # vocab is in column order, so the kept terms keep their relative order
+            self.vocab = {term: int(col_map[col]) for term, col in self.vocab.items() if used[col]}
+            self.df = self.df[used]
+            self.rows, self.cols = row_map[self.rows], col_map[self.cols]
+            self.mentor_ids = self.mentor_ids[live]
+            self.row_of = {int(mentor_id): row for row, mentor_id in enumerate(self.mentor_ids)}
+            self._postings = None
+
+    def _drop(self, mentor_ids: Iterable[int]) -> List[int]:
+        # Remove the term entries of known mentors; their rows stay reserved
+        known = [mentor_id for mentor_id in mentor_ids if mentor_id in self.row_of]
+        if known and len(self.rows):
+            mask = np.isin(self.rows, [self.row_of[mentor_id] for mentor_id in known])
+            if mask.any():
+                self.df -= np.bincount(self.cols[mask], minlength=len(self.df))
+                keep = ~mask
+                self.rows, self.cols, self.counts = self.rows[keep], self.cols[keep], self.counts[keep]
+        return known
+
+    def idf(self) -> np.ndarray:
+        return np.log((1 + self.size) / (1 + self.df)) + 1
+
+    def _build_postings(self):
+        idf = self.idf()
+        n_rows = len(self.mentor_ids)
+        weights = (1 + np.log(self.counts)) * idf[self.cols] if len(self.cols) else np.zeros(0)
+        norms = np.sqrt(np.bincount(self.rows, weights=weights ** 2, minlength=n_rows))
+        if len(weights):
+            weights = weights / norms[self.rows]
+        order = np.argsort(self.cols, kind='stable')
+        col_ptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.cols, minlength=len(self.vocab)), out=col_ptr[1:])
+        live = self.mentor_ids >= 0
+        id_order = np.argsort(self.mentor_ids)
+        return {
+            # update() and remove() change vocab and mentor_ids in place
+            'vocab': dict(self.vocab),
+            'mentor_ids': self.mentor_ids.copy(),
+            'idf': idf,
+            'col_ptr': col_ptr,
+            'rows': self.rows[order],
+            'weights': weights[order],
+            'live': live,
+            'sorted_ids': self.mentor_ids[id_order],
+            'sorted_rows': id_order,
+        }
+
+    def postings(self):
+        """Snapshot of the index to answer one query from, unaffected by later changes."""
+        with self._lock:
+            if self._postings is None:
+                self._postings = self._build_postings()
+            return self._postings
+
+    def query(self, text: str) -> np.ndarray:
+        """Cosine similarity of ``text`` to every row (0 for empty rows)."""
+        return self._scores(self.postings(), text)
+
+    def _scores(self, p, text: str) -> np.ndarray:
+        # Everything comes from the snapshot ``p``: a refresh may add terms
+        # or compact (renumber) rows while the query runs
+        scores = np.zeros(len(p['live']), dtype=np.float64)
+        vocab = p['vocab']
+        terms = Counter(term for term in tokenize(text) if term in vocab)
+        if not terms:
+            return scores
+        cols = np.array([vocab[term] for term in terms], dtype=np.int64)
+        q = (1 + np.log(np.array(list(terms.values()), dtype=np.float64))) * p['idf'][cols]
+        q /= np.linalg.norm(q)
+        starts, ends = p['col_ptr'][cols], p['col_ptr'][cols + 1]
+        lengths = ends - starts
+        if not lengths.sum():
+            return scores
+        index = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+        scores = np.bincount(
+            p['rows'][index], weights=p['weights'][index] * np.repeat(q, lengths), minlength=len(scores)
+        )
+        return np.clip(scores, 0.0, 1.0)
+
+    def similarity_for(self, text: str, mentor_ids: np.ndarray) -> np.ndarray:
+        """Cosine similarity of ``text`` to each of ``mentor_ids`` (0 if unknown)."""
+        p = self.postings()
+        mentor_ids = np.asarray(mentor_ids, dtype=np.int64)
+        result = np.zeros(len(mentor_ids), dtype=np.float64)
+        if not len(p['sorted_ids']) or not len(mentor_ids):
+            return result
+        scores = self._scores(p, text)
+        pos = np.clip(np.searchsorted(p['sorted_ids'], mentor_ids), 0, len(p['sorted_ids']) - 1)
+        found = p['sorted_ids'][pos] == mentor_ids
+        result[found] = scores[p['sorted_rows'][pos[found]]]
+        return result
+
+    def top_k(self, text: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Best ``k`` (mentor_id, cosine) pairs for ``text``."""
+        p = self.postings()
+        scores = self._scores(p, text)
+        scores[~p['live']] = -1.0
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(int(p['mentor_ids'][row]), float(scores[row])) for row in best if scores[row] > 0]
+
+    def save(self, path: str) -> None:
+        with self._lock:
+            tmp = f"{path}.tmp.npz"
+            np.savez(
+                tmp,
+                terms=np.array(list(self.vocab), dtype=str),
+                df=self.df, mentor_ids=self.mentor_ids,
+                rows=self.rows, cols=self.cols, counts=self.counts,
+                synced=np.array([str(self.synced[0]), self.synced[1]], dtype=str),
+            )
+            os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'TfidfIndex':
+        index = cls()
+        with np.load(path, allow_pickle=False) as data:
+            index.vocab = {term: col for col, term in enumerate(data['terms'].tolist())}
+            index.df = data['df'].astype(np.int64)
+            index.mentor_ids = data['mentor_ids'].astype(np.int64)
+            index.rows = data['rows'].astype(np.int64)
+            index.cols = data['cols'].astype(np.int64)
+            index.counts = data['counts'].astype(np.float64)
+            count, latest = data['synced'].tolist()
+            index.synced = (int(count), latest)
+        index.row_of = {int(m): row for row, m in enumerate(index.mentor_ids) if m >= 0}
+        return index
+
+
+def _fingerprint() -> Tuple[int, str]:
+    stats = Mentor.objects.aggregate(count=Count('id'), latest=Max('updated_at'))
+    return stats['count'], stats['latest'].isoformat() if stats['latest'] else ''
+
+
+def refresh(index: TfidfIndex) -> bool:
+    """Apply mentor changes since the index was last synced; return True if any."""
+    fingerprint = _fingerprint()
+    if fingerprint == index.synced:
+        return False
+    matchable = Mentor.objects.filter(is_active=True, is_verified=True)
+    changed = Mentor.objects.all()
+    if index.synced[1]:
+        # Inclusive: a save in the same clock tick as the sync must not be missed
+        changed = changed.filter(updated_at__gte=parse_datetime(index.synced[1]))
+    updates, removals = [], []
+    for mentor in changed.iterator(chunk_size=2000):
+        if mentor.is_active and mentor.is_verified:
+            updates.append(mentor)
+        else:
+            removals.append(mentor.pk)
+    index.update(updates)
+    # Deleted mentors never show up in ``changed``
+    live_ids = set(matchable.values_list('id', flat=True))
+    removals.extend(mentor_id for mentor_id in list(index.row_of) if mentor_id not in live_ids)
+    index.remove(removals)
+    index.synced = fingerprint
+    return True
+
+
+def index_path() -> Optional[str]:
+    path = getattr(settings, 'AI_MATCHING_TFIDF_PATH', None)
+    return str(path) if path else None
+
+
+def refresh_interval() -> float:
+    """Seconds a process trusts its index before checking the mentor table again."""
+    return getattr(settings, 'AI_MATCHING_TFIDF_REFRESH_SECONDS', 5.0)
+
+
+_index: Optional[TfidfIndex] = None
+_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_tfidf_index() -> TfidfIndex:
+    """Process-wide TF-IDF index, loaded from disk and kept fresh incrementally.
+
+    Mentor changes are picked up at most once per ``refresh_interval``, so
+    scoring many pairs does not run the fingerprint query per call. The
+    file is only written by ``build_tfidf_index``.
+    """
+    global _index, _checked_at
+    index = _index
+    if index is not None and time.monotonic() - _checked_at < refresh_interval():
+        return index
+    with _index_lock:
+        if _index is None:
+            path = index_path()
+            _index = TfidfIndex.load(path) if path and os.path.exists(path) else TfidfIndex()
+        elif time.monotonic() - _checked_at < refresh_interval():
+            # Another thread refreshed it while this one waited
+            return _index
+        refresh(_index)
+        _checked_at = time.monotonic()
+        return _index
+
+
+def reset_tfidf_index() -> None:
+    global _index
+    with _index_lock:
+        _index = None
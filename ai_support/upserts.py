@@ -0,0 +1,14 @@
+from typing import List, Optional
+
+from django.db import connection
+
+
+def conflict_target(fields: List[str]) -> Optional[List[str]]:
+    """``unique_fields`` for a ``bulk_create`` upsert on the unique key ``fields``.
+
+    MySQL upserts on whichever unique key conflicts and rejects naming one,
+    so there it is None. Every table upserted into has just that one
+    unique key besides its primary key. MySQL also returns no ids for
+    upserted rows.
+    """
+    return fields if connection.features.supports_update_conflicts_with_target else None
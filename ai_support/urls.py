@@ -6,8 +6,12 @@ app_name = 'ai_support'
 urlpatterns = [
     path('chat/', views.mental_health_chat, name='chat'),
     path('send-message/', views.send_message, name='send_message'),
+    path('stream-message/', views.stream_message, name='stream_message'),
+    path('chat/history/', views.chat_history, name='chat_history'),
     path('matching/', views.ai_matching, name='matching'),
+    path('matching/bulk/', views.bulk_matching, name='bulk_matching'),
     path('mood-analytics/', views.mood_analytics, name='mood_analytics'),
+    path('chatbot/rule-stats/', views.chatbot_rule_stats, name='rule_stats'),
 ]
 
 
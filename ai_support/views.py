@@ -1,19 +1,35 @@
 import json
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
+from django.core.exceptions import ValidationError
+from django.db.models import Sum
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
-from .models import MentalHealthSession, ChatMessage
+from .models import MentalHealthSession, ChatMessage, MoodRollup
 from mentees.models import Mentee
-from .services import top_matches
+from .match_cache import cached_matches
+from .services import batch_top_matches
 from .chatbot_service import chatbot
+from .chat_history import InvalidCursor, encode_cursor, history_page, load_history
+from .chat_turns import asave_chat_turn
+from .mood_rollups import daily_series
+from .mood_trends import WINDOWS, point_trends
+
+# Messages per page of chat history, including those rendered with the chat page
+CHAT_PAGE_SIZE = 50
+CHAT_HISTORY_MAX_LIMIT = 200
+# Days of rollups the mood trend is computed over
+MOOD_TREND_DAYS = 7
 
 
 @login_required
-def mental_health_chat(request):
+@ensure_csrf_cookie
+async def mental_health_chat(request):
     """Mental health support chatbot with full functionality"""
+    user = await request.auser()
     if request.method == 'POST':
         # Handle chat interaction
         message = request.POST.get('message', '').strip()
@@ -21,45 +37,10 @@ def mental_health_chat(request):
         stress_level = request.POST.get('stress_level', 5)
         
         if message:
-            # Create or get current session
-            session, created = MentalHealthSession.objects.get_or_create(
-                user=request.user,
-                session_type='daily_checkin',
-                created_at__date=timezone.now().date(),
-                defaults={
-                    'mood_rating': mood_rating,
-                    'stress_level': stress_level,
-                    'notes': '',
-                    'ai_response': ''
-                }
-            )
-            
-            # Update session if it already exists
-            if not created:
-                session.mood_rating = mood_rating
-                session.stress_level = stress_level
-                session.save()
-            
-            # Save user message
-            ChatMessage.objects.create(
-                session=session,
-                content=message,
-                role='user'
-            )
-            
             # Generate AI response for entrepreneurs
-            ai_response = chatbot.generate_entrepreneur_response(message)
-            
-            # Save AI response
-            ChatMessage.objects.create(
-                session=session,
-                content=ai_response,
-                role='assistant'
-            )
-            
-            # Update session with AI response
-            session.ai_response = ai_response
-            session.save()
+            history = await sync_to_async(load_history)(user.pk)
+            ai_response = await chatbot.agenerate_entrepreneur_response(message, history)
+            await asave_chat_turn(user, message, ai_response, mood_rating, stress_level)
             
             return JsonResponse({
                 'response': ai_response,
@@ -68,103 +49,87 @@ def mental_health_chat(request):
             })
     
     # Get user's recent sessions and mood trends
-    recent_sessions = MentalHealthSession.objects.filter(
-        user=request.user
-    ).order_by('-created_at')[:10]
+    recent_sessions = [
+        session async for session in MentalHealthSession.objects.filter(user=user).order_by('-created_at')[:10]
+    ]
     
     # Get today's session if it exists
     today_session = None
     try:
-        today_session = MentalHealthSession.objects.get(
-            user=request.user,
-            created_at__date=timezone.now().date()
+        today_session = await MentalHealthSession.objects.aget(
+            user=user,
+            session_type='daily_checkin',
+            session_date=timezone.localdate()
         )
     except MentalHealthSession.DoesNotExist:
         pass
     
-    # Get recent chat messages for display
+    # Get the latest chat messages for display; older ones are paged in from chat_history
     recent_messages = []
+    history_cursor = ''
     if today_session:
-        recent_messages = ChatMessage.objects.filter(
-            session=today_session
-        ).order_by('created_at')
-    
-    # Calculate mood trends
-    session_data = []
-    for session in recent_sessions:
-        session_data.append({
-            'mood_rating': session.mood_rating,
-            'stress_level': session.stress_level,
-            'date': session.created_at.date()
-        })
+        recent_messages = [
+            message async for message in ChatMessage.objects.filter(session=today_session).order_by(
+                '-created_at', '-id'
+            )[:CHAT_PAGE_SIZE]
+        ]
+        recent_messages.reverse()
+        if recent_messages:
+            oldest = recent_messages[0]
+            history_cursor = encode_cursor(today_session.pk, today_session.created_at, oldest.created_at, oldest.pk)
+        else:
+            history_cursor = encode_cursor(today_session.pk, today_session.created_at)
     
-    mood_trends = chatbot.track_mood_trends(session_data)
+    # Calculate mood trends from the daily rollups
+    mood_trends = chatbot.track_mood_trends(
+        await sync_to_async(daily_series)(user.pk, MOOD_TREND_DAYS), MOOD_TREND_DAYS, timezone.localdate()
+    )
     
     context = {
         'recent_sessions': recent_sessions,
         'today_session': today_session,
         'recent_messages': recent_messages,
+        'history_cursor': history_cursor,
         'mood_trends': mood_trends,
         'current_mood': today_session.mood_rating if today_session else 5,
         'current_stress': today_session.stress_level if today_session else 5,
     }
-    return render(request, 'ai_support/chat.html', context)
+    # Context processors and the base template may still touch the database
+    return await sync_to_async(render)(request, 'ai_support/chat.html', context)
+
+
+def _chat_payload(request):
+    """(message, mood_rating, stress_level) from a JSON chat request, or an error response"""
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return None, JsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not isinstance(data, dict):
+        return None, JsonResponse({'error': 'Expected a JSON object'}, status=400)
+    message = data.get('message', '')
+    message = message.strip() if isinstance(message, str) else ''
+    if not message:
+        return None, JsonResponse({'error': 'Message is required'}, status=400)
+    return (message, data.get('mood_rating', 5), data.get('stress_level', 5)), None
 
 
 @login_required
 @csrf_exempt
 @require_http_methods(["POST"])
-def send_message(request):
+async def send_message(request):
     """AJAX endpoint for sending chat messages"""
     try:
-        data = json.loads(request.body)
-        message = data.get('message', '').strip()
-        mood_rating = data.get('mood_rating', 5)
-        stress_level = data.get('stress_level', 5)
-        
-        if not message:
-            return JsonResponse({'error': 'Message is required'}, status=400)
-        
-        # Create or get current session
-        session, created = MentalHealthSession.objects.get_or_create(
-            user=request.user,
-            session_type='daily_checkin',
-            created_at__date=timezone.now().date(),
-            defaults={
-                'mood_rating': mood_rating,
-                'stress_level': stress_level,
-                'notes': '',
-                'ai_response': ''
-            }
-        )
-        
-        # Update session if it already exists
-        if not created:
-            session.mood_rating = mood_rating
-            session.stress_level = stress_level
-            session.save()
-        
-        # Save user message
-        user_message = ChatMessage.objects.create(
-            session=session,
-            content=message,
-            role='user'
-        )
-        
+        payload, error = _chat_payload(request)
+        if error:
+            return error
+        message, mood_rating, stress_level = payload
+
         # Generate AI response for entrepreneurs
-        ai_response = chatbot.generate_entrepreneur_response(message)
-        
-        # Save AI response
-        ai_message = ChatMessage.objects.create(
-            session=session,
-            content=ai_response,
-            role='assistant'
-        )
-        
-        # Update session with AI response
-        session.ai_response = ai_response
-        session.save()
-        
+        user = await request.auser()
+        history = await sync_to_async(load_history)(user.pk)
+        ai_response = await chatbot.agenerate_entrepreneur_response(message, history)
+        user_message, ai_message = await asave_chat_turn(user, message, ai_response, mood_rating, stress_level)
+
         return JsonResponse({
             'success': True,
             'user_message': {
@@ -180,13 +145,88 @@ def send_message(request):
             'mood_rating': mood_rating,
             'stress_level': stress_level
         })
-        
-    except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _chat_events(user, message, mood_rating, stress_level):
+    # Sent before any work so the client sees the first byte immediately
+    yield _sse('start', {'mood_rating': mood_rating, 'stress_level': stress_level})
+    try:
+        chunks = []
+        history = await sync_to_async(load_history)(user.pk)
+        # A blocking model backend waits in a worker thread, not on the event loop
+        async for chunk in chatbot.astream_entrepreneur_response(message, history):
+            chunks.append(chunk)
+            yield _sse('delta', {'content': chunk})
+        # The reply is already on screen; persisting it does not delay it
+        user_message, ai_message = await asave_chat_turn(user, message, ''.join(chunks), mood_rating, stress_level)
+    except Exception as e:
+        yield _sse('error', {'error': str(e)})
+        return
+    yield _sse('done', {
+        'user_message': {'timestamp': user_message.created_at.isoformat()},
+        'ai_response': {'timestamp': ai_message.created_at.isoformat()},
+    })
+
+
+@login_required
+@require_http_methods(["POST"])
+async def stream_message(request):
+    """Chat endpoint streaming the reply as server-sent events
+
+    Events: ``start`` at once, ``delta`` for each reply chunk, then ``done``
+    once the turn is saved (or ``error``).
+    """
+    payload, error = _chat_payload(request)
+    if error:
+        return error
+    user = await request.auser()
+    response = StreamingHttpResponse(_chat_events(user, *payload), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep reverse proxies such as nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+@require_http_methods(["GET"])
+def chat_history(request):
+    """Page back through the user's chat messages, newest first
+
+    Pass the returned ``next_cursor`` as ``cursor`` for the next page; it is
+    null once the history is exhausted.
+    """
+    try:
+        limit = int(request.GET.get('limit', CHAT_PAGE_SIZE))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= CHAT_HISTORY_MAX_LIMIT:
+        return JsonResponse({'error': f'limit must be between 1 and {CHAT_HISTORY_MAX_LIMIT}'}, status=400)
+    try:
+        messages, next_cursor = history_page(request.user.pk, request.GET.get('cursor') or None, limit)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    return JsonResponse({
+        'messages': [
+            {
+                'id': message['id'],
+                'session_id': message['session_id'],
+                'role': message['role'],
+                'content': message['content'],
+                'created_at': message['created_at'].isoformat(),
+            }
+            for message in messages
+        ],
+        'next_cursor': next_cursor,
+    })
+
+
 @login_required
 def ai_matching(request):
     """AI-powered mentor matching"""
@@ -197,7 +237,7 @@ def ai_matching(request):
 
     results = []
     if mentee:
-        results = top_matches(mentee)
+        results = cached_matches(mentee)
 
     context = {
         'title': 'AI Mentor Matching',
@@ -207,53 +247,161 @@ def ai_matching(request):
     return render(request, 'ai_support/matching.html', context)
 
 
+# Mentee fields partners may filter a cohort on, by the JSON type of their value
+BULK_MATCH_FILTERS = {
+    'industry': str, 'industry__iexact': str, 'business_stage': str, 'location__iexact': str,
+    'is_active': bool, 'onboarding_complete': bool,
+}
+BULK_MATCH_BATCH_SIZE = 200
+BULK_MATCH_MAX_LIMIT = 20
+
+
+def _cohort(mentee_ids, mentees):
+    """Yield (mentee id, mentee) a batch at a time; the mentee is None for unknown ids."""
+    if mentee_ids is not None:
+        for start in range(0, len(mentee_ids), BULK_MATCH_BATCH_SIZE):
+            chunk = mentee_ids[start:start + BULK_MATCH_BATCH_SIZE]
+            found = Mentee.objects.in_bulk(chunk)
+            for mentee_id in chunk:
+                yield mentee_id, found.get(mentee_id)
+        return
+    last = 0
+    while True:
+        batch = list(mentees.filter(pk__gt=last).order_by('pk')[:BULK_MATCH_BATCH_SIZE])
+        yield from ((mentee.pk, mentee) for mentee in batch)
+        if len(batch) < BULK_MATCH_BATCH_SIZE:
+            return
+        last = batch[-1].pk
+
+
+def _bulk_match_lines(cohort, limit):
+    missing = []
+
+    def found():
+        for mentee_id, mentee in cohort:
+            if mentee is None:
+                missing.append(mentee_id)
+            else:
+                yield mentee
+
+    def missing_lines():
+        while missing:
+            yield json.dumps({'mentee_id': missing.pop(0), 'error': 'Mentee not found'}) + '\n'
+
+    for mentee, matches in batch_top_matches(found(), limit):
+        # Unknown ids requested before this mentee have been seen by now
+        yield from missing_lines()
+        yield json.dumps({
+            'mentee_id': mentee.pk,
+            'matches': [
+                {'mentor_id': mentor.pk, 'name': mentor.name, 'score': score, 'reasoning': reasoning}
+                for mentor, score, reasoning in matches
+            ],
+        }) + '\n'
+    yield from missing_lines()
+
+
+@login_required
+@require_http_methods(["POST"])
+def bulk_matching(request):
+    """Stream top matches for a cohort of mentees as NDJSON (staff only)"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Staff access required'}, status=403)
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'error': 'Expected a JSON object'}, status=400)
+
+    mentee_ids = data.get('mentee_ids')
+    filters = data.get('filter')
+    if (mentee_ids is None) == (filters is None):
+        return JsonResponse({'error': 'Provide either mentee_ids or filter'}, status=400)
+    if mentee_ids is not None and (
+        not isinstance(mentee_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in mentee_ids)
+    ):
+        return JsonResponse({'error': 'mentee_ids must be a list of integers'}, status=400)
+    if filters is not None:
+        if not isinstance(filters, dict) or set(filters) - set(BULK_MATCH_FILTERS):
+            return JsonResponse(
+                {'error': f"filter keys must be among: {', '.join(sorted(BULK_MATCH_FILTERS))}"}, status=400
+            )
+        for key, value in filters.items():
+            if not isinstance(value, BULK_MATCH_FILTERS[key]):
+                kind = 'a boolean' if BULK_MATCH_FILTERS[key] is bool else 'a string'
+                return JsonResponse({'error': f'filter {key} must be {kind}'}, status=400)
+
+    limit = data.get('limit', 3)
+    if not isinstance(limit, int) or isinstance(limit, bool) or not 1 <= limit <= BULK_MATCH_MAX_LIMIT:
+        return JsonResponse({'error': f'limit must be between 1 and {BULK_MATCH_MAX_LIMIT}'}, status=400)
+
+    # Built here so a bad filter is a 400, not an error midway through the stream
+    try:
+        mentees = Mentee.objects.filter(**filters) if filters is not None else None
+    except ValidationError as exc:
+        return JsonResponse({'error': ' '.join(exc.messages)}, status=400)
+
+    return StreamingHttpResponse(
+        _bulk_match_lines(_cohort(mentee_ids, mentees), limit),
+        content_type='application/x-ndjson',
+    )
+
+
+@login_required
+@require_http_methods(["GET"])
+def chatbot_rule_stats(request):
+    """Per-rule hit counts and timings of this process's chatbot (staff only)"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Staff access required'}, status=403)
+    return JsonResponse({'rules': chatbot.rule_stats()})
+
+
+# Days plotted on the mood analytics chart, newest last
+MOOD_CHART_DAYS = 90
+
+
 @login_required
 def mood_analytics(request):
     """Mood tracking and analytics dashboard"""
-    # Get user's mood history
-    sessions = MentalHealthSession.objects.filter(
-        user=request.user
-    ).order_by('created_at')
-    
-    # Prepare data for charts
-    mood_data = []
-    stress_data = []
-    dates = []
-    
-    for session in sessions:
-        mood_data.append(session.mood_rating)
-        stress_data.append(session.stress_level)
-        dates.append(session.created_at.strftime('%Y-%m-%d'))
-    
-    # Calculate statistics
-    if sessions:
-        avg_mood = sum(session.mood_rating for session in sessions) / len(sessions)
-        avg_stress = sum(session.stress_level for session in sessions) / len(sessions)
-        total_sessions = len(sessions)
+    # Whole-history statistics add up the weekly rollups
+    totals = MoodRollup.objects.filter(user=request.user, period='week').aggregate(
+        total_sessions=Sum('session_count'), mood_sum=Sum('mood_sum'), stress_sum=Sum('stress_sum')
+    )
+    total_sessions = totals['total_sessions'] or 0
+    if total_sessions:
+        avg_mood = totals['mood_sum'] / total_sessions
+        avg_stress = totals['stress_sum'] / total_sessions
     else:
         avg_mood = 5
         avg_stress = 5
-        total_sessions = 0
-    
-    # Get mood trends
-    session_data = []
-    for session in sessions:
-        session_data.append({
-            'mood_rating': session.mood_rating,
-            'stress_level': session.stress_level,
-            'date': session.created_at.date()
-        })
-    
-    mood_trends = chatbot.track_mood_trends(session_data)
-    
+
+    # The chart plots daily means; the same points feed the 7/30/90-day trends
+    today = timezone.localdate()
+    days = daily_series(request.user.pk, MOOD_CHART_DAYS)
+    mood_trends = chatbot.track_mood_trends(days, MOOD_TREND_DAYS, today)
+    windows = point_trends(days, WINDOWS, today)
+
+    sessions = MentalHealthSession.objects.filter(user=request.user).order_by('-created_at', '-id').values(
+        'mood_rating', 'stress_level', 'session_type', 'created_at'
+    )
+
     context = {
-        'mood_data': mood_data,
-        'stress_data': stress_data,
-        'dates': dates,
+        'mood_data': [day['mood_rating'] for day in days],
+        'stress_data': [day['stress_level'] for day in days],
+        'dates': [day['date'].isoformat() for day in days],
         'avg_mood': round(avg_mood, 1),
         'avg_stress': round(avg_stress, 1),
         'total_sessions': total_sessions,
         'mood_trends': mood_trends,
+        'trend_windows': [
+            {
+                'days': window,
+                'weekly_change': None if windows[window]['mood']['slope'] is None else windows[window]['mood']['slope'] * 7,
+                **windows[window],
+            }
+            for window in WINDOWS
+        ],
         'sessions': sessions[:10],  # Recent 10 sessions
     }
     return render(request, 'ai_support/mood_analytics.html', context)
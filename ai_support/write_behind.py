@@ -0,0 +1,146 @@
+import atexit
+import logging
+import threading
+from collections import deque
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections, transaction
+
+from .models import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+
+def write_behind_enabled() -> bool:
+    return getattr(settings, 'AI_CHAT_WRITE_BEHIND', {}).get('enabled', False)
+
+
+class MessageBuffer:
+    """In-process write-behind queue for ChatMessage rows.
+
+    ``put`` only appends to a list. A daemon thread ``bulk_create``s the
+    queue once it holds ``batch_size`` messages or ``flush_interval``
+    seconds have passed, and once more at interpreter exit. Flushes are
+    serialized and keep enqueue order, and a failed batch goes back to the
+    front of the queue, so each session's messages land in order. Every
+    message carries a unique ``idempotency_key`` and is inserted with
+    ``ignore_conflicts``, so a batch retried after an unacknowledged
+    commit is not duplicated. Past ``max_pending`` queued messages, callers
+    flush inline instead of growing the queue.
+
+    A batch the database rejects for its contents is split until the bad
+    rows are isolated. Those rows are logged and kept in ``dead_letters``
+    (the latest ``max_dead_letters``) instead of blocking the queue.
+
+    Messages still queued when the process is killed outright are lost;
+    only a normal exit flushes them.
+    """
+
+    def __init__(self, batch_size: int = 200, flush_interval: float = 1.0,
+                 max_pending: int = 10000, background: bool = True, max_dead_letters: int = 1000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.background = background
+        self._pending: List[ChatMessage] = []
+        self.dead_letters = deque(maxlen=max_dead_letters)
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def put(self, messages: Iterable[ChatMessage]) -> None:
+        with self._cond:
+            self._pending.extend(messages)
+            if self.background and self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name='chat-write-behind', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+            overflow = len(self._pending) >= self.max_pending
+        if overflow or self._closed:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write every queued message now; returns how many were written.
+
+        Errors other than rejected rows (say, a lost connection) put the
+        whole batch back in front of the queue and are re-raised.
+        """
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                return self._write(batch)
+            except Exception:
+                with self._cond:
+                    self._pending[:0] = batch
+                raise
+
+    def _write(self, batch: List[ChatMessage]) -> int:
+        try:
+            # Deferred foreign keys are checked when this block commits
+            with transaction.atomic():
+                ChatMessage.objects.bulk_create(batch, batch_size=self.batch_size, ignore_conflicts=True)
+            return len(batch)
+        except (IntegrityError, DataError) as exc:
+            if len(batch) == 1:
+                message, = batch
+                logger.error(
+                    'Dropping chat message %s of session %s rejected by the database: %s',
+                    message.idempotency_key, message.session_id, exc,
+                )
+                self.dead_letters.append(message)
+                return 0
+        middle = len(batch) // 2
+        return self._write(batch[:middle]) + self._write(batch[middle:])
+
+    def close(self) -> None:
+        """Stop the flusher and write whatever is still queued."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        atexit.unregister(self.close)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=max(self.flush_interval, 1.0) * 5)
+        self.flush()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            if closed:
+                return
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Chat message write-behind flush failed; retrying')
+                with self._cond:
+                    self._cond.wait(self.flush_interval)
+
+
+_buffer: Optional[MessageBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def get_message_buffer() -> MessageBuffer:
+    """The process-wide buffer, configured from ``settings.AI_CHAT_WRITE_BEHIND``."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            options = dict(getattr(settings, 'AI_CHAT_WRITE_BEHIND', {}))
+            options.pop('enabled', None)
+            _buffer = MessageBuffer(**options)
+        return _buffer
@@ -1,3 +1,23 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .text import phrase_matches, phrase_tokens, stem
+
+
+class TextTests(SimpleTestCase):
+    def test_phrase_tokens(self):
+        self.assertEqual(phrase_tokens('The Marketing strategies, and markets!'), ['market', 'market strategy'])
+        self.assertEqual(phrase_tokens('Business, businesses;\nbusiness'), ['business'])
+        self.assertEqual(phrase_tokens(''), [])
+
+    def test_stems_are_words(self):
+        words = ['hiring', 'hires', 'employees', 'financing', 'finances', 'planning', 'management', 'managing', 'taxes', 'supply']
+        self.assertEqual(
+            [stem(word) for word in words],
+            ['hire', 'hire', 'employee', 'finance', 'finance', 'plan', 'manage', 'manage', 'tax', 'supply'],
+        )
+
+    def test_phrase_matches_whole_words(self):
+        self.assertTrue(phrase_matches(['market'], ['digital market']))
+        self.assertTrue(phrase_matches(['digital market'], ['digital market strategy']))
+        self.assertFalse(phrase_matches(['digital market'], ['market']))
+        self.assertFalse(phrase_matches(['business growth'], ['business develop', 'growth']))
@@ -0,0 +1,116 @@
+import re
+from typing import Iterable, List
+
+
+STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having he her here hers herself him himself his how i if in into is it its itself just
+me more most my myself no nor not now of off on once only or other our ours ourselves out over own
+same she should so some such than that the their theirs them themselves then there these they this
+those through to too under until up very was we were what when where which while who whom why will
+with would you your yours yourself yourselves
+""".split())
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of ``text`` without stop words or single letters."""
+    return [
+        word for word in _WORD_RE.findall((text or '').lower())
+        if len(word) > 1 and word not in STOP_WORDS
+    ]
+
+
+# (suffix, replacement), first match wins; the stem must keep 3+ letters
+_STEM_RULES = [
+    ('ational', 'ate'), ('ization', 'ize'), ('fulness', 'ful'), ('iveness', 'ive'),
+    ('ments', ''), ('ment', ''),
+    ('ness', ''), ('ings', ''), ('ing', ''), ('edly', ''), ('ed', ''), ('ly', ''),
+    ('ies', 'y'), ('sses', 'ss'), ('ches', 'ch'), ('shes', 'sh'), ('xes', 'x'), ('s', ''),
+]
+# Suffixes that only follow a stem with a vowel in it ('thing', 'string', 'speed' keep theirs)
+_VERB_SUFFIXES = ('ings', 'ing', 'edly', 'ed')
+_VOWELS = frozenset('aeiou')
+_DOUBLE_CONSONANTS = frozenset('bdfgmnprt')
+# Endings of stems that lost a silent 'e' with their suffix: 'pricing' -> 'pric' -> 'price'
+_SILENT_E_ENDINGS = ('at', 'bl', 'iz', 'is', 'as', 'ns', 'rs', 'dg', 'rg', 'ur', 'uir', 'c', 'v')
+
+
+def _silent_e(word: str) -> bool:
+    """Whether a stem left by -ing/-ed needs its 'e' back, as in 'hir' and 'manag'."""
+    if word.endswith(_SILENT_E_ENDINGS):
+        # 'treat', 'pour' and 'focus' had no 'e' to lose
+        return not (word.endswith(('at', 'ur')) and word[-3] in _VOWELS)
+    if word[-1] == 'g' and word[-2] in _VOWELS:
+        return True
+    if word.endswith(('ang', 'eng')) and len(word) > 4:
+        # 'changing', 'challenging'; not 'belonging'
+        return True
+    # A single syllable ending consonant-vowel-consonant: 'hir', 'cod', 'scal'
+    syllables = sum(1 for prev, char in zip(word, word[1:]) if prev in _VOWELS and char not in _VOWELS)
+    return (
+        syllables == 1 and word[-1] not in _VOWELS | set('wxy')
+        and word[-2] in _VOWELS and word[-3] not in _VOWELS
+    )
+
+
+def stem(word: str) -> str:
+    """Light suffix-stripping stemmer: 'marketing', 'markets' -> 'market', 'hiring' -> 'hire'."""
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    for suffix, replacement in _STEM_RULES:
+        if not word.endswith(suffix) or len(word) - len(suffix) + len(replacement) < 3:
+            continue
+        base = word[:-len(suffix)]
+        if suffix == 's' and word[-2] in 'sui':
+            break
+        if suffix == 'ness' and word[-5] == 'i':
+            # 'business' is not 'busi' + 'ness'
+            continue
+        if suffix == 'ly' and (base[-1] in _VOWELS or base[-1] == base[-2]):
+            # 'supply' and 'family' are not adverbs
+            break
+        if suffix in _VERB_SUFFIXES and (not _VOWELS.intersection(base) or suffix == 'ed' and base[-1] == 'e'):
+            break
+        word = base + replacement
+        if suffix in _VERB_SUFFIXES:
+            if word[-1] == word[-2] and word[-1] in _DOUBLE_CONSONANTS:
+                # 'planning' -> 'plann' -> 'plan'
+                word = word[:-1]
+            elif _silent_e(word):
+                word += 'e'
+        break
+    return word
+
+
+_PHRASE_SPLIT_RE = re.compile(r"[,;\n]")
+# Longest run of words indexed out of one focus phrase
+MAX_PHRASE_WORDS = 6
+
+
+def phrase_tokens(text: str) -> List[str]:
+    """Sorted, de-duplicated phrases of ``text``, as stored on profiles for matching.
+
+    ``text`` is split on commas, semicolons and newlines; each phrase is
+    its stemmed words joined by single spaces.
+    """
+    phrases = (' '.join(stem(word) for word in tokenize(part)) for part in _PHRASE_SPLIT_RE.split(text or ''))
+    return sorted({phrase for phrase in phrases if phrase})
+
+
+def sub_phrases(phrase: str) -> List[str]:
+    """Every run of up to MAX_PHRASE_WORDS consecutive words of ``phrase``."""
+    words = phrase.split()
+    return [
+        ' '.join(words[start:end])
+        for start in range(len(words))
+        for end in range(start + 1, min(start + MAX_PHRASE_WORDS, len(words)) + 1)
+    ]
+
+
+def phrase_matches(phrases: Iterable[str], focus_phrases: Iterable[str]) -> bool:
+    """Whether any of ``phrases`` occurs, as whole words, inside one of ``focus_phrases``."""
+    covered = {part for focus in focus_phrases for part in sub_phrases(focus)}
+    return not covered.isdisjoint(phrases)
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentees', '0002_mentee_languages_mentee_onboarding_complete_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentee',
+            name='challenge_tokens',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='mentee',
+            name='goal_tokens',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
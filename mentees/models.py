@@ -2,6 +2,8 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 
+from core.text import phrase_tokens
+
 
 class Mentee(models.Model):
     """Mentee profile for the mentorship platform"""
@@ -23,6 +25,9 @@ class Mentee(models.Model):
     # Challenges and Goals
     main_challenges = models.TextField(help_text="Describe your main business challenges")
     mentorship_goals = models.TextField(help_text="What do you hope to achieve through mentorship?")
+    # Canonical token sets of the two fields above, kept current on save for matching
+    challenge_tokens = models.JSONField(default=list, blank=True, editable=False)
+    goal_tokens = models.JSONField(default=list, blank=True, editable=False)
     
     # Personal Information
     phone = models.CharField(max_length=20, blank=True)
@@ -49,6 +54,22 @@ class Mentee(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.business_stage}"
 
+    # Source text field -> token field derived from it
+    TOKEN_FIELDS = {'main_challenges': 'challenge_tokens', 'mentorship_goals': 'goal_tokens'}
+
+    def refresh_tokens(self):
+        self.challenge_tokens = phrase_tokens(self.main_challenges)
+        self.goal_tokens = phrase_tokens(self.mentorship_goals)
+
+    def save(self, *args, **kwargs):
+        self.refresh_tokens()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields, *(self.TOKEN_FIELDS[name] for name in update_fields if name in self.TOKEN_FIELDS)
+            }
+        super().save(*args, **kwargs)
+
 
 class ConnectionRequest(models.Model):
     """Connection requests between mentees and mentors"""
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentors', '0002_mentor_average_rating_mentor_rating_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentor',
+            name='max_mentees',
+            field=models.PositiveIntegerField(default=3, help_text='How many mentees this mentor can take on'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentors', '0003_mentor_max_mentees'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentor',
+            name='focus_area_tokens',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
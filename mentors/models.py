@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
+from core.text import phrase_tokens
+
 
 class Mentor(models.Model):
     """Mentor profile for the mentorship platform"""
@@ -11,6 +13,8 @@ class Mentor(models.Model):
     years_experience = models.IntegerField()
     short_bio = models.TextField()
     key_focus_areas = models.TextField()
+    # Canonical token set of key_focus_areas, kept current on save for matching
+    focus_area_tokens = models.JSONField(default=list, blank=True, editable=False)
     availability_status = models.CharField(
         max_length=20,
         choices=[
@@ -36,6 +40,7 @@ class Mentor(models.Model):
     # Ratings
     average_rating = models.FloatField(default=0.0)
     rating_count = models.PositiveIntegerField(default=0)
+    max_mentees = models.PositiveIntegerField(default=3, help_text="How many mentees this mentor can take on")
     is_verified = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -48,6 +53,16 @@ class Mentor(models.Model):
     def __str__(self):
         return f"{self.name} - {self.expertise}"
 
+    def refresh_tokens(self):
+        self.focus_area_tokens = phrase_tokens(self.key_focus_areas)
+
+    def save(self, *args, **kwargs):
+        self.refresh_tokens()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'key_focus_areas' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'focus_area_tokens'}
+        super().save(*args, **kwargs)
+
     @property
     def full_expertise(self):
         return f"{self.expertise} ({self.years_experience} years experience)"
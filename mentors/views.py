@@ -1,6 +1,7 @@
 from django.shortcuts import render, get_object_or_404
 from django.db.models import Q
 from .models import Mentor
+from core.text import phrase_tokens
 from django.core.paginator import Paginator
 from mentees.models import ConnectionRequest
 
@@ -16,8 +17,9 @@ def mentor_list(request):
             Q(name__icontains=search_query) |
             Q(expertise__icontains=search_query) |
             Q(industry__icontains=search_query) |
-            Q(short_bio__icontains=search_query)
-        )
+            Q(short_bio__icontains=search_query) |
+            Q(focus_tokens__token__in=phrase_tokens(search_query))
+        ).distinct()
     
     # Filter by availability
     availability = request.GET.get('availability', '')
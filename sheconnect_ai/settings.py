@@ -113,6 +113,27 @@ else:
         }
     }
 
+# Match list versions and chat history rings must be shared by every worker,
+# so the default is the database cache (python manage.py createcachetable)
+# rather than per-process local memory; Redis works as well
+CACHES = {
+    'default': {
+        'BACKEND': env("CACHE_BACKEND", default='django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': env("CACHE_LOCATION", default='sheconnect_ai_cache'),
+    }
+}
+# Only Django's own local-memory, file and database caches cull; Redis and
+# memcached clients would reject these as unknown connection options
+if CACHES['default']['BACKEND'] in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.db.DatabaseCache',
+):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': env.int("CACHE_MAX_ENTRIES", default=10000),
+        'CULL_FREQUENCY': env.int("CACHE_CULL_FREQUENCY", default=3),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -181,3 +202,47 @@ STATICFILES_DIRS = [
 ]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# AI matching
+# 'keyword' scores challenges/goals as 0/100 focus-area hits, 'tfidf' as graded similarity
+AI_MATCHING_TEXT_SIMILARITY = env("AI_MATCHING_TEXT_SIMILARITY", default="keyword")
+AI_MATCHING_TFIDF_PATH = env("AI_MATCHING_TFIDF_PATH", default=str(BASE_DIR / 'tfidf_index.npz'))
+# How often (seconds) a process checks mentors for TF-IDF changes; build_tfidf_index --update saves them
+AI_MATCHING_TFIDF_REFRESH_SECONDS = env.float("AI_MATCHING_TFIDF_REFRESH_SECONDS", default=5.0)
+# 'exact' scores every mentor, 'lsh' only re-ranks LSH candidates (very large pools).
+# Applies to top_matches and bulk matching; materialized match rows always cover every mentor.
+AI_MATCHING_CANDIDATES = env("AI_MATCHING_CANDIDATES", default="exact")
+AI_MATCHING_LSH = {
+    'tables': env.int("AI_MATCHING_LSH_TABLES", default=16),
+    'bits': env.int("AI_MATCHING_LSH_BITS", default=12),
+    'candidates': env.int("AI_MATCHING_LSH_CANDIDATES", default=300),
+}
+# Cache alias and lifetime (seconds) of per-mentee top match lists
+AI_MATCHING_CACHE = env("AI_MATCHING_CACHE", default="default")
+AI_MATCHING_CACHE_TTL = env.int("AI_MATCHING_CACHE_TTL", default=900)
+
+# AI chatbot
+# Model backend: an OpenAI-compatible base URL (e.g. https://api.openai.com/v1).
+# Empty keeps the rule-based replies; they are also the fallback past the deadline (seconds).
+AI_CHATBOT_BACKEND = {
+    'url': env("AI_CHATBOT_BACKEND_URL", default=""),
+    'model': env("AI_CHATBOT_MODEL", default="gpt-4o-mini"),
+    'api_key': env("AI_CHATBOT_API_KEY", default=""),
+    'timeout': env.float("AI_CHATBOT_TIMEOUT", default=3.0),
+    'deadline': env.float("AI_CHATBOT_DEADLINE", default=8.0),
+    'max_retries': env.int("AI_CHATBOT_MAX_RETRIES", default=2),
+    'retry_ratio': env.float("AI_CHATBOT_RETRY_RATIO", default=0.1),
+    'max_concurrency': env.int("AI_CHATBOT_MAX_CONCURRENCY", default=8),
+}
+# Messages of today's conversation passed to the chatbot, kept as a cached ring per user
+AI_CHATBOT_HISTORY_SIZE = env.int("AI_CHATBOT_HISTORY_SIZE", default=10)
+AI_CHATBOT_HISTORY_CACHE = env("AI_CHATBOT_HISTORY_CACHE", default="default")
+AI_CHATBOT_HISTORY_TTL = env.int("AI_CHATBOT_HISTORY_TTL", default=3600)
+# Write-behind mode: chat messages are queued in-process and bulk-inserted by a background
+# thread every batch_size messages or flush_interval seconds, and at shutdown
+AI_CHAT_WRITE_BEHIND = {
+    'enabled': env.bool("AI_CHAT_WRITE_BEHIND", default=False),
+    'batch_size': env.int("AI_CHAT_WRITE_BEHIND_BATCH_SIZE", default=200),
+    'flush_interval': env.float("AI_CHAT_WRITE_BEHIND_INTERVAL", default=1.0),
+    'max_pending': env.int("AI_CHAT_WRITE_BEHIND_MAX_PENDING", default=10000),
+}